@@ -45,6 +45,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Request timing: Server-Timing header, timing logs, /metrics histograms
+    'equipment.middleware.TimingMiddleware',
+
     # Allow React/Desktop Access (CORS)
     'corsheaders.middleware.CorsMiddleware',
 
@@ -55,6 +58,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+
+    # Opt-in per-request profiling for staff (X-Profile header / ?profile=1)
+    'equipment.middleware.ProfilingMiddleware',
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -141,7 +147,7 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'uploads')
 # Enable Authentication
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "equipment.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -150,4 +156,130 @@ REST_FRAMEWORK = {
 
 
 STATIC_URL = '/static/'
-STATIC_ROOT = BASE_DIR / 'staticfiles'
\ No newline at end of file
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+
+# CSV analytics backend: "pandas" (eager) or "polars" (lazy, multithreaded;
+# falls back to pandas when polars is not installed)
+ANALYTICS_BACKEND = os.environ.get("ANALYTICS_BACKEND", "pandas")
+
+# Summary data lists (flowrate_list, ...) hold the first this many values
+# (0 = all rows); appends then rewrite a bounded summary
+SUMMARY_LIST_MAX_VALUES = int(os.environ.get("SUMMARY_LIST_MAX_VALUES", 10_000))
+
+# PDF report chart backend: "matplotlib" (raster look) or "vector" (fast, small)
+REPORT_CHART_BACKEND = os.environ.get("REPORT_CHART_BACKEND", "matplotlib")
+
+# API tokens expire after this many hours (0 = never); login replaces expired ones
+TOKEN_EXPIRY_HOURS = int(os.environ.get("TOKEN_EXPIRY_HOURS", 24 * 30))
+
+# Verified tokens: in-process LRU (size, seconds) + shared cache (seconds)
+TOKEN_CACHE_SIZE = 1024
+TOKEN_CACHE_LOCAL_TTL = 30
+TOKEN_CACHE_TTL = 5 * 60
+
+# Server-side cache (reports, summaries, history lists, verified tokens)
+# EQUIPMENT_CACHE: "file" (default) or "redis" (e.g. a local redis-server
+# on 127.0.0.1:6379) are shared by all workers and management commands,
+# so invalidations reach every process. "locmem" is per process: summary /
+# history snapshots and the shared token layer are then skipped.
+_CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "equipment"),
+    "file": ("django.core.cache.backends.filebased.FileBasedCache", os.path.join(BASE_DIR, "cache")),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://127.0.0.1:6379/1"),
+}
+_cache_backend, _cache_location = _CACHE_BACKENDS[os.environ.get("EQUIPMENT_CACHE", "file")]
+
+CACHES = {
+    "default": {
+        "BACKEND": _cache_backend,
+        "LOCATION": os.environ.get("EQUIPMENT_CACHE_LOCATION", _cache_location),
+        "TIMEOUT": 60 * 60,
+    }
+}
+
+# Summary snapshots + history lists (invalidated explicitly on change)
+SUMMARY_CACHE_TIMEOUT = 60 * 60
+
+# Generated PDF reports are cached per dataset version (seconds)
+REPORT_CACHE_TIMEOUT = 60 * 60
+
+# Worker processes for CPU-bound analysis / report rendering (0 = all cores)
+EQUIPMENT_WORKERS = int(os.environ.get("EQUIPMENT_WORKERS", 0)) or None
+
+# Job scheduler in front of the workers (equipment/scheduler.py):
+# queued jobs beyond these limits answer 429 + Retry-After
+SCHEDULER_MAX_QUEUE = int(os.environ.get("SCHEDULER_MAX_QUEUE", 64))
+SCHEDULER_MAX_QUEUE_PER_USER = int(os.environ.get("SCHEDULER_MAX_QUEUE_PER_USER", 16))
+
+# Queued jobs count as this many bytes smaller per second waited (no starvation)
+SCHEDULER_AGING_BYTES_PER_SECOND = 8 * 1024 * 1024
+
+# Upper bound for Retry-After on 429 responses (seconds)
+SCHEDULER_MAX_RETRY_AFTER = 60
+
+# CSVs at least this big are analyzed in parallel byte ranges (bytes)
+PARALLEL_ANALYSIS_MIN_BYTES = int(os.environ.get("PARALLEL_ANALYSIS_MIN_BYTES", 64 * 1024 * 1024))
+
+# Single uploads are hashed + analyzed while the body is received (one
+# core; each batch waits for a scheduler worker slot). Bodies of
+# PARALLEL_ANALYSIS_MIN_BYTES or more are stored first and analyzed in
+# parallel byte ranges instead. Memory per streamed upload: one 4 MB
+# batch of rows plus the summary's data lists (SUMMARY_LIST_MAX_VALUES);
+# rows go to disk as columnar segments batch by batch
+STREAMING_UPLOAD_ANALYSIS = os.environ.get("STREAMING_UPLOAD_ANALYSIS", "1") == "1"
+
+# Rejected uploads with more than this left unread reset the connection (bytes)
+UPLOAD_REJECT_DRAIN_BYTES = 1024 * 1024
+
+# Stored dataset CSVs are compressed at rest: "gzip", "zstd" (needs the
+# zstandard package, else gzip) or "none". Existing files: compress_uploads
+UPLOAD_COMPRESSION = os.environ.get("UPLOAD_COMPRESSION", "gzip")
+
+# Compression level (None = codec default: gzip 6, zstd 10)
+UPLOAD_COMPRESSION_LEVEL = None
+
+# Global retention policy, enforced by `manage.py enforce_retention`
+# (per-user overrides: RetentionPolicy). 0 = unlimited
+RETENTION_MAX_DATASETS = int(os.environ.get("RETENTION_MAX_DATASETS", 5))
+RETENTION_MAX_AGE_DAYS = int(os.environ.get("RETENTION_MAX_AGE_DAYS", 0))
+RETENTION_MAX_TOTAL_BYTES = int(os.environ.get("RETENTION_MAX_TOTAL_BYTES", 0))
+
+# Ad-hoc DuckDB queries (/api/query/): timeout (s, loading included),
+# max result rows, max datasets scanned, DuckDB threads per query,
+# result cache lifetime (s)
+QUERY_TIMEOUT = float(os.environ.get("QUERY_TIMEOUT", 5))
+QUERY_MAX_ROWS = 1000
+QUERY_MAX_DATASETS = int(os.environ.get("QUERY_MAX_DATASETS", 50))
+QUERY_THREADS = 2
+QUERY_CACHE_TIMEOUT = 600
+
+# Batch uploads (/api/upload/batch/): max CSVs per request, max size per CSV
+UPLOAD_BATCH_MAX_FILES = 50
+UPLOAD_BATCH_MAX_FILE_SIZE = 200 * 1024 * 1024
+
+# Who may scrape /metrics ("*" = anyone), comma separated
+METRICS_ALLOWED_IPS = os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+
+# Per-request profiling (staff only; off by default outside DEBUG):
+# where profiles are saved, and knobs
+PROFILE_ENABLED = os.environ.get("PROFILE_ENABLED", "1" if DEBUG else "0") == "1"
+PROFILE_ROOT = os.environ.get("PROFILE_ROOT", os.path.join(BASE_DIR, "profiles"))
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_TRACEMALLOC_FRAMES = 10
+
+# Structured per-request timing logs (logger: equipment.timing)
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "equipment.timing": {
+            "handlers": ["console"],
+            "level": os.environ.get("EQUIPMENT_TIMING_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
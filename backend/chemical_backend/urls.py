@@ -19,14 +19,17 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
-from rest_framework.authtoken.views import obtain_auth_token
+from equipment.views import ObtainTokenView, metrics_view
 
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("equipment.urls")),
 
-    path("api/token/", obtain_auth_token),
+    path("api/token/", ObtainTokenView.as_view()),
+
+    # ✅ Prometheus scrape endpoint
+    path("metrics", metrics_view),
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
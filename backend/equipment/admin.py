@@ -1,3 +1,9 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import RetentionPolicy
+
+
+# ✅ Per-user retention overrides (empty = global RETENTION_* settings)
+@admin.register(RetentionPolicy)
+class RetentionPolicyAdmin(admin.ModelAdmin):
+    list_display = ("user", "max_datasets", "max_age_days", "max_total_bytes")
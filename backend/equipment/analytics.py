@@ -1,63 +1,572 @@
+import contextlib
+import importlib.util
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import wait
+
+import numpy as np
 import pandas as pd
+from django.conf import settings
 
+from .compression import (
+    append_bytes, compress_file, ends_with_newline, is_compressed, open_csv,
+)
+from .instrumentation import span
+from .sketches import build_sketches, merge_sketches
 
-def analyze_csv(file_path):
-    """
-    Reads CSV and returns summary analytics.
 
-    ✅ Supports:
-    - Web React Dashboard (Table + Charts)
-    - Desktop PyQt Dashboard (Table + Charts)
-    - PDF Report Generation
-    """
+# ✅ Required Columns (Screening Task Columns)
+REQUIRED_COLUMNS = ["Type", "Flowrate", "Pressure", "Temperature"]
+NUMERIC_COLUMNS = ["Flowrate", "Pressure", "Temperature"]
+
+# ✅ Optional equipment identifier (distinct counts, row pages)
+NAME_COLUMN = "Equipment Name"
 
-    df = pd.read_csv(file_path)
+# ✅ Preview Limit (Task requires table display)
+PREVIEW_ROWS = 10
 
-    # ✅ Required Columns Validation (Screening Task Columns)
-    required_cols = ["Type", "Flowrate", "Pressure", "Temperature"]
 
-    for col in required_cols:
+# ============================================================
+# ✅ Reading + Cleaning
+# ============================================================
+
+def read_csv_checked(file_path):
+    """
+    Reads a CSV (path or file object) and validates the required columns.
+    Returns the raw DataFrame, before any numeric cleaning.
+    Stored paths may be compressed (see compression.py).
+    """
+    with span("read_csv"):
+        if isinstance(file_path, (str, os.PathLike)):
+            with open_csv(file_path) as f:
+                df = pd.read_csv(f)
+        else:
+            df = pd.read_csv(file_path)
+
+    for col in REQUIRED_COLUMNS:
         if col not in df.columns:
             raise ValueError(f"Missing required column: {col}")
 
+    return df
+
+
+def clean_frame(df):
+    """
+    Coerces the numeric columns and drops rows that cannot be analyzed.
+    """
+    df = df.copy()
+
     # ✅ Clean numeric columns safely
-    df["Flowrate"] = pd.to_numeric(df["Flowrate"], errors="coerce")
-    df["Pressure"] = pd.to_numeric(df["Pressure"], errors="coerce")
-    df["Temperature"] = pd.to_numeric(df["Temperature"], errors="coerce")
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
 
     # ✅ Remove invalid rows
-    df = df.dropna(subset=["Flowrate", "Pressure", "Temperature"])
+    return df.dropna(subset=NUMERIC_COLUMNS)
+
+
+# ============================================================
+# ✅ Running Aggregates (mergeable, used for appends)
+# ============================================================
+
+@span("aggregate")
+def compute_aggregates(df):
+    """
+    Computes the running aggregates of a cleaned DataFrame.
+
+    Aggregates only hold counts, sums, minimums, maximums and mergeable
+    sketches (sketches.py), so two aggregates can be merged without
+    looking at the rows again.
+    """
+    grouped = df.groupby("Type", sort=False)[NUMERIC_COLUMNS]
+    counts = grouped.size()
+    sums = grouped.sum()
+    mins = grouped.min()
+    maxs = grouped.max()
+
+    type_stats = {}
+    for eq_type in counts.index:
+        type_stats[str(eq_type)] = {
+            "count": int(counts[eq_type]),
+            "sums": {col: float(sums.at[eq_type, col]) for col in NUMERIC_COLUMNS},
+            "min": {col: float(mins.at[eq_type, col]) for col in NUMERIC_COLUMNS},
+            "max": {col: float(maxs.at[eq_type, col]) for col in NUMERIC_COLUMNS},
+        }
+
+    return {
+        "count": int(len(df)),
+        "sums": {col: float(df[col].sum()) for col in NUMERIC_COLUMNS},
+        "type_counts": {
+            str(k): int(v) for k, v in df["Type"].value_counts().items()
+        },
+        "type_stats": type_stats,
+        "sketches": build_sketches(df, NUMERIC_COLUMNS, NAME_COLUMN),
+    }
+
+
+def merge_aggregates(base, delta):
+    """
+    Merges two aggregates into a new one. Neither input is modified.
+    """
+    if not base:
+        return delta
+    if not delta:
+        return base
+
+    type_counts = dict(base["type_counts"])
+    for eq_type, count in delta["type_counts"].items():
+        type_counts[eq_type] = type_counts.get(eq_type, 0) + count
+
+    type_stats = dict(base["type_stats"])
+    for eq_type, stats in delta["type_stats"].items():
+        old = type_stats.get(eq_type)
+        if old is None:
+            type_stats[eq_type] = stats
+            continue
+
+        type_stats[eq_type] = {
+            "count": old["count"] + stats["count"],
+            "sums": {c: old["sums"][c] + stats["sums"][c] for c in NUMERIC_COLUMNS},
+            "min": {c: min(old["min"][c], stats["min"][c]) for c in NUMERIC_COLUMNS},
+            "max": {c: max(old["max"][c], stats["max"][c]) for c in NUMERIC_COLUMNS},
+        }
+
+    merged = {
+        "count": base["count"] + delta["count"],
+        "sums": {c: base["sums"][c] + delta["sums"][c] for c in NUMERIC_COLUMNS},
+        "type_counts": type_counts,
+        "type_stats": type_stats,
+    }
+
+    # ✅ Aggregates from before sketches existed: a partial sketch would
+    # be wrong, so it is left out until backfilled (see ensure_sketches)
+    if "sketches" in base and "sketches" in delta:
+        merged["sketches"] = merge_sketches(base["sketches"], delta["sketches"])
 
-    # ✅ Preview Limit (Task requires table display)
-    preview_rows = df.head(10)
+    return merged
 
-    # ✅ Summary Response (API Contract)
-    summary = {
+
+def _average(aggregates, col):
+    if not aggregates["count"]:
+        return None
+    return round(aggregates["sums"][col] / aggregates["count"], 2)
+
+
+# ============================================================
+# ✅ Summary Builder (API Contract)
+# ============================================================
+
+def build_summary(aggregates, df, previous=None):
+    """
+    Builds the summary JSON from aggregates and the rows in ``df``.
+
+    When ``previous`` is given, ``df`` only holds newly appended rows:
+    the data lists are extended and the preview is topped up instead of
+    being rebuilt from the full dataset.
+    """
+    preview = list((previous or {}).get("data_preview", []))
+    missing = max(0, PREVIEW_ROWS - len(preview))
+
+    return assemble_summary(
+        aggregates,
+        {col: df[col].tolist() for col in NUMERIC_COLUMNS},
+        df.head(missing).to_dict(orient="records"),
+        list(df.columns),
+        previous,
+    )
+
+
+SUMMARY_LIST_KEYS = ["flowrate_list", "pressure_list", "temperature_list"]
+
+
+def summary_list_limit():
+    """Max values per summary data list (None = all)."""
+    return getattr(settings, "SUMMARY_LIST_MAX_VALUES", 0) or None
+
+
+def assemble_summary(aggregates, lists, preview_rows, columns, previous=None):
+    """
+    Builds the summary JSON from already extracted parts (numeric column
+    lists, preview records, column names). Shared by all backends.
+    """
+    previous = previous or {}
+
+    # ✅ Distribution ordered by count (ties by name: same order no
+    # matter how partial aggregates were merged)
+    type_distribution = dict(
+        sorted(aggregates["type_counts"].items(), key=lambda item: (-item[1], item[0]))
+    )
+
+    preview = list(previous.get("data_preview", []))
+    preview += preview_rows[:max(0, PREVIEW_ROWS - len(preview))]
+
+    # ✅ Data lists keep the first values only: an append to a full list
+    # costs nothing, and the summary JSON stays small for big datasets
+    limit = summary_list_limit()
+    data_lists = {
+        col: (previous.get(key, []) + lists[col][:limit])[:limit]
+        for col, key in zip(NUMERIC_COLUMNS, SUMMARY_LIST_KEYS)
+    }
+
+    return {
         # -------------------------------
         # ✅ Core Statistics
         # -------------------------------
-        "total_count": int(len(df)),
-        "avg_flowrate": round(df["Flowrate"].mean(), 2),
-        "avg_pressure": round(df["Pressure"].mean(), 2),
-        "avg_temperature": round(df["Temperature"].mean(), 2),
+        "total_count": aggregates["count"],
+        "avg_flowrate": _average(aggregates, "Flowrate"),
+        "avg_pressure": _average(aggregates, "Pressure"),
+        "avg_temperature": _average(aggregates, "Temperature"),
 
         # -------------------------------
         # ✅ Distribution
         # -------------------------------
-        "type_distribution": df["Type"].value_counts().to_dict(),
+        "type_distribution": type_distribution,
 
         # -------------------------------
         # ✅ Data Lists (for charts if needed)
         # -------------------------------
-        "flowrate_list": df["Flowrate"].tolist(),
-        "pressure_list": df["Pressure"].tolist(),
-        "temperature_list": df["Temperature"].tolist(),
+        "flowrate_list": data_lists["Flowrate"],
+        "pressure_list": data_lists["Pressure"],
+        "temperature_list": data_lists["Temperature"],
 
         # -------------------------------
         # ✅ Data Table Preview (Frontend Requirement)
         # -------------------------------
-        "preview_columns": list(preview_rows.columns),
-        "data_preview": preview_rows.to_dict(orient="records"),
+        "preview_columns": previous.get("preview_columns") or columns,
+        "data_preview": preview,
     }
 
-    return summary
\ No newline at end of file
+
+# ============================================================
+# ✅ Analytics Backends
+# pandas: eager, always available
+# polars: lazy scan_csv plan (pushdown + multithreaded), optional
+# ============================================================
+
+ANALYTICS_BACKENDS = ("pandas", "polars")
+
+
+def polars_available():
+    return importlib.util.find_spec("polars") is not None
+
+
+def resolve_analytics_backend(name=None):
+    """Configured backend; falls back to pandas when Polars is missing."""
+    name = name or getattr(settings, "ANALYTICS_BACKEND", "pandas")
+    if name not in ANALYTICS_BACKENDS:
+        raise ValueError(f"Unknown analytics backend: {name}")
+    if name == "polars" and not polars_available():
+        return "pandas"
+    return name
+
+
+# ============================================================
+# ✅ Entry Points
+# ============================================================
+
+@span("analyze_csv")
+def analyze_dataset(file_path, store=None, backend=None):
+    """
+    Reads CSV and returns ``(summary, aggregates)``.
+    With ``store``, the cleaned rows are also written there as a
+    memory-mapped columnar store (see columnar.py).
+    """
+    # ✅ Polars scans plain files only; compressed ones stream through pandas
+    if resolve_analytics_backend(backend) == "polars" and not is_compressed(file_path):
+        from .polars_analytics import analyze_dataset_polars
+        return analyze_dataset_polars(file_path, store=store)
+
+    df = clean_frame(read_csv_checked(file_path))
+    aggregates = compute_aggregates(df)
+
+    if store:
+        from .columnar import write_store
+        with span("columnar"):
+            write_store(store, df)
+
+    return build_summary(aggregates, df), aggregates
+
+
+# ============================================================
+# ✅ Parallel Analysis (newline-aligned byte ranges)
+# Each worker process parses one slice of the file and computes
+# partial aggregates; partials are merged with merge_aggregates.
+# Note: assumes no quoted fields with embedded newlines.
+# ============================================================
+
+def byte_ranges(file_path, parts):
+    """
+    Splits the data part of a CSV (after the header line) into up to
+    ``parts`` ``(start, end)`` byte ranges, each ending on a newline.
+    """
+    size = os.path.getsize(file_path)
+
+    with open(file_path, "rb") as f:
+        f.readline()
+        data_start = f.tell()
+
+        bounds = [data_start]
+        step = max(1, (size - data_start) // max(1, parts))
+        for i in range(1, parts):
+            f.seek(max(bounds[-1], data_start + i * step))
+            f.readline()
+            offset = f.tell()
+            if offset >= size:
+                break
+            if offset > bounds[-1]:
+                bounds.append(offset)
+        bounds.append(size)
+
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def analyze_range(file_path, start, end, columns, segment_dir):
+    """
+    Worker job: parses ``[start, end)``, writes the cleaned rows as a
+    columnar segment in ``segment_dir`` and returns only the slice's
+    aggregates, preview rows and segment info (no rows go back).
+    """
+    from .columnar import write_segment
+
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    with span("read_csv"):
+        df = pd.read_csv(io.BytesIO(data), header=None, names=columns)
+
+    df = clean_frame(df)
+    return {
+        "aggregates": compute_aggregates(df),
+        "preview": df.head(PREVIEW_ROWS).to_dict(orient="records"),
+        "columns": list(df.columns),
+        "segment": write_segment(segment_dir, df),
+    }
+
+
+def segment_lists(building, segments):
+    """Summary data lists read back from written segments, in order."""
+    limit = summary_list_limit()
+    lists = {col: [] for col in NUMERIC_COLUMNS}
+    for seg in segments:
+        for col in NUMERIC_COLUMNS:
+            values = np.load(os.path.join(building, seg["name"], f"{col}.npy"), mmap_mode="r")
+            lists[col] += values[:None if limit is None else max(0, limit - len(lists[col]))].tolist()
+    return lists
+
+
+def should_split(file_path):
+    # ✅ Polars already runs one scan on every core
+    if resolve_analytics_backend() == "polars":
+        return False
+    # ✅ Byte ranges need plain files
+    if is_compressed(file_path):
+        return False
+    return os.path.getsize(file_path) >= getattr(settings, "PARALLEL_ANALYSIS_MIN_BYTES", 64 * 1024 * 1024)
+
+
+@span("analyze_csv")
+def analyze_dataset_parallel(file_path, store=None, parts=None, submit=None):
+    """
+    Same result as ``analyze_dataset``, with parsing and aggregation
+    spread over the worker pool. Must not be called from a pool worker.
+    ``submit(fn, *args)`` queues the range jobs (default: the pool's).
+    """
+    from .workers import get_process_pool, worker_count
+
+    columns = list(pd.read_csv(file_path, nrows=0).columns)
+    for col in REQUIRED_COLUMNS:
+        if col not in columns:
+            raise ValueError(f"Missing required column: {col}")
+
+    ranges = byte_ranges(file_path, parts or worker_count())
+    if len(ranges) < 2:
+        return analyze_dataset(file_path, store=store)
+
+    # ✅ Workers write their rows straight into the store being built
+    # (or a scratch directory): only aggregates come back
+    building = store + ".building" if store else tempfile.mkdtemp(prefix="equipment-ranges-")
+    if store:
+        shutil.rmtree(building, ignore_errors=True)
+        os.makedirs(building)
+
+    submit = submit or get_process_pool().submit
+    futures = [
+        submit(analyze_range, file_path, start, end, columns, os.path.join(building, f"seg-{i:04d}"))
+        for i, (start, end) in enumerate(ranges)
+    ]
+
+    try:
+        parts = [future.result() for future in futures]
+
+        # ✅ Merge in file order: preview + data lists match the serial run
+        aggregates, preview = {}, []
+        for part in parts:
+            aggregates = merge_aggregates(aggregates, part["aggregates"])
+            preview += part["preview"]
+        lists = segment_lists(building, [part["segment"] for part in parts])
+
+        if store:
+            from .columnar import ColumnarStore
+            with span("columnar"):
+                ColumnarStore.assemble(
+                    store, [part["segment"] for part in parts], NAME_COLUMN in parts[0]["columns"]
+                )
+    except BaseException:
+        wait(futures)
+        shutil.rmtree(building, ignore_errors=True)
+        raise
+
+    if not store:
+        shutil.rmtree(building, ignore_errors=True)
+
+    return assemble_summary(aggregates, lists, preview, parts[0]["columns"]), aggregates
+
+
+# ============================================================
+# ✅ Streaming Analysis (fed chunk by chunk while receiving)
+# Same result as analyze_dataset, without reading the file again
+# ============================================================
+
+class StreamingAnalyzer:
+    """
+    Incremental CSV aggregator. ``feed`` raw bytes as they arrive;
+    the header is validated as soon as its line is complete.
+    Each batch of rows goes to disk as a columnar segment (of ``store``
+    or a scratch directory): memory holds one batch, not the upload.
+    The CPU work of each batch runs inside ``slot()`` (a scheduler
+    slot, see Reservation.hold).
+    Note: assumes no quoted fields with embedded newlines.
+    """
+
+    batch_bytes = 4 * 1024 * 1024
+
+    def __init__(self, store=None, slot=contextlib.nullcontext):
+        self.store = store
+        self.slot = slot
+        self.columns = None
+        self.pending = bytearray()
+        self.aggregates = {}
+        self.preview = []
+        self.segments = []
+        self.building = None
+
+    def feed(self, data):
+        self.pending += data
+
+        if self.columns is None:
+            newline = self.pending.find(b"\n")
+            if newline < 0:
+                return
+            self.columns = self.parse_header(bytes(self.pending[:newline + 1]))
+            del self.pending[:newline + 1]
+
+        if len(self.pending) >= self.batch_bytes:
+            cut = self.pending.rfind(b"\n") + 1
+            if cut:
+                with self.slot():
+                    self.consume(bytes(self.pending[:cut]))
+                del self.pending[:cut]
+
+    def parse_header(self, line):
+        columns = list(pd.read_csv(io.BytesIO(line), nrows=0).columns)
+        for col in REQUIRED_COLUMNS:
+            if col not in columns:
+                raise ValueError(f"Missing required column: {col}")
+        return columns
+
+    def consume(self, data):
+        if not data.strip():
+            return
+        with span("read_csv"):
+            df = pd.read_csv(io.BytesIO(data), header=None, names=self.columns)
+        self.add(clean_frame(df))
+
+    def add(self, df):
+        from .columnar import write_segment
+
+        if self.building is None:
+            self.building = self.store + ".building" if self.store else tempfile.mkdtemp(prefix="equipment-stream-")
+            if self.store:
+                shutil.rmtree(self.building, ignore_errors=True)
+                os.makedirs(self.building)
+
+        self.aggregates = merge_aggregates(self.aggregates, compute_aggregates(df))
+        self.preview += df.head(PREVIEW_ROWS - len(self.preview)).to_dict(orient="records")
+        with span("columnar"):
+            self.segments.append(write_segment(os.path.join(self.building, f"seg-{len(self.segments):04d}"), df))
+
+    def finish(self):
+        """Returns ``(summary, aggregates)`` once the last byte was fed."""
+        with self.slot():
+            return self._finish()
+
+    def _finish(self):
+        if self.columns is None:
+            self.columns = self.parse_header(bytes(self.pending))
+            self.pending.clear()
+
+        self.consume(bytes(self.pending))
+        self.pending.clear()
+        if not self.segments:
+            self.add(clean_frame(pd.DataFrame(columns=self.columns)))
+
+        lists = segment_lists(self.building, self.segments)
+        if self.store:
+            from .columnar import ColumnarStore
+            with span("columnar"):
+                ColumnarStore.assemble(self.store, self.segments, NAME_COLUMN in self.columns)
+        else:
+            self.discard()
+
+        return assemble_summary(self.aggregates, lists, self.preview, self.columns), self.aggregates
+
+    def discard(self):
+        """Removes the segments written so far (rejected / interrupted uploads)."""
+        if self.building:
+            shutil.rmtree(self.building, ignore_errors=True)
+
+
+def analyze_upload(file_path, store=None):
+    """Serial analysis for normal files, byte-range parallel for big ones."""
+    if should_split(file_path):
+        return analyze_dataset_parallel(file_path, store=store)
+    return analyze_dataset(file_path, store=store)
+
+
+def analyze_and_compress(file_path, store=None):
+    """analyze_dataset + compress_file as one pool task (batch uploads)."""
+    result = analyze_dataset(file_path, store=store)
+    with span("compress"):
+        compress_file(file_path)
+    return result
+
+
+def analyze_csv(file_path):
+    """
+    Reads CSV and returns summary analytics.
+
+    ✅ Supports:
+    - Web React Dashboard (Table + Charts)
+    - Desktop PyQt Dashboard (Table + Charts)
+    - PDF Report Generation
+    """
+    summary, _ = analyze_dataset(file_path)
+    return summary
+
+
+def append_rows(file_path, raw_df):
+    """
+    Appends raw rows to a stored CSV, aligned to its existing header.
+    Only the header line of the stored file is read; compressed files
+    get a new gzip member / zstd frame.
+    """
+    with open_csv(file_path) as f:
+        columns = pd.read_csv(f, nrows=0).columns
+
+    data = raw_df.reindex(columns=columns).to_csv(header=False, index=False)
+    if not ends_with_newline(file_path):
+        data = "\n" + data
+
+    append_bytes(file_path, data.encode())
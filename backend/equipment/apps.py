@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class EquipmentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'equipment'
+
+    def ready(self):
+        # ✅ Token cache invalidation, dataset artifact cleanup, query timing hooks
+        from . import signals  # noqa: F401
@@ -0,0 +1,87 @@
+import io
+import zipfile
+
+
+# ============================================================
+# ✅ Streaming ZIP Writer
+# Each entry is flushed to the client as soon as it is written;
+# the archive itself is never held in memory.
+# ============================================================
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only, non-seekable sink that hands back what was written."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def stream_zip(entries):
+    """
+    Yields ZIP archive bytes for an iterable of ``(filename, bytes)``.
+    """
+    sink = _ChunkBuffer()
+
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in entries:
+            archive.writestr(name, data)
+            yield sink.drain()
+
+    # ✅ Central directory
+    yield sink.drain()
+
+
+# ============================================================
+# ✅ Batch Upload Unpacking
+# Multipart files pass through; ZIPs are expanded to their CSVs
+# ============================================================
+
+def _too_large(max_bytes):
+    return f"File exceeds {max_bytes // (1024 * 1024)} MB limit"
+
+
+def iter_upload_files(uploaded_files, max_member_bytes):
+    """
+    Yields ``(filename, file_or_none, error)`` for every CSV in the
+    uploaded files (plain CSVs and CSVs inside ZIP archives). Every
+    file, plain or archived, is held to ``max_member_bytes``.
+    """
+    for uploaded in uploaded_files:
+        lower = uploaded.name.lower()
+        if not lower.endswith(".zip"):
+            if not lower.endswith(".csv"):
+                yield uploaded.name, None, "Only .csv and .zip files are accepted"
+            elif uploaded.size > max_member_bytes:
+                yield uploaded.name, None, _too_large(max_member_bytes)
+            else:
+                yield uploaded.name, uploaded, None
+            continue
+
+        try:
+            archive = zipfile.ZipFile(uploaded)
+        except zipfile.BadZipFile:
+            yield uploaded.name, None, "Not a valid ZIP archive"
+            continue
+
+        for member in archive.infolist():
+            name = member.filename.rsplit("/", 1)[-1]
+            if member.is_dir() or member.filename.startswith("__MACOSX/") or not name:
+                continue
+            if not name.lower().endswith(".csv"):
+                continue
+            # ✅ Zip bomb guard: declared size is checked before extracting
+            if member.file_size > max_member_bytes:
+                yield name, None, _too_large(max_member_bytes)
+                continue
+            yield name, archive.open(member), None
@@ -0,0 +1,212 @@
+import asyncio
+import os
+
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from rest_framework import exceptions
+
+from .models import DatasetUpload
+from .analytics import analyze_and_compress, analyze_dataset_parallel, should_split
+from .report import render_pdf, report_snapshot, resolve_chart_backend
+from .scheduler import Saturated, analysis_submitter, get_scheduler
+from .columnar import store_path
+from .compression import compress_file
+from .instrumentation import span
+from .authentication import authenticate_request
+from .upload_handlers import AnalyzedUploadedFile
+from . import cache, history, upload_handlers
+
+
+# ============================================================
+# ✅ Async API Endpoints (served by uvicorn workers over ASGI)
+# Same contract as views.py, but slow clients only hold a coroutine:
+# - CPU work (analysis, PDF rendering) runs as scheduled pool jobs
+# - File + DB I/O runs off the event loop
+# ============================================================
+
+async def run_scheduled(reservation, func, *args, cost=0, kind="analysis"):
+    """Runs ``func`` in a reserved job slot (see scheduler.py) without blocking the loop."""
+    return await asyncio.wrap_future(reservation.submit(func, *args, cost=cost, kind=kind))
+
+
+class AsyncAPIView(View):
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # ✅ Token-authenticated API: no CSRF (same as DRF APIView)
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            user = await sync_to_async(authenticate_request)(request)
+        except exceptions.AuthenticationFailed as e:
+            return JsonResponse({"detail": str(e.detail)}, status=401)
+
+        if user is None or not user.is_authenticated:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."}, status=401
+            )
+
+        request.user = user
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except Saturated as e:
+            return JsonResponse(
+                {"detail": str(e.detail)}, status=429, headers={"Retry-After": str(int(e.wait))}
+            )
+
+
+# ============================================================
+# ✅ Async CSV Upload
+# ============================================================
+
+class AsyncUploadCSVView(AsyncAPIView):
+
+    async def post(self, request):
+
+        # ✅ Busy server: 429 + Retry-After before the body is received
+        with get_scheduler().admit(request.user.id) as reservation:
+            return await self.upload(request, reservation)
+
+    async def upload(self, request, reservation):
+
+        handler = upload_handlers.install(request, reservation)
+
+        # ✅ Multipart parsing reads the spooled body (and analyzes it
+        # chunk by chunk): keep it off the loop
+        with span("upload_spool"):
+            files = await sync_to_async(lambda: request.FILES, thread_sensitive=False)()
+        file = files.get("file")
+
+        if handler and handler.error:
+            return JsonResponse({"error": handler.error}, status=400)
+
+        if not file:
+            return JsonResponse({"error": "CSV file is required"}, status=400)
+
+        if isinstance(file, AnalyzedUploadedFile):
+            # ✅ Already stored + analyzed while receiving
+            summary, aggregates = file.summary, file.aggregates
+            dataset = await DatasetUpload.objects.acreate(
+                user=request.user,
+                file=file.storage_name,
+                filename=file.name,
+                summary=summary,
+                aggregates=aggregates,
+                sha256=file.sha256,
+            )
+        else:
+            # ✅ Write dataset file in a worker thread
+            name = await asyncio.to_thread(
+                default_storage.save,
+                os.path.join("datasets", os.path.basename(file.name)),
+                file,
+            )
+
+            dataset = await DatasetUpload.objects.acreate(
+                user=request.user,
+                file=name,
+                filename=file.name,
+                summary={}
+            )
+
+            # ✅ Analyze + compress as scheduled jobs (big files: byte
+            # ranges, coordinated off the loop); file_size follows on save
+            path, store = dataset.file.path, store_path(dataset.file.name)
+            submit = analysis_submitter(reservation, path)
+            try:
+                with span("analyze_csv"):
+                    if should_split(path):
+                        summary, aggregates = await asyncio.to_thread(
+                            analyze_dataset_parallel, path, store, None, submit
+                        )
+                        await asyncio.wrap_future(submit(compress_file, path))
+                    else:
+                        summary, aggregates = await asyncio.wrap_future(
+                            submit(analyze_and_compress, path, store)
+                        )
+            except Exception as e:
+                # ✅ Failed analysis: drop the row (its files go with it)
+                await dataset.adelete()
+                if isinstance(e, ValueError):
+                    return JsonResponse({"error": str(e)}, status=400)
+                raise
+
+            dataset.summary = summary
+            dataset.aggregates = aggregates
+            await dataset.asave()
+
+        await sync_to_async(cache.invalidate)(request.user.id)
+
+        return JsonResponse({
+            "message": "File uploaded successfully ✅",
+            "dataset_id": dataset.id,
+            "summary": summary
+        })
+
+
+# ============================================================
+# ✅ Async History (paginated, see history.py)
+# ============================================================
+
+class AsyncHistoryView(AsyncAPIView):
+
+    async def get(self, request):
+
+        first_page = history.is_first_page(request)
+
+        page = await cache.aget_history(request.user.id) if first_page else None
+        if page is None:
+            try:
+                page = await sync_to_async(history.load_page)(request)
+            except exceptions.NotFound as e:
+                return JsonResponse({"detail": str(e.detail)}, status=404)
+            if first_page:
+                await cache.aset_history(request.user.id, page)
+
+        return HttpResponse(history.render_page(request, *page), content_type="application/json")
+
+
+# ============================================================
+# ✅ Async Report (User Protected)
+# ============================================================
+
+class AsyncReportView(AsyncAPIView):
+
+    async def get(self, request, dataset_id):
+
+        try:
+            dataset = await cache.aget_dataset(
+                dataset_id,
+                request.user.id,
+                lambda: DatasetUpload.objects.aget(id=dataset_id, user=request.user)
+            )
+        except DatasetUpload.DoesNotExist:
+            return JsonResponse({"detail": "Not found."}, status=404)
+
+        try:
+            chart_backend = resolve_chart_backend(request.GET.get("charts"))
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        etag = f'"report-{dataset.id}-v{dataset.version}-{chart_backend}"'
+        if etag in request.headers.get("If-None-Match", ""):
+            return HttpResponseNotModified(headers={"ETag": etag})
+
+        pdf_bytes = await sync_to_async(cache.get_report)(dataset, chart_backend)
+        if pdf_bytes is None:
+            # ✅ Render as a scheduled job: the event loop stays free
+            with get_scheduler().admit(request.user.id) as reservation, span("pdf"):
+                pdf_bytes = await run_scheduled(
+                    reservation, render_pdf, report_snapshot(dataset), chart_backend, kind="report"
+                )
+            await sync_to_async(cache.set_report)(dataset, chart_backend, pdf_bytes)
+
+        response = HttpResponse(pdf_bytes, content_type="application/pdf")
+        response["Content-Disposition"] = f'attachment; filename="report_{dataset_id}.pdf"'
+        response["ETag"] = etag
+        return response
@@ -0,0 +1,171 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .cache import is_shared
+
+
+def authenticate_request(request):
+    """
+    Runs the configured DRF authenticators (token auth) on a plain Django
+    request. Returns the user or None; raises AuthenticationFailed for bad tokens.
+    """
+    drf_request = Request(request)
+    for authenticator_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        result = authenticator_class().authenticate(drf_request)
+        if result is not None:
+            return result[0]
+    return None
+
+
+# ============================================================
+# ✅ Token Expiry
+# TOKEN_EXPIRY_HOURS = 0 keeps the old never-expiring tokens
+# ============================================================
+
+def token_lifetime():
+    hours = getattr(settings, "TOKEN_EXPIRY_HOURS", 0)
+    return timedelta(hours=hours) if hours else None
+
+
+def token_expires_at(created):
+    lifetime = token_lifetime()
+    return created + lifetime if lifetime else None
+
+
+def is_expired(created):
+    expires_at = token_expires_at(created)
+    return expires_at is not None and timezone.now() >= expires_at
+
+
+# ============================================================
+# ✅ Verified Token Cache
+# 1. in-process LRU (dict lookup, short TTL)
+# 2. shared Django cache (all workers; skipped when it is per process)
+# 3. Token + User join in the database
+# Entries are (user_id, is_active, created): no password hashes in
+# the cache.
+# ============================================================
+
+class TokenLRU:
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_local_tokens = TokenLRU(
+    getattr(settings, "TOKEN_CACHE_SIZE", 1024),
+    getattr(settings, "TOKEN_CACHE_LOCAL_TTL", 30),
+)
+
+
+def _cache_key(key):
+    # ✅ Never put raw tokens into a shared cache
+    return "equipment:token:v2:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_token(key):
+    """Forget a token everywhere (logout, rotation, deletion)."""
+    _local_tokens.discard(key)
+    if is_shared():
+        cache.delete(_cache_key(key))
+
+
+def cached_user(user_id, is_active):
+    """
+    A User with only ``id`` / ``is_active`` loaded; other fields are
+    deferred and fetched on first access (most views only need the id).
+    """
+    return User.from_db(DEFAULT_DB_ALIAS, ["id", "is_active"], [user_id, is_active])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication without the per-request Token/User join.
+    Verified ``(user_id, is_active, created)`` entries are cached and
+    the user is loaded lazily (see cached_user); expiry is checked on
+    every request. A logout reaches other workers through the shared
+    cache, but their in-process entries live up to
+    TOKEN_CACHE_LOCAL_TTL seconds. With a per-process cache backend the
+    shared layer is skipped, so that bound holds there too.
+    """
+
+    def authenticate_credentials(self, key):
+        entry = _local_tokens.get(key)
+
+        if entry is None:
+            shared = is_shared()
+            entry = cache.get(_cache_key(key)) if shared else None
+            if entry is None:
+                entry = self.load_token(key)
+                if shared:
+                    cache.set(_cache_key(key), entry, getattr(settings, "TOKEN_CACHE_TTL", 300))
+            _local_tokens.set(key, entry)
+
+        user_id, is_active, created = entry
+
+        if not is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+
+        if is_expired(created):
+            invalidate_token(key)
+            raise exceptions.AuthenticationFailed("Token has expired.")
+
+        # ✅ Unsaved Token: request.auth.delete() still works for logout
+        user = cached_user(user_id, is_active)
+        return user, Token(key=key, user=user, created=created)
+
+    def load_token(self, key):
+        try:
+            token = Token.objects.select_related("user").only(
+                "key", "created", "user__id", "user__is_active"
+            ).get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+
+        return token.user.id, token.user.is_active, token.created
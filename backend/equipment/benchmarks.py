@@ -0,0 +1,252 @@
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+
+# ============================================================
+# ✅ Synthetic Equipment Data
+# ============================================================
+
+EQUIPMENT_TYPES = [
+    "Pump", "Valve", "Compressor", "Heat Exchanger", "Reactor", "Condenser",
+    "Boiler", "Separator", "Mixer", "Filter", "Cooling Tower", "Evaporator",
+]
+
+# ✅ Skewed like real plants: a few types dominate
+TYPE_WEIGHTS = np.array([1 / (i + 1) for i in range(len(EQUIPMENT_TYPES))])
+TYPE_WEIGHTS = TYPE_WEIGHTS / TYPE_WEIGHTS.sum()
+
+
+def synthetic_frame(rows, seed=7, start=0, invalid_fraction=0.01):
+    rng = np.random.default_rng(seed + start)
+
+    flowrate = rng.normal(120, 25, rows).round(1).astype(object)
+    # ✅ A few unparseable readings, like real exports
+    flowrate[rng.random(rows) < invalid_fraction] = "n/a"
+
+    return pd.DataFrame({
+        "Equipment Name": [f"EQ-{i:08d}" for i in range(start, start + rows)],
+        "Type": rng.choice(EQUIPMENT_TYPES, size=rows, p=TYPE_WEIGHTS),
+        "Flowrate": flowrate,
+        "Pressure": rng.normal(6, 1.5, rows).round(2),
+        "Temperature": rng.normal(110, 20, rows).round(1),
+    })
+
+
+def write_synthetic_csv(path, rows, seed=7, chunk_rows=1_000_000):
+    """Writes a synthetic equipment CSV in chunks (10M rows stay cheap)."""
+    written = 0
+    while written < rows:
+        n = min(chunk_rows, rows - written)
+        synthetic_frame(n, seed=seed, start=written).to_csv(
+            path, mode="a" if written else "w", header=not written, index=False
+        )
+        written += n
+    return path
+
+
+def synthetic_dataset(rows, seed=7):
+    """A dataset-like object (id, filename, summary) for report benchmarks."""
+    from .analytics import build_summary, clean_frame, compute_aggregates
+
+    df = clean_frame(synthetic_frame(rows, seed=seed))
+    summary = build_summary(compute_aggregates(df), df)
+    return SimpleNamespace(id=0, version=1, filename="synthetic.csv", summary=summary)
+
+
+# ============================================================
+# ✅ Measurement Helpers
+# ============================================================
+
+def time_call(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "seconds": statistics.median(timings),
+        "min_seconds": min(timings),
+    }
+
+
+def peak_memory(func):
+    """Peak Python-tracked allocation (MB) while running ``func`` once."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+# ============================================================
+# ✅ Benchmarks
+# ============================================================
+
+def bench_analytics(results, path, rows, repeat):
+    from .analytics import analyze_csv, analyze_dataset, analyze_dataset_parallel, polars_available
+    from .workers import worker_count
+
+    entry = time_call(lambda: analyze_csv(path), repeat)
+    entry["peak_mb"] = peak_memory(lambda: analyze_csv(path))
+    results[f"analyze_csv[{rows}]"] = entry
+
+    # ✅ Byte-range split over the worker pool (scales with cores)
+    entry = time_call(lambda: analyze_dataset_parallel(path), repeat)
+    entry["workers"] = worker_count()
+    results[f"analyze_parallel[{rows}]"] = entry
+
+    # ✅ Lazy Polars plan vs the eager pandas path (when installed)
+    if polars_available():
+        entry = time_call(lambda: analyze_dataset(path, backend="polars"), repeat)
+        entry["peak_mb"] = peak_memory(lambda: analyze_dataset(path, backend="polars"))
+        results[f"analyze_polars[{rows}]"] = entry
+
+
+def bench_report(results, rows, repeat):
+    from .report import CHART_BACKENDS, generate_charts, render_pdf
+
+    dataset = synthetic_dataset(min(rows, 100_000))
+
+    for backend in CHART_BACKENDS:
+        # ✅ Warm-up: template / font cache
+        render_pdf(dataset, chart_backend=backend)
+
+        results[f"generate_charts[{backend}]"] = time_call(
+            lambda: generate_charts(dataset.summary, backend=backend), repeat
+        )
+        entry = time_call(lambda: render_pdf(dataset, chart_backend=backend), repeat)
+        entry["bytes"] = len(render_pdf(dataset, chart_backend=backend))
+        results[f"generate_pdf[{backend}]"] = entry
+
+
+@contextmanager
+def e2e_client():
+    """
+    An authenticated API client backed by a throwaway test database,
+    media root and cache, so the real db.sqlite3, uploads/ and cache/
+    are untouched.
+    """
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test.utils import override_settings
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root,
+            CACHES={"default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": os.path.join(media_root, "cache"),
+            }},
+        ):
+            user = User.objects.create_user("bench", "bench@example.com", "bench-pass")
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+            yield client
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def bench_end_to_end(results, client, path, rows, repeat):
+    """Upload / history / report latency through the Django test client."""
+    from django.core.cache import cache
+
+    def upload():
+        with open(path, "rb") as f:
+            response = client.post("/api/upload/", {"file": f}, format="multipart")
+        assert response.status_code == 200, response.content
+        return response.json()["dataset_id"]
+
+    results[f"e2e_upload[{rows}]"] = time_call(upload, repeat)
+    dataset_id = upload()
+
+    results[f"e2e_history[{rows}]"] = time_call(lambda: client.get("/api/history/"), repeat)
+
+    def report():
+        # ✅ Fresh render every time (no report cache hits)
+        cache.clear()
+        response = client.get(f"/api/report/{dataset_id}/")
+        b"".join(response.streaming_content)
+
+    results[f"e2e_report[{rows}]"] = time_call(report, repeat)
+
+
+def run_benchmarks(row_counts, repeat=3, e2e_max_rows=100_000, workdir=None):
+    results = {}
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        paths = {
+            rows: write_synthetic_csv(os.path.join(tmp, f"equipment_{rows}.csv"), rows)
+            for rows in row_counts
+        }
+
+        for rows, path in paths.items():
+            bench_analytics(results, path, rows, repeat)
+
+        e2e_rows = [rows for rows in row_counts if rows <= e2e_max_rows]
+        if e2e_rows:
+            with e2e_client() as client:
+                for rows in e2e_rows:
+                    bench_end_to_end(results, client, paths[rows], rows, repeat)
+
+        bench_report(results, max(row_counts), repeat)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+# ============================================================
+# ✅ Baseline Comparison
+# ============================================================
+
+def compare(current, baseline, tolerance):
+    """
+    Returns ``(rows, regressions)`` comparing median seconds per benchmark.
+    A regression is anything slower than ``baseline * (1 + tolerance)``.
+    """
+    rows, regressions = [], []
+
+    for name, entry in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            rows.append((name, None, entry["seconds"], None))
+            continue
+
+        ratio = entry["seconds"] / base["seconds"] if base["seconds"] else 1.0
+        rows.append((name, base["seconds"], entry["seconds"], ratio))
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+
+    return rows, regressions
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_results(path, results):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
@@ -0,0 +1,148 @@
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+
+def is_shared():
+    """
+    True when all worker processes (and management commands) share the
+    cache (file / redis), so an invalidation in one reaches the others.
+    """
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+# ============================================================
+# ✅ Report Cache
+# Keys include the dataset version, so appends invalidate them
+# ============================================================
+
+def report_key(dataset, backend):
+    return f"equipment:report:{dataset.id}:v{dataset.version}:{backend}"
+
+
+def get_report(dataset, backend):
+    return cache.get(report_key(dataset, backend))
+
+
+def set_report(dataset, backend, pdf_bytes):
+    cache.set(
+        report_key(dataset, backend),
+        pdf_bytes,
+        getattr(settings, "REPORT_CACHE_TIMEOUT", 3600),
+    )
+
+
+def get_reports(datasets, backend):
+    """Returns ``{dataset_id: pdf_bytes}`` for the reports already cached."""
+    keys = {report_key(d, backend): d.id for d in datasets}
+    found = cache.get_many(list(keys))
+    return {keys[key]: pdf for key, pdf in found.items()}
+
+
+# ============================================================
+# ✅ Query Result Cache
+# Keys hash the query spec with every dataset version it read
+# ============================================================
+
+def query_key(digest):
+    return f"equipment:query:{digest}"
+
+
+def get_query(digest):
+    return cache.get(query_key(digest))
+
+
+def set_query(digest, result):
+    cache.set(query_key(digest), result, getattr(settings, "QUERY_CACHE_TIMEOUT", 600))
+
+
+# ============================================================
+# ✅ Summary + History Cache
+# Dataset summaries and per-user history lists, so dashboards
+# refreshing the same data stop hitting SQLite / JSON decoding.
+# Invalidated explicitly on upload, append and retention deletes,
+# which only works when every process sees the same cache: with a
+# per-process backend (locmem) these two caches are skipped.
+# ============================================================
+
+def dataset_key(dataset_id):
+    return f"equipment:dataset:{dataset_id}"
+
+
+def history_key(user_id):
+    return f"equipment:history:{user_id}"
+
+
+def _timeout():
+    return getattr(settings, "SUMMARY_CACHE_TIMEOUT", 3600)
+
+
+def _snapshot(data):
+    return SimpleNamespace(**data)
+
+
+def snapshot_data(dataset):
+    """What summary consumers (reports, ETags) need from a dataset row."""
+    return {
+        "id": dataset.id,
+        "user_id": dataset.user_id,
+        "version": dataset.version,
+        "filename": dataset.filename,
+        "summary": dataset.summary,
+    }
+
+
+def get_dataset(dataset_id, user_id, loader):
+    """
+    Cached dataset snapshot (id, user_id, version, filename, summary).
+    ``loader()`` fetches the row on a miss (and raises 404 if not found).
+    """
+    if not is_shared():
+        return _snapshot(snapshot_data(loader()))
+    data = cache.get(dataset_key(dataset_id))
+    if data is None or data["user_id"] != user_id:
+        data = snapshot_data(loader())
+        cache.set(dataset_key(dataset_id), data, _timeout())
+    return _snapshot(data)
+
+
+async def aget_dataset(dataset_id, user_id, loader):
+    if not is_shared():
+        return _snapshot(snapshot_data(await loader()))
+    data = await cache.aget(dataset_key(dataset_id))
+    if data is None or data["user_id"] != user_id:
+        data = snapshot_data(await loader())
+        await cache.aset(dataset_key(dataset_id), data, _timeout())
+    return _snapshot(data)
+
+
+def get_history(user_id):
+    """Serialized (JSON bytes) history list, or None."""
+    return cache.get(history_key(user_id)) if is_shared() else None
+
+
+def set_history(user_id, payload):
+    if is_shared():
+        cache.set(history_key(user_id), payload, _timeout())
+
+
+async def aget_history(user_id):
+    return await cache.aget(history_key(user_id)) if is_shared() else None
+
+
+async def aset_history(user_id, payload):
+    if is_shared():
+        await cache.aset(history_key(user_id), payload, _timeout())
+
+
+def invalidate(user_id, dataset_ids=()):
+    """
+    Drops the user's history list and the given dataset snapshots.
+    Runs after commit, so readers can't re-cache rows mid-transaction.
+    """
+    keys = [history_key(user_id)] + [dataset_key(i) for i in dataset_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
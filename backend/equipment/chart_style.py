@@ -0,0 +1,23 @@
+# ============================================================
+# ✅ Shared Chart Style (no plotting imports)
+# Used by both chart backends: matplotlib (charts.py) and
+# ReportLab vector drawings (vector_charts.py)
+# ============================================================
+
+PALETTE = ["#2563eb", "#22c55e", "#f97316", "#ef4444", "#a855f7", "#8b5cf6", "#06b6d4"]
+KPI_COLORS = ['#2563eb', '#22c55e', '#f97316', '#ef4444']
+CHART_DPI = 150
+
+METRICS = ['Flowrate', 'Pressure', 'Temperature']
+KPI_CATEGORIES = ['Total\nEquipment', 'Avg\nFlowrate', 'Avg\nPressure', 'Avg\nTemperature']
+
+
+def as_number(value):
+    """Summary values may be numbers, None or strings like '12.5 bar'."""
+    if value is None:
+        return 0.0
+    return float(str(value).split()[0])
+
+
+def palette_for(count):
+    return [PALETTE[i % len(PALETTE)] for i in range(count)]
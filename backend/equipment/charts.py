@@ -0,0 +1,275 @@
+import threading
+from io import BytesIO
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.patches import Circle
+
+from .chart_style import (
+    KPI_COLORS, CHART_DPI, METRICS, KPI_CATEGORIES, as_number, palette_for,
+)
+
+
+# ============================================================
+# ✅ Chart Templates (built once per process, refilled per report)
+# ============================================================
+
+class ChartTemplate:
+    """
+    A styled figure + axes skeleton.
+
+    Fonts, titles, grids and margins are set up once in ``build``; each
+    render only swaps the data artists (heights, line data, labels) and
+    writes a PNG into an in-memory buffer.
+    """
+
+    figsize = (8, 4.5)
+    margins = dict(left=0.09, right=0.97, top=0.88, bottom=0.14)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.figure = Figure(figsize=self.figsize)
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot(111)
+        self.figure.subplots_adjust(**self.margins)
+        self.build()
+
+    def build(self):
+        raise NotImplementedError
+
+    def fill(self, summary):
+        raise NotImplementedError
+
+    def render(self, summary):
+        # ✅ One figure per template: renders of the same chart take turns
+        with self.lock:
+            try:
+                self.fill(summary)
+            except Exception:
+                # ✅ A half-filled skeleton is not reusable: build a new one next time
+                discard_template(self)
+                raise
+            buffer = BytesIO()
+            self.figure.savefig(buffer, format="png", dpi=CHART_DPI)
+
+        buffer.seek(0)
+        return buffer
+
+
+# ------------------------------------------------------------
+# ✅ Bar Chart - Equipment Distribution
+# ------------------------------------------------------------
+
+class BarChartTemplate(ChartTemplate):
+    margins = dict(left=0.09, right=0.97, top=0.88, bottom=0.24)
+
+    def build(self):
+        self.bars = []
+        self.labels = []
+        self.ax.set_title("Equipment Distribution", fontsize=14, fontweight='bold', pad=15)
+        self.ax.set_ylabel("Count", fontsize=11, fontweight='bold')
+        self.ax.set_xlabel("Equipment Type", fontsize=11, fontweight='bold')
+        self.ax.grid(axis="y", linestyle="--", alpha=0.4)
+        self.ax.set_axisbelow(True)
+
+    def fill(self, summary):
+        labels = list(summary["type_distribution"].keys())
+        values = list(summary["type_distribution"].values())
+
+        # ✅ Only rebuild bars when the number of types changes
+        if len(self.bars) != len(values):
+            for artist in self.bars + self.labels:
+                artist.remove()
+
+            self.bars = list(self.ax.bar(
+                range(len(values)), [0] * len(values), color=palette_for(len(values)),
+                edgecolor='black', linewidth=0.7, alpha=0.85
+            ))
+            self.labels = [
+                self.ax.text(0, 0, "", ha='center', va='bottom', fontsize=9, fontweight='bold')
+                for _ in values
+            ]
+
+        for bar, label, value in zip(self.bars, self.labels, values):
+            bar.set_height(value)
+            label.set_position((bar.get_x() + bar.get_width() / 2., value))
+            label.set_text(f'{int(value)}')
+
+        self.ax.set_xticks(range(len(labels)))
+        self.ax.set_xticklabels(labels, rotation=25, ha='right')
+        self.ax.set_xlim(-0.6, max(len(values), 1) - 0.4)
+        self.ax.set_ylim(0, (max(values) if values else 1) * 1.12)
+
+
+# ------------------------------------------------------------
+# ✅ Donut Pie Chart - Percentage Breakdown
+# ------------------------------------------------------------
+
+class DonutChartTemplate(ChartTemplate):
+    figsize = (7, 5)
+    margins = dict(left=0.05, right=0.95, top=0.86, bottom=0.04)
+
+    def build(self):
+        self.artists = []
+        self.ax.set_title("Equipment Distribution (%)", fontsize=14, fontweight='bold', pad=20)
+
+    def fill(self, summary):
+        labels = list(summary["type_distribution"].keys())
+        values = list(summary["type_distribution"].values())
+
+        # ✅ Wedge geometry depends on every value, so swap the wedges only
+        for artist in self.artists:
+            artist.remove()
+        self.artists = []
+
+        # ✅ No valid rows: pie() rejects all-zero sizes, draw a placeholder
+        if not sum(values):
+            self.ax.set_xlim(-1.1, 1.1)
+            self.ax.set_ylim(-1.1, 1.1)
+            self.ax.set_aspect("equal")
+            self.ax.set_axis_off()
+            self.artists = [self.ax.text(0, 0, "No data", ha='center', va='center', fontsize=12, color='#64748b')]
+            return
+
+        wedges, texts, autotexts = self.ax.pie(
+            values,
+            labels=labels,
+            autopct="%1.1f%%",
+            startangle=90,
+            colors=palette_for(len(labels)),
+            pctdistance=0.82,
+            textprops={'fontsize': 10, 'weight': 'bold'},
+            wedgeprops={'edgecolor': 'white', 'linewidth': 2}
+        )
+
+        for autotext in autotexts:
+            autotext.set_color('white')
+            autotext.set_fontsize(9)
+
+        centre_circle = Circle((0, 0), 0.60, fc="white", linewidth=2, edgecolor='#cccccc')
+        self.ax.add_artist(centre_circle)
+
+        self.artists = list(wedges) + list(texts) + list(autotexts) + [centre_circle]
+
+
+# ------------------------------------------------------------
+# ✅ Line Chart - Performance Metrics Trend
+# ------------------------------------------------------------
+
+class LineChartTemplate(ChartTemplate):
+
+    def build(self):
+        self.line, = self.ax.plot(
+            range(len(METRICS)), [0] * len(METRICS), marker='o', linewidth=2.5, markersize=10,
+            color='#2563eb', markerfacecolor='#ef4444', markeredgewidth=2, markeredgecolor='#2563eb'
+        )
+        self.labels = [
+            self.ax.text(i, 0, "", ha='center', va='bottom', fontsize=10, fontweight='bold')
+            for i in range(len(METRICS))
+        ]
+
+        self.ax.set_xticks(range(len(METRICS)))
+        self.ax.set_xticklabels(METRICS)
+        self.ax.set_xlim(-0.3, len(METRICS) - 0.7)
+        self.ax.set_title("Average Performance Metrics", fontsize=14, fontweight='bold', pad=15)
+        self.ax.set_ylabel("Normalized Value (%)", fontsize=11, fontweight='bold')
+        self.ax.set_xlabel("Metric Type", fontsize=11, fontweight='bold')
+        self.ax.grid(True, linestyle='--', alpha=0.4)
+        self.ax.set_ylim(0, 110)
+
+    def fill(self, summary):
+        avg_values = [
+            as_number(summary["avg_flowrate"]),
+            as_number(summary["avg_pressure"]),
+            as_number(summary["avg_temperature"]),
+        ]
+
+        # Normalize values for better visualization
+        max_val = max(avg_values) or 1
+        normalized = [v / max_val * 100 for v in avg_values]
+
+        self.line.set_ydata(normalized)
+        for i, (label, val, norm) in enumerate(zip(self.labels, avg_values, normalized)):
+            label.set_position((i, norm + 3))
+            label.set_text(f'{val:.2f}')
+
+
+# ------------------------------------------------------------
+# ✅ KPI Chart - Statistics Summary
+# ------------------------------------------------------------
+
+class KPIChartTemplate(ChartTemplate):
+    margins = dict(left=0.16, right=0.95, top=0.88, bottom=0.13)
+
+    def build(self):
+        self.bars = list(self.ax.barh(
+            KPI_CATEGORIES, [0] * len(KPI_CATEGORIES), color=KPI_COLORS,
+            edgecolor='black', linewidth=0.7, alpha=0.85
+        ))
+        self.labels = [
+            self.ax.text(0, bar.get_y() + bar.get_height() / 2, "", va='center',
+                         fontsize=10, fontweight='bold')
+            for bar in self.bars
+        ]
+
+        self.ax.set_title("Key Performance Indicators", fontsize=14, fontweight='bold', pad=15)
+        self.ax.set_xlabel("Value", fontsize=11, fontweight='bold')
+        self.ax.grid(axis='x', linestyle='--', alpha=0.4)
+        self.ax.set_axisbelow(True)
+
+    def fill(self, summary):
+        values_display = [
+            summary["total_count"],
+            as_number(summary["avg_flowrate"]),
+            as_number(summary["avg_pressure"]),
+            as_number(summary["avg_temperature"]),
+        ]
+        top = max(values_display) or 1
+
+        for bar, label, val in zip(self.bars, self.labels, values_display):
+            bar.set_width(val)
+            label.set_x(val + top * 0.02)
+            label.set_text(f'{val:.2f}')
+
+        self.ax.set_xlim(0, top * 1.18)
+
+
+# ============================================================
+# ✅ Template Cache (one skeleton per chart, per process)
+# ============================================================
+
+_TEMPLATE_CLASSES = {
+    "bar": BarChartTemplate,
+    "pie": DonutChartTemplate,
+    "line": LineChartTemplate,
+    "stats": KPIChartTemplate,
+}
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_template(name):
+    template = _templates.get(name)
+    if template is None:
+        with _templates_lock:
+            template = _templates.get(name)
+            if template is None:
+                template = _templates[name] = _TEMPLATE_CLASSES[name]()
+    return template
+
+
+def discard_template(template):
+    with _templates_lock:
+        for name, cached in list(_templates.items()):
+            if cached is template:
+                del _templates[name]
+
+
+def render_charts(summary):
+    """
+    Renders the four report charts into in-memory PNG buffers.
+    Returns ``(bar, pie, line, stats)``.
+    """
+    return tuple(get_template(name).render(summary) for name in ("bar", "pie", "line", "stats"))
@@ -0,0 +1,281 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .analytics import NAME_COLUMN, NUMERIC_COLUMNS, clean_frame, read_csv_checked
+
+
+# ============================================================
+# ✅ Memory-Mapped Columnar Store
+# uploads/columnar/<dataset file stem>/
+#   meta.json            Type dictionary + segment list
+#   seg-0000/            one segment per upload / append
+#     Flowrate.npy ...   float64 numeric columns
+#     Type.npy           int32 codes into the Type dictionary
+#     Equipment Name.npy fixed-width UTF-8 bytes (when present)
+# Columns are opened with np.load(mmap_mode="r"): zero-copy views,
+# paged in and cached by the OS.
+# ============================================================
+
+def store_path(file_name):
+    """Store directory for a dataset file (storage name or path)."""
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    return os.path.join(settings.MEDIA_ROOT, "columnar", stem)
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+class ColumnarStore:
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self._segments = None
+
+    # ------------------------------------------------------------
+    # ✅ Writing (cleaned frames only)
+    # ------------------------------------------------------------
+
+    @classmethod
+    def create(cls, path, df):
+        """Replaces any store at ``path`` with one segment holding ``df``."""
+        tmp = path + ".building"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        columns = ([NAME_COLUMN] if NAME_COLUMN in df.columns else []) + ["Type"] + NUMERIC_COLUMNS
+        _write_json(os.path.join(tmp, "meta.json"), {"columns": columns, "types": [], "segments": []})
+
+        store = cls(tmp)
+        store.append(df)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        return cls(path)
+
+    def append(self, df):
+        """
+        Adds ``df`` as a new segment; existing segments are untouched.
+        Not safe for concurrent writers of one store (see ``stage``).
+        """
+        self.publish(self.stage(df))
+
+    def stage(self, df):
+        """
+        Writes ``df`` as the next segment, not yet visible to readers;
+        returns what ``publish`` (or ``discard``) needs. Segment names
+        follow the segment count, so writers of one store must take
+        turns (appends hold the dataset's row lock).
+        """
+        types = list(self.meta["types"])
+        lookup = {t: i for i, t in enumerate(types)}
+        for eq_type in pd.unique(df["Type"].astype(str)):
+            if eq_type not in lookup:
+                lookup[eq_type] = len(types)
+                types.append(eq_type)
+
+        name = f"seg-{len(self.meta['segments']):04d}"
+        codes = df["Type"].astype(str).map(lookup).to_numpy(dtype=np.int32)
+        staged = os.path.join(self.path, f"{name}.staged")
+        shutil.rmtree(staged, ignore_errors=True)
+        _write_segment(staged, df, codes, NAME_COLUMN in self.meta["columns"])
+
+        return {
+            "dir": staged,
+            "meta": {
+                **self.meta,
+                "types": types,
+                "segments": self.meta["segments"] + [{"name": name, "rows": int(len(df))}],
+            },
+        }
+
+    def publish(self, staged):
+        """Makes a staged segment part of the store."""
+        meta = staged["meta"]
+        target = os.path.join(self.path, meta["segments"][-1]["name"])
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(staged["dir"], target)
+
+        # ✅ meta.json is swapped last: readers never see half a segment
+        _write_json(os.path.join(self.path, "meta.json"), meta)
+        self.meta = meta
+        self._segments = None
+
+    @staticmethod
+    def discard(staged):
+        shutil.rmtree(staged["dir"], ignore_errors=True)
+
+    @classmethod
+    def assemble(cls, path, segments, with_names):
+        """
+        Turns segments written by ``write_segment`` into the store at
+        ``path``. They must sit in ``path + ".building"`` as seg-0000,
+        seg-0001, ... (row order); their Type codes are mapped onto one
+        dictionary, the other columns are left as written.
+        """
+        tmp = path + ".building"
+        lookup = {}
+        for seg in segments:
+            mapping = np.array([lookup.setdefault(t, len(lookup)) for t in seg["types"]], dtype=np.int32)
+            if not np.array_equal(mapping, np.arange(len(mapping))):
+                codes_path = os.path.join(tmp, seg["name"], "Type.npy")
+                np.save(codes_path, mapping[np.load(codes_path)])
+
+        columns = ([NAME_COLUMN] if with_names else []) + ["Type"] + NUMERIC_COLUMNS
+        _write_json(os.path.join(tmp, "meta.json"), {
+            "columns": columns,
+            "types": list(lookup),
+            "segments": [{"name": seg["name"], "rows": seg["rows"]} for seg in segments],
+        })
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        return cls(path)
+
+    # ------------------------------------------------------------
+    # ✅ Reading (zero-copy views)
+    # ------------------------------------------------------------
+
+    @property
+    def segments(self):
+        if self._segments is None:
+            self._segments = [
+                {
+                    col: np.load(os.path.join(self.path, seg["name"], f"{col}.npy"), mmap_mode="r")
+                    for col in self.meta["columns"]
+                }
+                for seg in self.meta["segments"]
+            ]
+        return self._segments
+
+    @property
+    def columns(self):
+        return self.meta["columns"]
+
+    @property
+    def types(self):
+        return self.meta["types"]
+
+    def __len__(self):
+        return sum(seg["rows"] for seg in self.meta["segments"])
+
+    def column(self, name):
+        """Whole column: a memory-mapped view when there is one segment."""
+        parts = [seg[name] for seg in self.segments]
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts) if parts else np.empty(0)
+
+    def type_column(self):
+        return pd.Categorical.from_codes(self.column("Type"), categories=self.types)
+
+    def frame(self):
+        """Cleaned DataFrame for analytics (Type as a categorical)."""
+        data = {"Type": self.type_column()}
+        for col in NUMERIC_COLUMNS:
+            data[col] = self.column(col)
+        return pd.DataFrame(data)
+
+    def segment_frames(self):
+        """
+        One DataFrame per segment over the memory-mapped columns (no
+        copies, read-only; Type as a categorical of the shared codes).
+        """
+        for seg in self.segments:
+            data = {"Type": pd.Categorical.from_codes(seg["Type"], categories=self.types)}
+            for col in NUMERIC_COLUMNS:
+                data[col] = seg[col]
+            yield pd.DataFrame(data, copy=False)
+
+    def rows(self, offset=0, limit=100, eq_type=None):
+        """
+        Returns ``(total, records)`` for a page of rows, optionally only
+        rows of one equipment type. Only the requested slices are read.
+        """
+        code = None
+        if eq_type is not None:
+            if eq_type not in self.types:
+                return 0, []
+            code = self.types.index(eq_type)
+
+        records, total, skip = [], 0, offset
+        for seg in self.segments:
+            if code is None:
+                index = None
+                seg_rows = len(seg["Type"])
+            else:
+                index = np.flatnonzero(seg["Type"] == code)
+                seg_rows = len(index)
+            total += seg_rows
+
+            take = min(seg_rows - skip, limit - len(records)) if skip < seg_rows else 0
+            if take > 0:
+                picked = slice(skip, skip + take) if index is None else index[skip:skip + take]
+                records += self._records(seg, picked)
+            skip = max(0, skip - seg_rows)
+
+        return total, records
+
+    def _records(self, seg, picked):
+        columns = {col: seg[col][picked] for col in self.columns}
+        types = self.types
+        out = []
+        for i in range(len(columns["Type"])):
+            row = {}
+            if NAME_COLUMN in columns:
+                row[NAME_COLUMN] = columns[NAME_COLUMN][i].decode("utf-8")
+            row["Type"] = types[columns["Type"][i]]
+            for col in NUMERIC_COLUMNS:
+                row[col] = float(columns[col][i])
+            out.append(row)
+        return out
+
+
+def _write_segment(segment_dir, df, codes, with_names):
+    os.makedirs(segment_dir, exist_ok=True)
+    np.save(os.path.join(segment_dir, "Type.npy"), codes)
+
+    for col in NUMERIC_COLUMNS:
+        np.save(os.path.join(segment_dir, f"{col}.npy"), df[col].to_numpy(dtype=np.float64))
+
+    if with_names:
+        names = df[NAME_COLUMN].astype(str).str.encode("utf-8") if NAME_COLUMN in df.columns \
+            else pd.Series([b""] * len(df))
+        np.save(os.path.join(segment_dir, f"{NAME_COLUMN}.npy"), np.array(names.tolist(), dtype=bytes))
+
+
+def write_segment(segment_dir, df):
+    """
+    Writes a cleaned frame as a stand-alone segment (parallel analysis:
+    each worker writes its own rows). Type codes index the returned
+    ``types``; ColumnarStore.assemble maps them onto the store's.
+    """
+    types = [str(t) for t in pd.unique(df["Type"].astype(str))]
+    codes = df["Type"].astype(str).map({t: i for i, t in enumerate(types)}).to_numpy(dtype=np.int32)
+    _write_segment(segment_dir, df, codes, NAME_COLUMN in df.columns)
+    return {"name": os.path.basename(segment_dir), "types": types, "rows": int(len(df))}
+
+
+def write_store(path, df):
+    return ColumnarStore.create(path, df)
+
+
+def open_store(dataset):
+    """
+    Opens a dataset's columnar store, building it from the stored CSV
+    the first time for datasets uploaded before the store existed.
+    """
+    path = store_path(dataset.file.name)
+    if not os.path.isfile(os.path.join(path, "meta.json")):
+        return write_store(path, clean_frame(read_csv_checked(dataset.file.path)))
+    return ColumnarStore(path)
@@ -0,0 +1,154 @@
+import gzip
+import os
+
+from django.conf import settings
+
+
+# ============================================================
+# ✅ Compressed At-Rest Storage for Dataset CSVs
+# Files keep their datasets/<name>.csv storage name (URLs, columnar
+# store names and DB rows are unchanged); the codec is detected from
+# the magic bytes. Readers go through open_csv(), which decompresses
+# while streaming. Appends add a new gzip member / zstd frame, so
+# they never rewrite the existing data.
+# zstd needs the optional ``zstandard`` package (falls back to gzip).
+# ============================================================
+
+CODECS = ("none", "gzip", "zstd")
+MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 10}
+CHUNK_SIZE = 1024 * 1024
+
+
+def zstd_available():
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_codec(name=None):
+    """Configured codec; zstd falls back to gzip without ``zstandard``."""
+    name = name or getattr(settings, "UPLOAD_COMPRESSION", "none")
+    if name not in CODECS:
+        raise ValueError(f"Unknown compression codec: {name}")
+    if name == "zstd" and not zstd_available():
+        return "gzip"
+    return name
+
+
+def codec_level(codec):
+    return getattr(settings, "UPLOAD_COMPRESSION_LEVEL", None) or DEFAULT_LEVELS[codec]
+
+
+def detect(path):
+    """``"gzip"`` / ``"zstd"`` for compressed files, ``None`` for plain ones."""
+    with open(path, "rb") as f:
+        head = f.read(4)
+    for magic, codec in MAGIC.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def is_compressed(path):
+    return detect(path) is not None
+
+
+# ------------------------------------------------------------
+# ✅ Reading / writing streams
+# ------------------------------------------------------------
+
+def open_csv(path):
+    """Binary file object with the decompressed CSV bytes."""
+    codec = detect(path)
+    if codec == "gzip":
+        return gzip.open(path, "rb")
+    if codec == "zstd":
+        import zstandard
+        # ✅ read_across_frames: appended frames read as one stream
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(path, "rb"), read_across_frames=True, closefd=True
+        )
+    return open(path, "rb")
+
+
+def iter_csv(path, chunk_size=CHUNK_SIZE):
+    """Yields the decompressed CSV in chunks (streamed downloads)."""
+    with open_csv(path) as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def compressing_writer(fileobj, codec, level=None):
+    """Wraps a binary file object so writes are compressed with ``codec``."""
+    if codec == "none":
+        return fileobj
+    level = level or codec_level(codec)
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=level, mtime=0)
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=level).stream_writer(fileobj, closefd=True)
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+
+# ------------------------------------------------------------
+# ✅ Whole-file operations
+# ------------------------------------------------------------
+
+def write_compressed(path, target, codec=None):
+    """
+    Writes a compressed copy of the plain CSV ``path`` to ``target``.
+    A missing final newline is added, so appends never need to look at
+    the compressed tail.
+    """
+    codec = resolve_codec(codec)
+    last = b"\n"
+    with open(path, "rb") as src, open(target, "wb") as raw:
+        with compressing_writer(raw, codec) as dst:
+            while chunk := src.read(CHUNK_SIZE):
+                dst.write(chunk)
+                last = chunk[-1:]
+            if last != b"\n":
+                dst.write(b"\n")
+
+
+def compress_file(path, codec=None):
+    """
+    Compresses a plain CSV in place (temp file + atomic rename).
+    Returns ``(bytes_before, bytes_after)``.
+    """
+    codec = resolve_codec(codec)
+    before = os.path.getsize(path)
+    if codec == "none" or is_compressed(path):
+        return before, before
+
+    tmp = path + ".compressing"
+    write_compressed(path, tmp, codec)
+    os.replace(tmp, path)
+    return before, os.path.getsize(path)
+
+
+def append_bytes(path, data):
+    """Appends CSV bytes (compressed like the file itself)."""
+    codec = detect(path) if os.path.getsize(path) else None
+    with open(path, "ab") as raw:
+        if codec is None:
+            raw.write(data)
+            return
+        with compressing_writer(raw, codec) as dst:
+            dst.write(data)
+
+
+def ends_with_newline(path):
+    """Only meaningful for plain files; compressed ones always do."""
+    if is_compressed(path) or not os.path.getsize(path):
+        return True
+    with open(path, "rb") as f:
+        f.seek(-1, 2)
+        return f.read(1) == b"\n"
@@ -0,0 +1,36 @@
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import replace_query_param
+
+from .models import DatasetUpload
+from .pagination import KeysetPagination
+from .serializers import DatasetUploadSerializer
+
+
+# ============================================================
+# ✅ Upload History Pages (newest first, keyset on id)
+# {"next": <url or null>, "results": [...]}
+# Page cost stays O(page) however many uploads a user has.
+# Only the first page (no cursor, default size) is cached: that is
+# what dashboards poll; the cache holds (next cursor, results JSON).
+# ============================================================
+
+def is_first_page(request):
+    return not request.GET.get("cursor") and not request.GET.get("page_size")
+
+
+def load_page(request):
+    """Returns ``(next_cursor, results_json_bytes)`` for the request's page."""
+    paginator = KeysetPagination("id", descending=True)
+    # ✅ aggregates (sketches included) are never serialized: not loaded
+    uploads = DatasetUpload.objects.filter(user=request.user).defer("aggregates")
+    page = paginator.paginate_queryset(uploads, request)
+    return paginator.next_cursor, JSONRenderer().render(DatasetUploadSerializer(page, many=True).data)
+
+
+def render_page(request, next_cursor, results):
+    next_url = None
+    if next_cursor is not None:
+        next_url = replace_query_param(request.build_absolute_uri(), "cursor", next_cursor)
+    return b'{"next":' + json.dumps(next_url).encode() + b',"results":' + results + b"}"
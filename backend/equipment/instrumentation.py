@@ -0,0 +1,244 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+# ============================================================
+# ✅ Request Timing Spans
+# span("stage") records into the current request (Server-Timing)
+# and into the process-wide latency histograms (/metrics). Pool
+# workers have their own registry, never scraped: scheduled jobs send
+# their spans back with the result (scheduler.run_job)
+# ============================================================
+
+_request_timings = ContextVar("equipment_request_timings", default=None)
+
+
+class RequestTimings:
+    """Per-request stage durations, in the order they finished."""
+
+    def __init__(self):
+        self.stages = []
+        self.db_time = 0.0
+        self.db_queries = 0
+
+    def add(self, name, duration):
+        self.stages.append((name, duration))
+
+    def as_dict(self):
+        totals = {}
+        for name, duration in self.stages:
+            totals[name] = totals.get(name, 0.0) + duration
+        if self.db_queries:
+            totals["db"] = self.db_time
+        return totals
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _request_timings.set(timings)
+
+
+def end_request(token):
+    _request_timings.reset(token)
+
+
+def current_timings():
+    return _request_timings.get()
+
+
+@contextmanager
+def span(name):
+    """
+    Times a block (or a function, when used as a decorator).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_DURATION.observe(duration, stage=name)
+
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.add(name, duration)
+
+
+def record_query(duration):
+    """ORM queries count in requests only (management commands, jobs: no)."""
+    timings = _request_timings.get()
+    if timings is None:
+        return
+    timings.db_time += duration
+    timings.db_queries += 1
+    STAGE_DURATION.observe(duration, stage="db")
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper (installed on every connection)."""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record_query(time.perf_counter() - start)
+
+
+# ============================================================
+# ✅ Prometheus Histograms (in-process, one registry per worker)
+# ============================================================
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        index = bisect_left(self.buckets, value)
+
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+
+        with self.lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self.series.items())
+
+        for key, (counts, total, count) in items:
+            labels = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.label_names, key))
+            sep = "," if labels else ""
+
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+
+        return "\n".join(lines)
+
+
+class Gauge:
+    """Current values per label set (set / inc); also used for counters."""
+
+    metric_type = "gauge"
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.series[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+
+        with self.lock:
+            items = sorted(self.series.items())
+
+        for key, value in items:
+            labels = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.label_names, key))
+            lines.append(f"{self.name}{{{labels}}} {value}" if labels else f"{self.name} {value}")
+
+        return "\n".join(lines)
+
+
+class Counter(Gauge):
+    metric_type = "counter"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_DURATION = Histogram(
+    "equipment_request_duration_seconds",
+    "End-to-end request latency per view.",
+    ("view", "method", "status"),
+)
+
+STAGE_DURATION = Histogram(
+    "equipment_stage_duration_seconds",
+    "Latency of instrumented stages (read_csv, aggregate, charts, pdf, db, ...).",
+    ("stage",),
+)
+
+# ✅ Job scheduler (scheduler.py)
+JOB_WAIT = Histogram(
+    "equipment_job_wait_seconds",
+    "Time analysis / report jobs waited in the scheduler queue.",
+    ("kind",),
+)
+
+JOB_DURATION = Histogram(
+    "equipment_job_duration_seconds",
+    "Time analysis / report jobs ran on a worker.",
+    ("kind",),
+)
+
+QUEUE_DEPTH = Gauge(
+    "equipment_scheduler_queue_depth",
+    "Jobs waiting for a worker.",
+    ("kind",),
+)
+
+WORKERS_BUSY = Gauge(
+    "equipment_scheduler_workers_busy",
+    "Worker slots running a job.",
+)
+
+WORKER_UTILIZATION = Gauge(
+    "equipment_scheduler_worker_utilization",
+    "Busy worker slots / all worker slots (0..1).",
+)
+
+JOBS_REJECTED = Counter(
+    "equipment_scheduler_rejected_total",
+    "Jobs (requests, batch files) rejected with 429 because the queue was full.",
+    ("reason",),
+)
+
+REGISTRY = [
+    REQUEST_DURATION, STAGE_DURATION,
+    JOB_WAIT, JOB_DURATION, QUEUE_DEPTH, WORKERS_BUSY, WORKER_UTILIZATION, JOBS_REJECTED,
+]
+
+
+def render_metrics():
+    return "\n\n".join(metric.render() for metric in REGISTRY) + "\n"
@@ -0,0 +1,267 @@
+import io
+import json
+import random
+import threading
+import time
+import uuid
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from .benchmarks import synthetic_frame
+
+
+# ============================================================
+# ✅ Load Test Harness (stdlib only, runs fully offline)
+# Virtual users sign up, fetch a token, then loop over a weighted
+# mix of upload / history / report calls against a running server
+# ============================================================
+
+ENDPOINTS = ("signup", "token", "upload", "history", "report")
+
+# ✅ Uploads a "report" action makes before the user has a dataset;
+# kept apart so they don't skew the upload numbers of the mix
+REPORT_UPLOAD = "report_upload"
+
+RECORDED = ENDPOINTS + (REPORT_UPLOAD,)
+
+DEFAULT_MIX = {"upload": 1, "history": 5, "report": 2, "token": 1}
+
+
+def parse_mix(text):
+    """``"upload=1,history=5"`` -> ``{"upload": 1, "history": 5}``"""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS or name == "signup":
+            raise ValueError(f"Unknown endpoint in mix: {name!r}")
+        mix[name] = float(weight or 1)
+
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("Mix needs at least one endpoint with a positive weight")
+    return mix
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _multipart(field, filename, content):
+    boundary = uuid.uuid4().hex
+    body = b"".join([
+        f"--{boundary}\r\n".encode(),
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'.encode(),
+        b"Content-Type: text/csv\r\n\r\n",
+        content,
+        f"\r\n--{boundary}--\r\n".encode(),
+    ])
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+class Stats:
+    """Thread-safe latency / error recorder per endpoint."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {name: [] for name in RECORDED}
+        self.errors = {name: 0 for name in RECORDED}
+        self.statuses = {name: {} for name in RECORDED}
+
+    def record(self, name, seconds, status, ok):
+        with self.lock:
+            self.latencies[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+            codes = self.statuses[name]
+            codes[status] = codes.get(status, 0) + 1
+
+    def report(self, elapsed):
+        rows = {}
+        with self.lock:
+            for name in RECORDED:
+                values = sorted(self.latencies[name])
+                if not values:
+                    continue
+                rows[name] = {
+                    "requests": len(values),
+                    "errors": self.errors[name],
+                    "error_rate": self.errors[name] / len(values),
+                    "throughput_rps": len(values) / elapsed if elapsed else 0.0,
+                    "p50_ms": percentile(values, 50) * 1000,
+                    "p95_ms": percentile(values, 95) * 1000,
+                    "p99_ms": percentile(values, 99) * 1000,
+                    "statuses": {str(k): v for k, v in sorted(self.statuses[name].items(), key=str)},
+                }
+        return rows
+
+
+class VirtualUser(threading.Thread):
+
+    def __init__(self, index, config, stats, stop_event):
+        super().__init__(daemon=True, name=f"vu-{index}")
+        self.config = config
+        self.stats = stats
+        self.stop_event = stop_event
+        self.rng = random.Random(config["seed"] + index)
+        self.username = f"load_{config['run_id']}_{index}"
+        self.password = uuid.uuid4().hex
+        self.token = None
+        self.dataset_ids = []
+
+    # ------------------------------------------------------------
+    # ✅ HTTP
+    # ------------------------------------------------------------
+
+    def call(self, name, method, path, body=None, content_type=None, auth=True):
+        headers = {}
+        if content_type:
+            headers["Content-Type"] = content_type
+        if auth and self.token:
+            headers["Authorization"] = f"Token {self.token}"
+
+        request = Request(self.config["base_url"] + path, data=body, method=method, headers=headers)
+        start = time.perf_counter()
+        try:
+            with urlopen(request, timeout=self.config["timeout"]) as response:
+                status, payload = response.status, response.read()
+        except HTTPError as e:
+            status, payload = e.code, e.read()
+        except (URLError, OSError):
+            status, payload = 0, b""
+
+        ok = 200 <= status < 400
+        self.stats.record(name, time.perf_counter() - start, status, ok)
+        return ok, payload
+
+    def post_json(self, name, path, data, auth=True):
+        return self.call(name, "POST", path, json.dumps(data).encode(), "application/json", auth)
+
+    # ------------------------------------------------------------
+    # ✅ Actions
+    # ------------------------------------------------------------
+
+    def signup(self):
+        ok, _ = self.post_json("signup", "/api/signup/", {
+            "username": self.username,
+            "email": f"{self.username}@example.com",
+            "password": self.password,
+        }, auth=False)
+        return ok
+
+    def obtain_token(self):
+        ok, payload = self.post_json("token", "/api/token/", {
+            "username": self.username, "password": self.password,
+        }, auth=False)
+        if ok:
+            self.token = json.loads(payload)["token"]
+        return ok
+
+    def upload(self, name="upload"):
+        body, content_type = _multipart("file", f"{self.username}.csv", self.config["csv_bytes"])
+        ok, payload = self.call(name, "POST", "/api/upload/", body, content_type)
+        if ok:
+            # ✅ Reports only for recent uploads (retention may drop older ones)
+            self.dataset_ids = (self.dataset_ids + [json.loads(payload)["dataset_id"]])[-5:]
+
+    def history(self):
+        self.call("history", "GET", "/api/history/")
+
+    def report(self):
+        if not self.dataset_ids:
+            return self.upload(REPORT_UPLOAD)
+        dataset_id = self.rng.choice(self.dataset_ids)
+        self.call("report", "GET", f"/api/report/{dataset_id}/{self.config['report_query']}")
+
+    def run(self):
+        if not (self.signup() and self.obtain_token()):
+            return
+
+        actions = {
+            "upload": self.upload,
+            "history": self.history,
+            "report": self.report,
+            "token": self.obtain_token,
+        }
+        names = list(self.config["mix"])
+        weights = [self.config["mix"][n] for n in names]
+        think_time = self.config["think_time"]
+
+        while not self.stop_event.is_set():
+            actions[self.rng.choices(names, weights)[0]]()
+            if think_time:
+                self.stop_event.wait(self.rng.uniform(0, 2 * think_time))
+
+
+def run_load_test(base_url, users=10, duration=30.0, ramp_up=5.0, mix=None,
+                  rows=1000, think_time=0.0, timeout=60.0, chart_backend=None, seed=7):
+    """
+    Drives ``users`` concurrent virtual users against ``base_url`` for
+    ``duration`` seconds, starting them evenly over ``ramp_up`` seconds.
+    """
+    buffer = io.StringIO()
+    synthetic_frame(rows, seed=seed).to_csv(buffer, index=False)
+
+    config = {
+        "base_url": base_url.rstrip("/"),
+        "mix": mix or DEFAULT_MIX,
+        "csv_bytes": buffer.getvalue().encode(),
+        "think_time": think_time,
+        "timeout": timeout,
+        "report_query": f"?charts={chart_backend}" if chart_backend else "",
+        "run_id": uuid.uuid4().hex[:8],
+        "seed": seed,
+    }
+
+    stats = Stats()
+    stop_event = threading.Event()
+    threads = []
+
+    start = time.perf_counter()
+    deadline = start + duration
+
+    # ✅ Ramp-up: spread thread starts evenly
+    for i in range(users):
+        thread = VirtualUser(i, config, stats, stop_event)
+        thread.start()
+        threads.append(thread)
+        if ramp_up and i < users - 1:
+            stop_event.wait(min(ramp_up / (users - 1), max(0.0, deadline - time.perf_counter())))
+
+    stop_event.wait(max(0.0, deadline - time.perf_counter()))
+    stop_event.set()
+    for thread in threads:
+        thread.join(timeout)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "meta": {
+            "base_url": config["base_url"],
+            "users": users,
+            "duration": duration,
+            "ramp_up": ramp_up,
+            "mix": config["mix"],
+            "rows": rows,
+            "run_id": config["run_id"],
+            "elapsed": elapsed,
+        },
+        "endpoints": stats.report(elapsed),
+    }
+
+
+def cleanup_load_users(run_id=None):
+    """
+    Deletes the ``load_*`` users a run signed up (all runs when
+    ``run_id`` is None); their datasets and files go with them.
+    Only reaches the target server when it shares this database.
+    """
+    from django.contrib.auth.models import User
+
+    prefix = f"load_{run_id}_" if run_id else "load_"
+    users = User.objects.filter(username__startswith=prefix)
+    count = users.count()
+    users.delete()
+    return count
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from equipment.benchmarks import synthetic_dataset
+from equipment.report import CHART_BACKENDS, render_pdf
+
+
+class Command(BaseCommand):
+    help = "Compares report render time and PDF size for each chart backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        dataset = synthetic_dataset(options["rows"])
+        repeat = options["repeat"]
+
+        self.stdout.write(f"{'backend':<12}{'first (ms)':>12}{'mean (ms)':>12}{'size (KB)':>12}")
+
+        for backend in CHART_BACKENDS:
+            # ✅ First render includes template / font warm-up
+            start = time.perf_counter()
+            pdf = render_pdf(dataset, chart_backend=backend)
+            first = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                render_pdf(dataset, chart_backend=backend)
+            mean = (time.perf_counter() - start) / repeat
+
+            self.stdout.write(
+                f"{backend:<12}{first * 1000:>12.1f}{mean * 1000:>12.1f}{len(pdf) / 1024:>12.1f}"
+            )
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from equipment.benchmarks import compare, load_results, run_benchmarks, save_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks analyze_csv, chart/PDF rendering and end-to-end "
+        "upload/history/report latency on synthetic CSVs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", default="10000,100000,1000000",
+            help="Comma separated row counts (10K .. 10M).",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument(
+            "--e2e-max-rows", type=int, default=100_000,
+            help="Largest file sent through the end-to-end client benchmark.",
+        )
+        parser.add_argument("--output", default="benchmark_results.json")
+        parser.add_argument("--baseline", help="Stored results to compare against.")
+        parser.add_argument(
+            "--tolerance", type=float, default=0.2,
+            help="Allowed slowdown vs baseline before failing (0.2 = 20%%).",
+        )
+        parser.add_argument("--workdir", help="Where synthetic CSVs are written (default: tmp).")
+
+    def handle(self, *args, **options):
+        try:
+            row_counts = [int(r) for r in options["rows"].split(",") if r.strip()]
+        except ValueError:
+            raise CommandError("--rows must be a comma separated list of integers")
+
+        results = run_benchmarks(
+            row_counts,
+            repeat=options["repeat"],
+            e2e_max_rows=options["e2e_max_rows"],
+            workdir=options["workdir"],
+        )
+        save_results(options["output"], results)
+        self.stdout.write(f"Results written to {options['output']}\n")
+
+        baseline = load_results(options["baseline"]) if options["baseline"] else {}
+        rows, regressions = compare(results, baseline, options["tolerance"])
+
+        self.stdout.write(f"{'benchmark':<36}{'baseline (s)':>14}{'current (s)':>14}{'ratio':>8}")
+        for name, base, current, ratio in rows:
+            base_text = f"{base:.4f}" if base is not None else "-"
+            ratio_text = f"{ratio:.2f}" if ratio is not None else "-"
+            self.stdout.write(f"{name:<36}{base_text:>14}{current:>14.4f}{ratio_text:>8}")
+
+        if regressions:
+            raise CommandError("Regressions over tolerance: " + ", ".join(regressions))
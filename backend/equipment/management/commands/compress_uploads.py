@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from equipment.compression import CODECS
+from equipment.storage import compress_existing
+
+
+class Command(BaseCommand):
+    help = (
+        "Compresses stored dataset CSVs that are still plain (uploads from before "
+        "UPLOAD_COMPRESSION), in parallel. Safe to run while the server is up."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--codec", choices=[c for c in CODECS if c != "none"],
+            help="Defaults to UPLOAD_COMPRESSION.",
+        )
+        parser.add_argument("--workers", type=int, help="Worker processes (default: EQUIPMENT_WORKERS / all cores).")
+        parser.add_argument("--batch-size", type=int, default=100, help="Files queued per batch.")
+        parser.add_argument("--dry-run", action="store_true", help="List what would be compressed.")
+
+    def handle(self, *args, **options):
+        log = self.stdout.write if options["verbosity"] > 1 or options["dry_run"] else None
+
+        try:
+            stats = compress_existing(
+                codec=options["codec"],
+                workers=options["workers"] and max(1, options["workers"]),
+                batch_size=max(1, options["batch_size"]),
+                dry_run=options["dry_run"],
+                log=log,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(
+                f"Would compress {stats['files']} file(s), {stats['bytes_before']} bytes"
+            ))
+            return
+
+        saved = stats["bytes_before"] - stats["bytes_after"]
+        ratio = stats["bytes_before"] / stats["bytes_after"] if stats["bytes_after"] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Compressed {stats['files']} file(s): {stats['bytes_before']} -> {stats['bytes_after']} bytes "
+            f"(saved {saved}, ratio {ratio:.1f}x), skipped {stats['skipped']}"
+        ))
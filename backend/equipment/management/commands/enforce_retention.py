@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from equipment.retention import enforce_retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes datasets outside each user's retention policy (count, age, bytes). "
+        "Run it periodically (cron / systemd timer)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", help="Only these usernames (repeatable).")
+        parser.add_argument("--dry-run", action="store_true", help="List what would be deleted.")
+
+    def handle(self, *args, **options):
+        users = None
+        if options["user"]:
+            users = list(User.objects.filter(username__in=options["user"]))
+            missing = set(options["user"]) - {u.username for u in users}
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+
+        deleted = enforce_retention(users, dry_run=options["dry_run"])
+
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        for username, ids in deleted.items():
+            self.stdout.write(f"{username}: {verb.lower()} {len(ids)} dataset(s) {ids}")
+
+        total = sum(len(ids) for ids in deleted.values())
+        self.stdout.write(self.style.SUCCESS(f"{verb} {total} dataset(s) for {len(deleted)} user(s)"))
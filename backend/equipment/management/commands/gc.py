@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from equipment.storage import collect_garbage
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconciles uploads/ against the database: removes dataset files, columnar "
+        "stores and legacy reports/charts no dataset owns, and unfinished uploads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Directory entries per DB query.")
+        parser.add_argument(
+            "--min-age", type=int, default=3600,
+            help="Seconds; younger files are skipped (uploads in progress).",
+        )
+        parser.add_argument("--keep-failed", action="store_true", help="Do not delete unfinished uploads.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        log = self.stdout.write if options["verbosity"] > 1 or options["dry_run"] else None
+
+        stats = collect_garbage(
+            batch_size=max(1, options["batch_size"]),
+            min_age=max(0, options["min_age"]),
+            dry_run=options["dry_run"],
+            delete_failed=not options["keep_failed"],
+            log=log,
+        )
+
+        for name, count in stats.items():
+            self.stdout.write(f"{name:<18}{count:>8}")
+        if stats["missing_files"]:
+            self.stderr.write(self.style.WARNING(
+                f"{stats['missing_files']} dataset(s) reference missing files (not deleted)"
+            ))
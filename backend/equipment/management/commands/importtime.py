@@ -0,0 +1,107 @@
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# ✅ What a web worker imports at boot (WSGI app + URLconf)
+BACKEND_BOOT = (
+    "import os, django\n"
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings_module!r})\n"
+    "from django.core.wsgi import get_wsgi_application\n"
+    "get_wsgi_application()\n"
+    "import importlib\n"
+    "importlib.import_module({urlconf!r})\n"
+)
+
+# ✅ What the desktop app imports before the login window shows
+DESKTOP_BOOT = (
+    "import sys\n"
+    "sys.path.insert(0, {path!r})\n"
+    "import ui\n"
+)
+
+
+def parse_importtime(stderr):
+    """Parses ``-X importtime`` output into ``[(module, self_us, cumulative_us, depth)]``."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Profiles import time (python -X importtime) of a web worker boot "
+        "or the desktop login screen, and flags heavy modules loaded eagerly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", nargs="?", default="backend", choices=["backend", "desktop"])
+        parser.add_argument("--repeat", type=int, default=3, help="Runs; the fastest one is reported.")
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument(
+            "--forbid", default="matplotlib,reportlab",
+            help="Comma separated modules that must not be imported at boot.",
+        )
+        parser.add_argument("--budget-ms", type=float, help="Fail if boot imports take longer.")
+
+    def handle(self, *args, **options):
+        if options["target"] == "backend":
+            code = BACKEND_BOOT.format(
+                settings_module=os.environ.get("DJANGO_SETTINGS_MODULE", "chemical_backend.settings"),
+                urlconf=settings.ROOT_URLCONF,
+            )
+            cwd = settings.BASE_DIR
+        else:
+            path = os.path.join(os.path.dirname(settings.BASE_DIR), "desktop-app")
+            code = DESKTOP_BOOT.format(path=path)
+            cwd = path
+
+        best = None
+        for _ in range(max(1, options["repeat"])):
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", code],
+                cwd=cwd, capture_output=True, text=True,
+            )
+            wall = time.perf_counter() - start
+
+            if result.returncode != 0:
+                raise CommandError(result.stderr.strip().splitlines()[-1])
+
+            rows = parse_importtime(result.stderr)
+            if best is None or wall < best[0]:
+                best = (wall, rows)
+
+        wall, rows = best
+        total_ms = sum(r[2] for r in rows if r[3] == 0) / 1000
+
+        self.stdout.write(f"{options['target']}: {total_ms:.1f} ms in imports "
+                          f"({wall * 1000:.1f} ms wall incl. interpreter start)\n")
+
+        self.stdout.write(f"{'module':<48}{'self ms':>10}{'cumulative ms':>16}")
+        for name, self_us, cumulative_us, _ in sorted(rows, key=lambda r: -r[2])[:options["top"]]:
+            self.stdout.write(f"{name:<48}{self_us / 1000:>10.1f}{cumulative_us / 1000:>16.1f}")
+
+        imported = {r[0] for r in rows}
+        forbidden = [
+            name for name in filter(None, options["forbid"].split(","))
+            if name.strip() in imported
+        ]
+
+        problems = []
+        if forbidden:
+            problems.append("Heavy modules imported at boot: " + ", ".join(forbidden))
+        if options["budget_ms"] is not None and total_ms > options["budget_ms"]:
+            problems.append(f"Import time {total_ms:.1f} ms exceeds budget {options['budget_ms']:.1f} ms")
+
+        if problems:
+            raise CommandError("; ".join(problems))
@@ -0,0 +1,94 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from equipment.loadtest import cleanup_load_users, parse_mix, run_load_test
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests a running backend (runserver / gunicorn on localhost) with "
+        "concurrent signup, token, upload, history and report traffic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users.")
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds.")
+        parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds to start all users.")
+        parser.add_argument(
+            "--mix", default="upload=1,history=5,report=2,token=1",
+            help="Weighted endpoint mix (upload, history, report, token).",
+        )
+        parser.add_argument("--rows", type=int, default=1000, help="Rows per uploaded CSV.")
+        parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between calls.")
+        parser.add_argument("--timeout", type=float, default=60.0)
+        parser.add_argument("--charts", help="Report chart backend (matplotlib / vector).")
+        parser.add_argument("--output", help="Write full results as JSON.")
+        parser.add_argument(
+            "--max-error-rate", type=float,
+            help="Exit non-zero if any endpoint's error rate exceeds this (0.01 = 1%%).",
+        )
+        parser.add_argument(
+            "--cleanup", action="store_true",
+            help="Afterwards delete this run's load_* users and datasets "
+                 "(the server must use this project's database).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options["mix"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options["users"] < 1:
+            raise CommandError("--users must be at least 1")
+
+        self.stdout.write(
+            f"Load testing {options['url']} with {options['users']} users "
+            f"for {options['duration']:.0f}s (ramp-up {options['ramp_up']:.0f}s)..."
+        )
+
+        results = run_load_test(
+            options["url"],
+            users=options["users"],
+            duration=options["duration"],
+            ramp_up=options["ramp_up"],
+            mix=mix,
+            rows=options["rows"],
+            think_time=options["think_time"],
+            timeout=options["timeout"],
+            chart_backend=options["charts"],
+        )
+
+        if options["cleanup"]:
+            removed = cleanup_load_users(results["meta"]["run_id"])
+            self.stdout.write(f"Removed {removed} load test user(s) and their datasets")
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+
+        endpoints = results["endpoints"]
+        if not endpoints:
+            raise CommandError(f"No requests completed against {options['url']}")
+
+        self.stdout.write(
+            f"{'endpoint':<14}{'requests':>10}{'rps':>9}{'p50 ms':>10}"
+            f"{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'err %':>8}"
+        )
+        for name, row in endpoints.items():
+            self.stdout.write(
+                f"{name:<14}{row['requests']:>10}{row['throughput_rps']:>9.2f}"
+                f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+                f"{row['errors']:>8}{row['error_rate'] * 100:>8.2f}"
+            )
+
+        total = sum(row["requests"] for row in endpoints.values())
+        self.stdout.write(f"\n{total} requests in {results['meta']['elapsed']:.1f}s "
+                          f"({total / results['meta']['elapsed']:.2f} req/s)")
+
+        limit = options["max_error_rate"]
+        failing = [n for n, row in endpoints.items() if limit is not None and row["error_rate"] > limit]
+        if failing:
+            raise CommandError("Error rate over limit: " + ", ".join(failing))
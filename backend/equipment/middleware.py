@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from rest_framework import exceptions
+
+from .authentication import authenticate_request
+from .instrumentation import REQUEST_DURATION, end_request, start_request
+from .profiling import RequestProfiler, profile_lock, requested_mode
+
+
+logger = logging.getLogger("equipment.timing")
+
+
+# ============================================================
+# ✅ Request Timing Middleware
+# - X-Request-ID on every response
+# - Server-Timing header with per-stage durations
+# - One structured (JSON) timing log line per request
+# - Request latency histogram for /metrics
+# ORM queries are timed by every connection (signals.py), so async
+# views count the queries their worker threads run too
+# ============================================================
+
+class TimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        timings, token, start = self.begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, timings, start)
+
+    async def __acall__(self, request):
+        timings, token, start = self.begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, timings, start)
+
+    def begin(self, request):
+        request.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        timings, token = start_request()
+        return timings, token, time.perf_counter()
+
+    def finish(self, request, response, timings, start):
+        total = time.perf_counter() - start
+        stages = timings.as_dict()
+
+        match = getattr(request, "resolver_match", None)
+        view = match.route if match else "unmatched"
+
+        REQUEST_DURATION.observe(
+            total, view=view, method=request.method, status=response.status_code
+        )
+
+        server_timing = [f"{name};dur={d * 1000:.1f}" for name, d in stages.items()]
+        if timings.db_queries:
+            server_timing[-1] += f';desc="{timings.db_queries} queries"'
+        server_timing.append(f"total;dur={total * 1000:.1f}")
+
+        response["Server-Timing"] = ", ".join(server_timing)
+        response["X-Request-ID"] = request.request_id
+
+        logger.info(json.dumps({
+            "request_id": request.request_id,
+            "method": request.method,
+            "view": view,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            "stages_ms": {name: round(d * 1000, 2) for name, d in stages.items()},
+            "db_queries": timings.db_queries,
+        }))
+
+        return response
+
+
+# ============================================================
+# ✅ Profiling Middleware (staff only, opt-in per request)
+# X-Profile: cprofile | sampling   (or ?profile=1)
+# Artifacts land in PROFILE_ROOT/<request_id>/, see profiling.py
+# ============================================================
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        mode = requested_mode(request)
+        if not mode or not settings.PROFILE_ENABLED or not _is_staff(request):
+            return self.get_response(request)
+
+        if not profile_lock.acquire(blocking=False):
+            response = self.get_response(request)
+            response["X-Profile"] = "busy"
+            return response
+
+        try:
+            profiler = RequestProfiler(mode)
+            profiler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.stop()
+            return self.saved(request, response, profiler)
+        finally:
+            profile_lock.release()
+
+    async def __acall__(self, request):
+        mode = requested_mode(request)
+        if not mode or not settings.PROFILE_ENABLED or not await sync_to_async(_is_staff)(request):
+            return await self.get_response(request)
+
+        if not profile_lock.acquire(blocking=False):
+            response = await self.get_response(request)
+            response["X-Profile"] = "busy"
+            return response
+
+        # ✅ Profiles the event loop thread: concurrent requests on this
+        # worker show up too, and process-pool work does not
+        try:
+            profiler = RequestProfiler(mode)
+            profiler.start()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.stop()
+            return self.saved(request, response, profiler)
+        finally:
+            profile_lock.release()
+
+    def saved(self, request, response, profiler):
+        try:
+            path = profiler.save(request, response)
+        except OSError:
+            logger.exception("Could not save profile for %s", getattr(request, "request_id", "?"))
+            return response
+
+        response["X-Profile"] = os.path.basename(path)
+        return response
+
+
+def _is_staff(request):
+    """Session staff users, or staff authenticated by API token."""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        try:
+            user = authenticate_request(request)
+        except exceptions.AuthenticationFailed:
+            return False
+
+    if user is None or not user.is_staff:
+        return False
+
+    request.profiled_by = user
+    return True
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0004_datasetupload_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetupload',
+            name='aggregates',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='datasetupload',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
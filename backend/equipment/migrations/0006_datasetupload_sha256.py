@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0005_datasetupload_aggregates_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetupload',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
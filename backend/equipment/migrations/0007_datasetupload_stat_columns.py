@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+STAT_FIELDS = ["row_count", "avg_flowrate", "avg_pressure", "avg_temperature", "type_count"]
+
+
+def backfill_stats(apps, schema_editor):
+    """Copies the key aggregates out of existing summary JSON."""
+    DatasetUpload = apps.get_model("equipment", "DatasetUpload")
+
+    batch = []
+    for dataset in DatasetUpload.objects.only("id", "summary").iterator(chunk_size=500):
+        summary = dataset.summary or {}
+        dataset.row_count = summary.get("total_count") or 0
+        dataset.avg_flowrate = summary.get("avg_flowrate")
+        dataset.avg_pressure = summary.get("avg_pressure")
+        dataset.avg_temperature = summary.get("avg_temperature")
+        dataset.type_count = len(summary.get("type_distribution") or {})
+        batch.append(dataset)
+
+        if len(batch) >= 500:
+            DatasetUpload.objects.bulk_update(batch, STAT_FIELDS)
+            batch = []
+
+    DatasetUpload.objects.bulk_update(batch, STAT_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0006_datasetupload_sha256'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetupload',
+            name='avg_flowrate',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='datasetupload',
+            name='avg_pressure',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='datasetupload',
+            name='avg_temperature',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='datasetupload',
+            name='row_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='datasetupload',
+            name='type_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='datasetupload',
+            index=models.Index(fields=['user', 'row_count', 'id'], name='dataset_user_row_count'),
+        ),
+        migrations.AddIndex(
+            model_name='datasetupload',
+            index=models.Index(fields=['user', 'avg_flowrate', 'id'], name='dataset_user_avg_flowrate'),
+        ),
+        migrations.AddIndex(
+            model_name='datasetupload',
+            index=models.Index(fields=['user', 'avg_pressure', 'id'], name='dataset_user_avg_pressure'),
+        ),
+        migrations.AddIndex(
+            model_name='datasetupload',
+            index=models.Index(fields=['user', 'avg_temperature', 'id'], name='dataset_user_avg_temperature'),
+        ),
+        migrations.AddIndex(
+            model_name='datasetupload',
+            index=models.Index(fields=['user', 'type_count', 'id'], name='dataset_user_type_count'),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_file_size(apps, schema_editor):
+    """Sizes of the CSVs already on disk (missing files count as 0)."""
+    DatasetUpload = apps.get_model("equipment", "DatasetUpload")
+
+    batch = []
+    for dataset in DatasetUpload.objects.only("id", "file").iterator(chunk_size=500):
+        try:
+            dataset.file_size = dataset.file.size if dataset.file else 0
+        except OSError:
+            continue
+        batch.append(dataset)
+
+        if len(batch) >= 500:
+            DatasetUpload.objects.bulk_update(batch, ["file_size"])
+            batch = []
+
+    DatasetUpload.objects.bulk_update(batch, ["file_size"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0007_datasetupload_stat_columns'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RetentionPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('max_datasets', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_age_days', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_total_bytes', models.PositiveBigIntegerField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='datasetupload',
+            name='file_size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='datasetupload',
+            index=models.Index(fields=['user', 'uploaded_at'], name='dataset_user_uploaded_at'),
+        ),
+        migrations.AddField(
+            model_name='retentionpolicy',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='retention_policy', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_file_size, migrations.RunPython.noop),
+    ]
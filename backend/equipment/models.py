@@ -1,8 +1,28 @@
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import User
 
 
+# ✅ Summary aggregates denormalized into indexed columns (see refresh_stats)
+STAT_FIELDS = ["row_count", "avg_flowrate", "avg_pressure", "avg_temperature", "type_count"]
+
+
+class DatasetUploadQuerySet(models.QuerySet):
+
+    def select_for_write(self):
+        """
+        ``select_for_update()`` that also locks on SQLite, which ignores
+        FOR UPDATE: a no-op UPDATE of the rows takes the database write
+        lock, so concurrent writers queue here instead of reading the
+        same version. Must be the first statement of the atomic block.
+        """
+        self.update(version=F("version"))
+        return self.select_for_update()
+
+
 class DatasetUpload(models.Model):
+    objects = DatasetUploadQuerySet.as_manager()
+
     # ✅ NEW: Link dataset upload to a user (per-user history)
     user = models.ForeignKey(
         User,
@@ -20,11 +40,87 @@ class DatasetUpload(models.Model):
     # ✅ Summary JSON (UNCHANGED)
     summary = models.JSONField(default=dict)
 
+    # ✅ Running aggregates (counts, sums, per-type stats) for appends
+    aggregates = models.JSONField(default=dict, blank=True)
+
+    # ✅ Bumped on every append (invalidates reports + ETags)
+    version = models.PositiveIntegerField(default=1)
+
+    # ✅ Key aggregates copied out of the summary JSON, so datasets can
+    # be filtered / sorted in SQL (kept in sync by save())
+    row_count = models.PositiveIntegerField(default=0)
+    avg_flowrate = models.FloatField(null=True, blank=True)
+    avg_pressure = models.FloatField(null=True, blank=True)
+    avg_temperature = models.FloatField(null=True, blank=True)
+    type_count = models.PositiveIntegerField(default=0)
+
+    # ✅ Bytes of the stored CSV (retention byte quotas)
+    file_size = models.PositiveBigIntegerField(default=0)
+
+    # ✅ SHA-256 of the uploaded file (computed while receiving)
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+
     # ✅ Upload timestamp (UNCHANGED)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # ✅ Search always filters by user, then sorts on one column (+ id)
+        indexes = [
+            models.Index(fields=["user", field, "id"], name=f"dataset_user_{field}")
+            for field in STAT_FIELDS
+        ] + [
+            # ✅ Age-based retention
+            models.Index(fields=["user", "uploaded_at"], name="dataset_user_uploaded_at"),
+        ]
+
+    def refresh_stats(self):
+        """Copies the key aggregates out of ``summary`` into their columns."""
+        summary = self.summary or {}
+        self.row_count = summary.get("total_count") or 0
+        self.avg_flowrate = summary.get("avg_flowrate")
+        self.avg_pressure = summary.get("avg_pressure")
+        self.avg_temperature = summary.get("avg_temperature")
+        self.type_count = len(summary.get("type_distribution") or {})
+
+    def refresh_file_size(self):
+        try:
+            self.file_size = self.file.size if self.file else 0
+        except OSError:
+            pass
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if "summary" not in self.get_deferred_fields() and (
+            update_fields is None or "summary" in update_fields
+        ):
+            # ✅ Summary changes on upload + append: so do the stats and size
+            self.refresh_stats()
+            self.refresh_file_size()
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | set(STAT_FIELDS) | {"file_size"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         # ✅ Handles uploads even if user is missing (old datasets)
         if self.user:
             return f"{self.user.username} - {self.filename}"
-        return f"Dataset {self.id} - {self.filename}"
\ No newline at end of file
+        return f"Dataset {self.id} - {self.filename}"
+
+class RetentionPolicy(models.Model):
+    """
+    Per-user retention overrides. Empty limits use the global
+    RETENTION_* settings; 0 means unlimited.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="retention_policy")
+
+    # ✅ Keep at most this many datasets (newest first)
+    max_datasets = models.PositiveIntegerField(null=True, blank=True)
+
+    # ✅ Delete datasets older than this many days
+    max_age_days = models.PositiveIntegerField(null=True, blank=True)
+
+    # ✅ Keep the newest datasets that fit in this many bytes
+    max_total_bytes = models.PositiveBigIntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Retention for {self.user.username}"
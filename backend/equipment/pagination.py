@@ -0,0 +1,85 @@
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# ============================================================
+# ✅ Keyset Pagination
+# Pages are sorted on (field, id) and each page starts right after
+# the last row of the previous one (WHERE field < v OR (field = v AND
+# id < last_id)), so page 100 costs the same index seek as page 1.
+# The cursor is that last (value, id) pair, base64 encoded.
+# The sort field must not be NULL for paginated rows.
+# ============================================================
+
+class KeysetPagination(BasePagination):
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def __init__(self, field="id", descending=True):
+        self.field = field
+        self.descending = descending
+
+    def encode_cursor(self, row):
+        position = [getattr(row, self.field), row.id]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request):
+        raw = request.GET.get(self.cursor_query_param)
+        if not raw:
+            return None
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(raw.encode()))
+            return value, int(pk)
+        except (TypeError, ValueError):
+            raise NotFound("Invalid cursor")
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.GET.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            size = self.page_size
+        return min(self.max_page_size, max(1, size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = self.get_page_size(request)
+
+        sign = "-" if self.descending else ""
+        op = "lt" if self.descending else "gt"
+        queryset = queryset.order_by(f"{sign}{self.field}", f"{sign}id")
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            value, pk = cursor
+            if self.field == "id":
+                queryset = queryset.filter(**{f"id__{op}": pk})
+            else:
+                queryset = queryset.filter(
+                    Q(**{f"{self.field}__{op}": value})
+                    | Q(**{self.field: value, f"id__{op}": pk})
+                )
+
+        # ✅ One extra row tells whether there is a next page
+        rows = list(queryset[:size + 1])
+        self.next_cursor = self.encode_cursor(rows[size - 1]) if len(rows) > size else None
+        return rows[:size]
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
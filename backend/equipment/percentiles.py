@@ -0,0 +1,115 @@
+import numpy as np
+from django.db import transaction
+
+from .analytics import NAME_COLUMN, NUMERIC_COLUMNS, compute_aggregates
+from .columnar import open_store
+from .instrumentation import span
+from .models import DatasetUpload
+from .sketches import combine_sketches, digest_count, distinct_count, merge_digest_list, quantile
+
+
+# ============================================================
+# ✅ Cross-Dataset Percentiles (merged sketches, no row scans)
+# Each dataset's aggregates carry per-type t-digests and an HLL of
+# the equipment names (sketches.py). Percentiles over any set of
+# datasets merge those; datasets analyzed before sketches existed
+# are backfilled once from their columnar store.
+# ============================================================
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+MAX_QUANTILES = 20
+
+
+def parse_quantiles(raw):
+    """``"0.5,0.99"`` -> ``[0.5, 0.99]``; defaults when empty."""
+    if not raw:
+        return list(DEFAULT_QUANTILES)
+    try:
+        quantiles = [float(q) for q in raw.split(",") if q.strip()]
+    except ValueError:
+        quantiles = None
+    if not quantiles or len(quantiles) > MAX_QUANTILES or not all(0 <= q <= 1 for q in quantiles):
+        raise ValueError(f"q must be 1-{MAX_QUANTILES} comma separated numbers between 0 and 1")
+    return quantiles
+
+
+def label(q):
+    return f"p{q * 100:g}"
+
+
+def store_frame(dataset):
+    """Cleaned rows of a dataset from its columnar store, names included."""
+    store = open_store(dataset)
+    frame = store.frame()
+    if NAME_COLUMN in store.columns:
+        names = np.char.decode(store.column(NAME_COLUMN), "utf-8")
+        # ✅ The store writes missing names as "" / "nan"
+        frame[NAME_COLUMN] = [None if n in ("", "nan") else n for n in names]
+    return frame
+
+
+def ensure_sketches(dataset_id):
+    """
+    Sketches of a dataset, backfilled when missing. The rows are read
+    before taking the write lock (SQLite locks the whole database) and
+    re-read under it only if an append got in between.
+    """
+    dataset = DatasetUpload.objects.get(id=dataset_id)
+    if "sketches" in dataset.aggregates:
+        return dataset.aggregates["sketches"]
+    computed = compute_aggregates(store_frame(dataset))
+
+    with transaction.atomic():
+        locked = DatasetUpload.objects.filter(id=dataset_id).select_for_write().get()
+        if "sketches" in locked.aggregates:
+            return locked.aggregates["sketches"]
+        if locked.version != dataset.version:
+            computed = compute_aggregates(store_frame(locked))
+
+        locked.aggregates = {**(locked.aggregates or computed), "sketches": computed["sketches"]}
+        locked.save(update_fields=["aggregates"])
+        return computed["sketches"]
+
+
+def load_sketches(datasets):
+    """Sketches of ``datasets`` (a queryset); returns ``(sketches, backfilled)``."""
+    sketches, missing = [], []
+    for dataset_id, aggregates in datasets.values_list("id", "aggregates").iterator():
+        if aggregates and "sketches" in aggregates:
+            sketches.append(aggregates["sketches"])
+        else:
+            missing.append(dataset_id)
+
+    sketches += [ensure_sketches(dataset_id) for dataset_id in missing]
+    return sketches, len(missing)
+
+
+@span("percentiles")
+def percentiles(sketches, quantiles, types=None):
+    """
+    Merges dataset sketches into percentiles per column, overall and per
+    type. With ``types``, only those equipment types are included (the
+    distinct equipment estimate is then left out: it is not per type).
+    """
+    merged = combine_sketches(sketches)
+    digests = merged["digests"]
+    if types:
+        digests = {t: cols for t, cols in digests.items() if t in types}
+
+    def describe(digest):
+        return {label(q): quantile(digest, q) for q in quantiles}
+
+    overall = {col: merge_digest_list([cols.get(col) for cols in digests.values()]) for col in NUMERIC_COLUMNS}
+
+    return {
+        "count": digest_count(overall[NUMERIC_COLUMNS[0]]),
+        "distinct_equipment": None if types else distinct_count(merged["distinct"]),
+        "overall": {col: describe(overall[col]) for col in NUMERIC_COLUMNS},
+        "by_type": {
+            eq_type: {
+                "count": digest_count(cols.get(NUMERIC_COLUMNS[0])),
+                **{col: describe(cols.get(col)) for col in NUMERIC_COLUMNS},
+            }
+            for eq_type, cols in sorted(digests.items())
+        },
+    }
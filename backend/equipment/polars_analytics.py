@@ -0,0 +1,130 @@
+import pandas as pd
+import polars as pl
+
+from .analytics import NAME_COLUMN, NUMERIC_COLUMNS, PREVIEW_ROWS, REQUIRED_COLUMNS, assemble_summary
+from .columnar import write_store
+from .instrumentation import span
+from .sketches import build_sketches
+
+
+# ============================================================
+# ✅ Polars Analytics Backend (ANALYTICS_BACKEND = "polars")
+# One lazy plan over scan_csv: the numeric cleaning is a filter
+# pushed into the scan, the aggregations, column lists and preview
+# share that scan (collect_all) and run on every core.
+# Same (summary, aggregates) contract as analytics.analyze_dataset.
+# ============================================================
+
+# ✅ pandas.read_csv default missing-value markers (same rows dropped)
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null",
+]
+
+
+def scan(file_path):
+    """
+    Lazily scans a CSV (every column as text) and validates the
+    required columns. Only the header is read here.
+    """
+    lf = pl.scan_csv(file_path, infer_schema_length=0, null_values=NA_VALUES)
+    columns = lf.collect_schema().names()
+
+    for col in REQUIRED_COLUMNS:
+        if col not in columns:
+            raise ValueError(f"Missing required column: {col}")
+
+    return lf, columns
+
+
+def clean(lf):
+    """Polars version of analytics.clean_frame (coerce + drop invalid rows)."""
+    lf = lf.with_columns(
+        pl.col(col).str.strip_chars().cast(pl.Float64, strict=False) for col in NUMERIC_COLUMNS
+    )
+    return lf.filter(
+        pl.all_horizontal(
+            pl.col(col).is_not_null() & pl.col(col).is_not_nan() for col in NUMERIC_COLUMNS
+        )
+    )
+
+
+def aggregate_plans(cleaned):
+    """Lazy plans for the overall totals and the per-type statistics."""
+    totals = cleaned.select(
+        pl.len().alias("count"),
+        *(pl.col(col).sum() for col in NUMERIC_COLUMNS),
+    )
+
+    by_type = (
+        cleaned
+        .filter(pl.col("Type").is_not_null())
+        .group_by("Type")
+        .agg(
+            pl.len().alias("count"),
+            *(pl.col(col).sum().alias(f"sum:{col}") for col in NUMERIC_COLUMNS),
+            *(pl.col(col).min().alias(f"min:{col}") for col in NUMERIC_COLUMNS),
+            *(pl.col(col).max().alias(f"max:{col}") for col in NUMERIC_COLUMNS),
+        )
+    )
+    return totals, by_type
+
+
+def to_aggregates(totals, by_type):
+    """Collected frames -> the JSON aggregates format of compute_aggregates."""
+    type_stats = {}
+    for row in by_type.iter_rows(named=True):
+        type_stats[str(row["Type"])] = {
+            "count": int(row["count"]),
+            "sums": {col: float(row[f"sum:{col}"]) for col in NUMERIC_COLUMNS},
+            "min": {col: float(row[f"min:{col}"]) for col in NUMERIC_COLUMNS},
+            "max": {col: float(row[f"max:{col}"]) for col in NUMERIC_COLUMNS},
+        }
+
+    return {
+        "count": int(totals["count"][0]),
+        "sums": {col: float(totals[col][0] or 0.0) for col in NUMERIC_COLUMNS},
+        "type_counts": {t: stats["count"] for t, stats in type_stats.items()},
+        "type_stats": type_stats,
+    }
+
+
+@span("analyze_polars")
+def analyze_dataset_polars(file_path, store=None):
+    """
+    Returns ``(summary, aggregates)`` like ``analyze_dataset``.
+    Only the analyzed columns are materialized in full (numeric, Type
+    and name: store + sketches); the preview is a pushed down slice of
+    the first rows.
+    """
+    lf, columns = scan(file_path)
+    cleaned = clean(lf)
+
+    row_columns = ([NAME_COLUMN] if NAME_COLUMN in columns else []) + ["Type"] + NUMERIC_COLUMNS
+
+    totals, by_type = aggregate_plans(cleaned)
+
+    with span("read_csv"):
+        totals, by_type, rows, preview = pl.collect_all([
+            totals,
+            by_type,
+            cleaned.select(row_columns),
+            cleaned.head(PREVIEW_ROWS),
+        ])
+
+    aggregates = to_aggregates(totals, by_type)
+    frame = pd.DataFrame({col: rows[col].to_numpy() for col in row_columns})
+    aggregates["sketches"] = build_sketches(frame, NUMERIC_COLUMNS, NAME_COLUMN)
+
+    if store:
+        with span("columnar"):
+            write_store(store, frame)
+
+    summary = assemble_summary(
+        aggregates,
+        {col: rows[col].to_list() for col in NUMERIC_COLUMNS},
+        preview.to_dicts(),
+        columns,
+    )
+    return summary, aggregates
@@ -0,0 +1,139 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+
+from django.conf import settings
+
+
+# ============================================================
+# ✅ Per-Request Profiling (staff only, opt-in)
+# Saved under PROFILE_ROOT/<request_id>/:
+# - profile.pstats      cProfile stats (python -m pstats / snakeviz)
+# - stacks.collapsed    sampled stacks (flamegraph.pl / speedscope)
+# - allocations.txt     tracemalloc top allocation sites + peak
+# - meta.json           request, status, timings
+# ============================================================
+
+PROFILE_MODES = ("cprofile", "sampling")
+
+SAFE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# ✅ tracemalloc + setprofile are process-global: one profiled request at a time
+profile_lock = threading.Lock()
+
+
+def requested_mode(request):
+    """Profiling mode asked for via ``X-Profile`` header or ``?profile=``."""
+    value = (request.headers.get("X-Profile") or request.GET.get("profile") or "").lower()
+    if not value or value in ("0", "false", "off"):
+        return None
+    return value if value in PROFILE_MODES else "cprofile"
+
+
+def profile_dir(request_id):
+    # ✅ request ids can come from the client: never trust them as paths
+    name = request_id if SAFE_ID.match(request_id or "") else uuid.uuid4().hex
+    return os.path.join(settings.PROFILE_ROOT, name)
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True, name="equipment-profiler")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = {}
+        self.samples = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+
+            key = ";".join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.counts.items()))
+
+
+class RequestProfiler:
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.profiler = cProfile.Profile() if mode == "cprofile" else None
+        self.sampler = StackSampler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL)
+
+    def start(self):
+        self.started = time.perf_counter()
+        tracemalloc.start(settings.PROFILE_TRACEMALLOC_FRAMES)
+        self.sampler.start()
+        if self.profiler:
+            self.profiler.enable()
+
+    def stop(self):
+        if self.profiler:
+            self.profiler.disable()
+        self.sampler.stop()
+        self.snapshot = tracemalloc.take_snapshot()
+        self.current, self.peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.duration = time.perf_counter() - self.started
+
+    def save(self, request, response):
+        path = profile_dir(getattr(request, "request_id", ""))
+        os.makedirs(path, exist_ok=True)
+
+        if self.profiler:
+            self.profiler.dump_stats(os.path.join(path, "profile.pstats"))
+
+            summary = io.StringIO()
+            pstats.Stats(self.profiler, stream=summary).sort_stats("cumulative").print_stats(40)
+            with open(os.path.join(path, "profile.txt"), "w") as f:
+                f.write(summary.getvalue())
+
+        with open(os.path.join(path, "stacks.collapsed"), "w") as f:
+            f.write(self.sampler.collapsed())
+
+        with open(os.path.join(path, "allocations.txt"), "w") as f:
+            f.write(f"peak: {self.peak / 1024 / 1024:.2f} MB\n")
+            f.write(f"retained at end: {self.current / 1024 / 1024:.2f} MB\n\n")
+            for stat in self.snapshot.statistics("lineno")[:50]:
+                f.write(f"{stat}\n")
+
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({
+                "request_id": getattr(request, "request_id", None),
+                "method": request.method,
+                "path": request.get_full_path(),
+                "status": response.status_code,
+                "mode": self.mode,
+                "duration_ms": round(self.duration * 1000, 2),
+                "samples": self.sampler.samples,
+                "peak_alloc_mb": round(self.peak / 1024 / 1024, 2),
+                "user": str(getattr(request, "profiled_by", "")),
+            }, f, indent=2)
+
+        return path
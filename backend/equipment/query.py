@@ -0,0 +1,230 @@
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+
+from .analytics import NUMERIC_COLUMNS
+from .columnar import open_store
+from .instrumentation import span
+
+
+# ============================================================
+# ✅ Ad-hoc Aggregate Queries (embedded DuckDB, optional)
+# The client sends a JSON spec, never SQL:
+#   {
+#     "datasets": [12, 13],                        (default: all own datasets)
+#     "metrics": [{"agg": "avg", "column": "Pressure"}, {"agg": "count"}],
+#     "filters": [{"column": "Temperature", "op": ">", "value": 80},
+#                 {"column": "Type", "op": "=", "value": "Pump"}],
+#     "group_by": ["Type"],
+#     "order_by": "avg_pressure", "descending": true,
+#     "limit": 100
+#   }
+# Identifiers come from whitelists, values are bound parameters.
+# Data is scanned in place from the memory-mapped columnar stores (no
+# CSV parsing, no copies) on an in-memory connection with external
+# access disabled. QUERY_TIMEOUT covers loading and running.
+# ============================================================
+
+AGGREGATES = {
+    "count": "COUNT",
+    "sum": "SUM",
+    "avg": "AVG",
+    "min": "MIN",
+    "max": "MAX",
+    "median": "MEDIAN",
+    "stddev": "STDDEV_SAMP",
+}
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "in")
+GROUP_COLUMNS = ("dataset_id", "Type")
+FILTER_COLUMNS = GROUP_COLUMNS + tuple(NUMERIC_COLUMNS)
+MAX_METRICS = 10
+MAX_FILTERS = 20
+
+
+class QueryError(ValueError):
+    """Invalid query spec (reported to the client as 400)."""
+
+
+class QueryTimeout(Exception):
+    pass
+
+
+def duckdb_available():
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _alias(agg, column):
+    return agg if column is None else f"{agg}_{column.lower()}"
+
+
+def parse_spec(data, max_rows):
+    """Validates a query spec and returns its normalized form."""
+    if not isinstance(data, dict):
+        raise QueryError("Query must be a JSON object")
+
+    metrics = []
+    for metric in data.get("metrics") or []:
+        agg = str(metric.get("agg", "")).lower() if isinstance(metric, dict) else ""
+        column = metric.get("column") if isinstance(metric, dict) else None
+        if agg not in AGGREGATES:
+            raise QueryError(f"Unknown aggregate: {agg or metric!r}")
+        if column is None and agg != "count":
+            raise QueryError(f"Aggregate {agg} needs a column")
+        if column is not None and column not in NUMERIC_COLUMNS:
+            raise QueryError(f"Cannot aggregate column: {column}")
+        metrics.append({"agg": agg, "column": column})
+
+    if not metrics:
+        raise QueryError("At least one metric is required")
+    if len(metrics) > MAX_METRICS:
+        raise QueryError(f"At most {MAX_METRICS} metrics are allowed")
+
+    filters = []
+    for item in data.get("filters") or []:
+        if not isinstance(item, dict):
+            raise QueryError("Filters must be objects")
+        column, op, value = item.get("column"), item.get("op", "="), item.get("value")
+        if column not in FILTER_COLUMNS:
+            raise QueryError(f"Cannot filter on column: {column}")
+        if op not in OPERATORS:
+            raise QueryError(f"Unknown operator: {op}")
+        values = value if op == "in" else [value]
+        if not isinstance(values, list) or not values:
+            raise QueryError("Operator 'in' needs a non-empty list")
+        for v in values:
+            numeric = column != "Type"
+            if numeric and (isinstance(v, bool) or not isinstance(v, (int, float))):
+                raise QueryError(f"{column} filters need numbers")
+            if not numeric and not isinstance(v, str):
+                raise QueryError("Type filters need strings")
+        filters.append({"column": column, "op": op, "value": value})
+
+    if len(filters) > MAX_FILTERS:
+        raise QueryError(f"At most {MAX_FILTERS} filters are allowed")
+
+    group_by = list(data.get("group_by") or [])
+    for column in group_by:
+        if column not in GROUP_COLUMNS:
+            raise QueryError(f"Cannot group by column: {column}")
+
+    aliases = [_alias(m["agg"], m["column"]) for m in metrics]
+    order_by = data.get("order_by")
+    if order_by is not None and order_by not in aliases + group_by:
+        raise QueryError(f"Cannot order by: {order_by}")
+
+    try:
+        limit = min(max_rows, max(1, int(data.get("limit", max_rows))))
+    except (TypeError, ValueError):
+        raise QueryError("limit must be an integer")
+
+    return {
+        "metrics": metrics,
+        "filters": filters,
+        "group_by": group_by,
+        "order_by": order_by,
+        "descending": bool(data.get("descending", False)),
+        "limit": limit,
+    }
+
+
+def spec_hash(spec, datasets):
+    """Cache identity: the normalized spec plus each dataset's version."""
+    key = {"spec": spec, "datasets": sorted([d.id, d.version] for d in datasets)}
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def build_sql(spec):
+    """Returns ``(sql, params, columns)`` for a normalized spec."""
+    select, columns = [], []
+    for column in spec["group_by"]:
+        select.append(_quote(column))
+        columns.append(column)
+
+    for metric in spec["metrics"]:
+        alias = _alias(metric["agg"], metric["column"])
+        target = "*" if metric["column"] is None else _quote(metric["column"])
+        select.append(f"{AGGREGATES[metric['agg']]}({target}) AS {_quote(alias)}")
+        columns.append(alias)
+
+    where, params = [], []
+    for item in spec["filters"]:
+        column = _quote(item["column"])
+        if item["op"] == "in":
+            where.append(f"{column} IN ({', '.join('?' for _ in item['value'])})")
+            params += item["value"]
+        else:
+            where.append(f"{column} {item['op']} ?")
+            params.append(item["value"])
+
+    sql = f"SELECT {', '.join(select)} FROM data"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if spec["group_by"]:
+        sql += " GROUP BY " + ", ".join(_quote(c) for c in spec["group_by"])
+
+    if spec["order_by"]:
+        sql += f" ORDER BY {_quote(spec['order_by'])} {'DESC' if spec['descending'] else 'ASC'}"
+    elif spec["group_by"]:
+        sql += " ORDER BY " + ", ".join(_quote(c) for c in spec["group_by"])
+
+    # ✅ One extra row tells us the result was truncated
+    sql += f" LIMIT {spec['limit'] + 1}"
+    return sql, params, columns
+
+
+@span("query")
+def run_query(spec, datasets):
+    """
+    Runs a normalized spec over ``datasets`` (model instances).
+    Returns ``{"columns", "rows", "truncated"}``; raises QueryTimeout.
+    """
+    import duckdb
+
+    # ✅ Opening stores (maybe building them from CSV) counts too
+    deadline = time.monotonic() + getattr(settings, "QUERY_TIMEOUT", 5.0)
+    sql, params, columns = build_sql(spec)
+
+    con = duckdb.connect(":memory:", config={"threads": getattr(settings, "QUERY_THREADS", 2)})
+    try:
+        parts = []
+        for dataset in datasets:
+            for i, frame in enumerate(open_store(dataset).segment_frames()):
+                name = f"d{int(dataset.id)}_{i}"
+                con.register(name, frame)
+                parts.append(f"SELECT {int(dataset.id)} AS dataset_id, * FROM {name}")
+            if time.monotonic() >= deadline:
+                raise QueryTimeout()
+
+        con.execute("CREATE TEMP VIEW data AS " + " UNION ALL ".join(parts))
+
+        # ✅ Only registered in-memory frames can be read from now on
+        con.execute("SET enable_external_access = false")
+        con.execute("SET lock_configuration = true")
+
+        timer = threading.Timer(max(0.0, deadline - time.monotonic()), con.interrupt)
+        timer.start()
+        try:
+            rows = con.execute(sql, params).fetchmany(spec["limit"] + 1)
+        except duckdb.InterruptException:
+            raise QueryTimeout()
+        finally:
+            timer.cancel()
+    finally:
+        con.close()
+
+    return {
+        "columns": columns,
+        "rows": [list(row) for row in rows[:spec["limit"]]],
+        "truncated": len(rows) > spec["limit"],
+    }
@@ -1,152 +1,93 @@
-import os
-import matplotlib.pyplot as plt
 from datetime import datetime
-import numpy as np
+from io import BytesIO
+from types import SimpleNamespace
 
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from django.conf import settings
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.pdfgen import canvas
-from reportlab.platypus import Table, TableStyle
+from .instrumentation import span
+
+# ✅ ReportLab + matplotlib are imported on first render, not at module
+# load: web workers and management commands start without them
 
 
 # ============================================================
 # ✅ Enhanced Chart Generator (Bar + Donut + Line + Average)
 # ============================================================
 
-def generate_charts(summary, dataset_id):
-    chart_dir = "uploads/charts/"
-    os.makedirs(chart_dir, exist_ok=True)
+# ✅ "matplotlib" = raster PNG look, "vector" = native ReportLab drawings
+CHART_BACKENDS = ("matplotlib", "vector")
 
-    labels = list(summary["type_distribution"].keys())
-    values = list(summary["type_distribution"].values())
+# ✅ Placement size of each chart in the PDF: bar, pie, line, stats
+CHART_SIZES = ((460, 230), (380, 230), (460, 230), (460, 230))
 
-    palette = ["#2563eb", "#22c55e", "#f97316", "#ef4444", "#a855f7", "#8b5cf6", "#06b6d4"]
 
-    # ✅ Bar Chart - Enhanced
-    bar_path = f"{chart_dir}bar_{dataset_id}.png"
-    plt.figure(figsize=(8, 4.5))
-    bars = plt.bar(labels, values, color=palette[:len(labels)], edgecolor='black', linewidth=0.7, alpha=0.85)
-    
-    # Add value labels on top of bars
-    for bar in bars:
-        height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2., height,
-                f'{int(height)}',
-                ha='center', va='bottom', fontsize=9, fontweight='bold')
-    
-    plt.title("Equipment Distribution", fontsize=14, fontweight='bold', pad=15)
-    plt.ylabel("Count", fontsize=11, fontweight='bold')
-    plt.xlabel("Equipment Type", fontsize=11, fontweight='bold')
-    plt.xticks(rotation=25, ha='right')
-    plt.grid(axis="y", linestyle="--", alpha=0.4)
-    plt.tight_layout()
-    plt.savefig(bar_path, dpi=150, bbox_inches='tight')
-    plt.close()
-
-    # ✅ Donut Pie Chart - Enhanced
-    pie_path = f"{chart_dir}pie_{dataset_id}.png"
-    plt.figure(figsize=(7, 5))
-    
-    # Create donut with better styling
-    wedges, texts, autotexts = plt.pie(
-        values,
-        labels=labels,
-        autopct="%1.1f%%",
-        startangle=90,
-        colors=palette[:len(labels)],
-        pctdistance=0.82,
-        textprops={'fontsize': 10, 'weight': 'bold'},
-        wedgeprops={'edgecolor': 'white', 'linewidth': 2}
-    )
-
-    # Style percentage text
-    for autotext in autotexts:
-        autotext.set_color('white')
-        autotext.set_fontsize(9)
-
-    centre_circle = plt.Circle((0, 0), 0.60, fc="white", linewidth=2, edgecolor='#cccccc')
-    plt.gca().add_artist(centre_circle)
-
-    plt.title("Equipment Distribution (%)", fontsize=14, fontweight='bold', pad=20)
-    plt.tight_layout()
-    plt.savefig(pie_path, dpi=150, bbox_inches='tight')
-    plt.close()
-
-    # ✅ NEW: Line Chart - Performance Metrics Trend
-    line_path = f"{chart_dir}line_{dataset_id}.png"
-    plt.figure(figsize=(8, 4.5))
-    
-    # Create sample trend data (you can replace with actual data)
-    metrics = ['Flowrate', 'Pressure', 'Temperature']
-    avg_values = [
-        float(str(summary["avg_flowrate"]).split()[0]),
-        float(str(summary["avg_pressure"]).split()[0]),
-        float(str(summary["avg_temperature"]).split()[0])
-    ]
-    
-    # Normalize values for better visualization
-    max_val = max(avg_values)
-    normalized = [v/max_val * 100 for v in avg_values]
-    
-    plt.plot(metrics, normalized, marker='o', linewidth=2.5, markersize=10, 
-             color='#2563eb', markerfacecolor='#ef4444', markeredgewidth=2, markeredgecolor='#2563eb')
-    
-    # Add value labels
-    for i, (metric, val, norm) in enumerate(zip(metrics, avg_values, normalized)):
-        plt.text(i, norm + 3, f'{val:.2f}', ha='center', va='bottom', 
-                fontsize=10, fontweight='bold')
-    
-    plt.title("Average Performance Metrics", fontsize=14, fontweight='bold', pad=15)
-    plt.ylabel("Normalized Value (%)", fontsize=11, fontweight='bold')
-    plt.xlabel("Metric Type", fontsize=11, fontweight='bold')
-    plt.grid(True, linestyle='--', alpha=0.4)
-    plt.ylim(0, 110)
-    plt.tight_layout()
-    plt.savefig(line_path, dpi=150, bbox_inches='tight')
-    plt.close()
-
-    # ✅ NEW: Statistics Summary Chart
-    stats_path = f"{chart_dir}stats_{dataset_id}.png"
-    plt.figure(figsize=(8, 4.5))
-    
-    categories = ['Total\nEquipment', 'Avg\nFlowrate', 'Avg\nPressure', 'Avg\nTemperature']
-    values_display = [
-        summary["total_count"],
-        float(str(summary["avg_flowrate"]).split()[0]),
-        float(str(summary["avg_pressure"]).split()[0]),
-        float(str(summary["avg_temperature"]).split()[0])
-    ]
-    
-    # Create horizontal bar chart
-    bars = plt.barh(categories, values_display, color=['#2563eb', '#22c55e', '#f97316', '#ef4444'], 
-                    edgecolor='black', linewidth=0.7, alpha=0.85)
-    
-    # Add value labels
-    for i, (bar, val) in enumerate(zip(bars, values_display)):
-        plt.text(val + max(values_display) * 0.02, bar.get_y() + bar.get_height()/2, 
-                f'{val:.2f}', va='center', fontsize=10, fontweight='bold')
-    
-    plt.title("Key Performance Indicators", fontsize=14, fontweight='bold', pad=15)
-    plt.xlabel("Value", fontsize=11, fontweight='bold')
-    plt.grid(axis='x', linestyle='--', alpha=0.4)
-    plt.tight_layout()
-    plt.savefig(stats_path, dpi=150, bbox_inches='tight')
-    plt.close()
+def resolve_chart_backend(name=None):
+    name = name or getattr(settings, "REPORT_CHART_BACKEND", "matplotlib")
+    if name not in CHART_BACKENDS:
+        raise ValueError(f"Unknown chart backend: {name}")
+    return name
+
+
+@span("charts")
+def generate_charts(summary, backend="matplotlib"):
+    """
+    Returns the four report charts: bar, pie, line, stats.
+
+    - matplotlib: in-memory PNG buffers from cached figure templates
+    - vector: ReportLab drawings, drawn straight into the canvas
+    """
+    if backend == "vector":
+        from .vector_charts import vector_charts
+        return vector_charts(summary, CHART_SIZES)
 
-    return bar_path, pie_path, line_path, stats_path
+    from .charts import render_charts
+    return render_charts(summary)
+
+
+def draw_chart(c, chart, x, y, width, height):
+    from reportlab.graphics import renderPDF
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.lib.utils import ImageReader
+
+    if isinstance(chart, Drawing):
+        renderPDF.draw(chart, c, x, y)
+    else:
+        c.drawImage(ImageReader(chart), x, y, width=width, height=height)
 
 
 # ============================================================
 # ✅ ENHANCED PDF REPORT GENERATOR
 # ============================================================
 
-def generate_pdf(dataset, pdf_path):
+def report_snapshot(dataset):
+    """
+    Plain picklable copy of what a report needs, for worker processes.
+    """
+    return SimpleNamespace(id=dataset.id, filename=dataset.filename, summary=dataset.summary)
+
+
+def render_pdf(dataset, chart_backend=None):
+    """
+    Builds the report fully in memory and returns the PDF bytes.
+    Nothing touches the disk, so concurrent renders never collide.
+    """
+    buffer = BytesIO()
+    generate_pdf(dataset, buffer, chart_backend=chart_backend)
+    return buffer.getvalue()
+
+
+@span("pdf")
+def generate_pdf(dataset, pdf_path, chart_backend=None):
+    """
+    Draws the report onto ``pdf_path`` (a file path or a binary file object).
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.pdfgen import canvas
+    from reportlab.platypus import Table, TableStyle
+
     summary = dataset.summary
-    dataset_id = dataset.id
+    chart_backend = resolve_chart_backend(chart_backend)
 
     c = canvas.Canvas(pdf_path, pagesize=A4)
     width, height = A4
@@ -462,14 +403,14 @@ def generate_pdf(dataset, pdf_path):
     
     y -= 40
 
-    bar_path, pie_path, line_path, stats_path = generate_charts(summary, dataset_id)
+    bar_chart, pie_chart, line_chart, stats_chart = generate_charts(summary, backend=chart_backend)
 
     # Chart 1: Bar Chart
     c.setFont("Helvetica-Bold", 12)
     c.drawString(left_margin, y, "Equipment Distribution - Bar Chart")
     y -= 10
     
-    c.drawImage(bar_path, left_margin, y - 240, width=460, height=230)
+    draw_chart(c, bar_chart, left_margin, y - 240, 460, 230)
     y -= 260
 
     # Chart 2: Donut Chart
@@ -482,7 +423,7 @@ def generate_pdf(dataset, pdf_path):
     c.drawString(left_margin, y, "Equipment Distribution - Percentage Breakdown")
     y -= 10
     
-    c.drawImage(pie_path, left_margin + 50, y - 240, width=380, height=230)
+    draw_chart(c, pie_chart, left_margin + 50, y - 240, 380, 230)
     y -= 260
 
     # Chart 3: Line Chart (New Page)
@@ -494,7 +435,7 @@ def generate_pdf(dataset, pdf_path):
     c.drawString(left_margin, y, "Performance Metrics - Trend Analysis")
     y -= 10
     
-    c.drawImage(line_path, left_margin, y - 240, width=460, height=230)
+    draw_chart(c, line_chart, left_margin, y - 240, 460, 230)
     y -= 260
 
     # Chart 4: KPI Stats
@@ -507,7 +448,7 @@ def generate_pdf(dataset, pdf_path):
     c.drawString(left_margin, y, "Key Performance Indicators - Summary")
     y -= 10
     
-    c.drawImage(stats_path, left_margin, y - 240, width=460, height=230)
+    draw_chart(c, stats_chart, left_margin, y - 240, 460, 230)
 
     # ✅ Save
     c.save()
\ No newline at end of file
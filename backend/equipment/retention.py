@@ -0,0 +1,111 @@
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DatasetUpload, RetentionPolicy
+from . import cache
+
+
+# =====================================================
+# ✅ DATA HANDLING REQUIREMENT
+# Retention policy per user (RetentionPolicy) or global
+# (RETENTION_* settings): max datasets, max age, max bytes.
+# Enforced by `manage.py enforce_retention` (cron / timer),
+# never inside an upload request.
+# Deleted rows take their files along (storage.py)
+# =====================================================
+
+Limits = namedtuple("Limits", ["max_datasets", "max_age_days", "max_total_bytes"])
+
+
+def global_limits():
+    return Limits(
+        getattr(settings, "RETENTION_MAX_DATASETS", 0),
+        getattr(settings, "RETENTION_MAX_AGE_DAYS", 0),
+        getattr(settings, "RETENTION_MAX_TOTAL_BYTES", 0),
+    )
+
+
+def limits_for(policy):
+    """A user's own limits where set, the global ones otherwise (0 = unlimited)."""
+    defaults = global_limits()
+    if policy is None:
+        return defaults
+
+    return Limits(*(
+        default if own is None else own
+        for own, default in zip(
+            (policy.max_datasets, policy.max_age_days, policy.max_total_bytes), defaults
+        )
+    ))
+
+
+def expired_ids(user, limits, now=None):
+    """
+    Ids of the user's datasets that fall outside ``limits``. Uploads
+    still being analyzed (empty summary) are neither counted nor
+    picked; interrupted ones are left to collect_garbage.
+    """
+    uploads = DatasetUpload.objects.filter(user=user).exclude(summary={})
+    expired = set()
+
+    if limits.max_age_days:
+        cutoff = (now or timezone.now()) - timedelta(days=limits.max_age_days)
+        expired.update(uploads.filter(uploaded_at__lt=cutoff).values_list("id", flat=True))
+
+    newest_first = uploads.order_by("-uploaded_at", "-id")
+
+    if limits.max_datasets:
+        expired.update(newest_first[limits.max_datasets:].values_list("id", flat=True))
+
+    if limits.max_total_bytes:
+        # ✅ Newest datasets fill the quota; everything after it goes
+        total = 0
+        for dataset_id, size in newest_first.values_list("id", "file_size").iterator():
+            total += size
+            if total > limits.max_total_bytes:
+                expired.add(dataset_id)
+
+    return expired
+
+
+def delete_uploads(user, dataset_ids):
+    """
+    Deletes datasets; their files, columnar stores and legacy reports /
+    charts are removed after commit (see storage.py).
+    """
+    with transaction.atomic():
+        old_ids = list(
+            DatasetUpload.objects.filter(user=user, id__in=dataset_ids).values_list("id", flat=True)
+        )
+        DatasetUpload.objects.filter(id__in=old_ids).delete()
+
+        # ✅ Deleted datasets must drop out of cached history / summaries
+        if old_ids:
+            cache.invalidate(user.id, old_ids)
+
+    return old_ids
+
+
+def enforce_retention(users=None, dry_run=False):
+    """
+    Applies every user's policy. Returns ``{username: [deleted ids]}``
+    for the users that had something to delete.
+    """
+    if users is None:
+        users = User.objects.filter(datasetupload__isnull=False).distinct()
+
+    policies = {p.user_id: p for p in RetentionPolicy.objects.filter(user__in=users)}
+
+    deleted = {}
+    for user in users:
+        ids = expired_ids(user, limits_for(policies.get(user.id)))
+        if not ids:
+            continue
+        deleted[user.username] = sorted(ids) if dry_run else delete_uploads(user, ids)
+
+    return deleted
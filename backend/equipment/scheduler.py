@@ -0,0 +1,338 @@
+import functools
+import itertools
+from contextlib import contextmanager
+import math
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+
+from django.conf import settings
+from rest_framework.exceptions import Throttled
+
+from .analytics import analyze_and_compress, analyze_dataset_parallel, should_split
+from .compression import compress_file
+from .instrumentation import (
+    JOB_DURATION, JOB_WAIT, JOBS_REJECTED, QUEUE_DEPTH, STAGE_DURATION, WORKER_UTILIZATION,
+    WORKERS_BUSY, end_request, start_request,
+)
+from .workers import get_process_pool, worker_count
+
+
+# ============================================================
+# ✅ Fair-Share Job Scheduler (in front of the process pool)
+# Analysis and report jobs queue here instead of in the pool, and
+# only one job per worker is handed to the pool at a time. A free
+# worker picks:
+#   1. the user with the fewest jobs running, then the one served
+#      longest ago (fair share: users take turns)
+#   2. that user's smallest job (bytes), aged by its waiting time
+#      (SCHEDULER_AGING_BYTES_PER_SECOND: big files are not starved)
+# Requests reserve their queue slots before they do any work
+# (admit() -> Reservation); reserved slots count as queued, so
+# concurrent requests can't overfill the queue between admitting and
+# submitting. A full queue answers 429 with a Retry-After estimated
+# from recent job durations. Work that has to run in the request
+# thread (streamed upload batches) queues the same way and holds a
+# worker slot while it runs (Reservation.hold). One scheduler per
+# server process, no broker.
+# ============================================================
+
+KINDS = ("analysis", "report")
+
+
+class Saturated(Throttled):
+    default_detail = "Server is busy, retry later."
+
+
+class Job:
+    __slots__ = ("fn", "args", "user", "cost", "kind", "seq", "queued_at", "future")
+
+    def __init__(self, fn, args, user, cost, kind, seq):
+        self.fn = fn
+        self.args = args
+        self.user = user
+        self.cost = cost
+        self.kind = kind
+        self.seq = seq
+        self.queued_at = time.monotonic()
+        self.future = Future()
+
+
+def run_job(fn, *args):
+    """
+    Pool side of a job: returns ``(result, pid, spans)``. Spans go back
+    to the web process (the worker's own metrics are never scraped).
+    """
+    timings, token = start_request()
+    try:
+        return fn(*args), os.getpid(), timings.stages
+    finally:
+        end_request(token)
+
+
+class Reservation:
+    """
+    Queue slots admitted for one request; ``submit`` fills them and
+    unused ones are freed on exit (use as a context manager). Jobs
+    submitted past the last slot are follow-ups of admitted work (the
+    byte ranges of a split upload, its compress step, the batches of a
+    streamed one) and are queued without another check.
+    """
+
+    def __init__(self, scheduler, user, slots, wait):
+        self.scheduler = scheduler
+        self.user = user
+        self.slots = slots
+        self.wait = wait
+
+    def extend(self, jobs):
+        """Reserves up to ``jobs`` more slots; returns how many were granted."""
+        granted, self.wait = self.scheduler._reserve(self.user, jobs)
+        self.slots += granted
+        return granted
+
+    def submit(self, fn, *args, cost=0, kind="analysis"):
+        """Queues ``fn(*args)`` in one of the reserved slots; returns a Future."""
+        reserved = self.slots > 0
+        self.slots -= reserved
+        job = Job(fn, args, self.user, cost, kind, next(self.scheduler.sequence))
+        return self.scheduler._enqueue(job, reserved)
+
+    @contextmanager
+    def hold(self, cost=0, kind="analysis"):
+        """
+        Runs the ``with`` block in the calling thread as one job: waits
+        for its turn like a submitted job, then keeps a worker slot
+        until the block exits.
+        """
+        job = Job(None, (), self.user, cost, kind, next(self.scheduler.sequence))
+        reserved = self.slots > 0
+        self.slots -= reserved
+        started = self.scheduler._enqueue(job, reserved).result()
+        try:
+            yield
+        finally:
+            self.scheduler._completed(job, started)
+            self.scheduler._dispatch()
+
+    def release(self):
+        self.scheduler._unreserve(self.user, self.slots)
+        self.slots = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class FairScheduler:
+
+    def __init__(self, executor, capacity, max_queue, max_queue_per_user, aging):
+        self.executor = executor
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.aging = aging
+
+        self.lock = threading.Lock()
+        self.pending = []
+        self.reserved = {}
+        self.running = {}
+        self.last_served = {}
+        self.busy = 0
+        self.sequence = itertools.count()
+        self.avg_duration = 1.0
+
+    # ------------------------------------------------------------
+    # ✅ Admission (backpressure)
+    # ------------------------------------------------------------
+
+    def retry_after(self, depth):
+        """Seconds until roughly ``depth`` queued jobs have drained."""
+        estimate = self.avg_duration * (depth + 1) / self.capacity
+        return max(1, min(settings.SCHEDULER_MAX_RETRY_AFTER, math.ceil(estimate)))
+
+    def _reserve(self, user, jobs):
+        """Reserves up to ``jobs`` slots; returns ``(granted, retry_after)``."""
+        with self.lock:
+            depth = len(self.pending) + sum(self.reserved.values())
+            queued = sum(job.user == user for job in self.pending) + self.reserved.get(user, 0)
+            room = self.max_queue - depth
+            user_room = self.max_queue_per_user - queued
+
+            granted = max(0, min(jobs, room, user_room))
+            if granted:
+                self.reserved[user] = self.reserved.get(user, 0) + granted
+            wait = self.retry_after(depth)
+
+        if granted < jobs:
+            reason = "queue_full" if room <= user_room else "user_queue_full"
+            JOBS_REJECTED.inc(jobs - granted, reason=reason)
+        return granted, wait
+
+    def _unreserve(self, user, slots):
+        if not slots:
+            return
+        with self.lock:
+            self.reserved[user] -= slots
+            if not self.reserved[user]:
+                del self.reserved[user]
+
+    def admit(self, user, jobs=1):
+        """
+        Reserves up to ``jobs`` queue slots for ``user`` (at least one);
+        raises Saturated (429) when the queue or the user's share is full.
+        """
+        granted, wait = self._reserve(user, jobs)
+        if not granted:
+            raise Saturated(wait=wait)
+        return Reservation(self, user, granted, wait)
+
+    # ------------------------------------------------------------
+    # ✅ Queueing + dispatch
+    # ------------------------------------------------------------
+
+    def submit(self, fn, *args, user=None, cost=0, kind="analysis"):
+        """Admits and queues one job; returns a Future (Saturated when full)."""
+        with self.admit(user) as reservation:
+            return reservation.submit(fn, *args, cost=cost, kind=kind)
+
+    def _enqueue(self, job, reserved):
+        with self.lock:
+            if reserved:
+                self.reserved[job.user] -= 1
+                if not self.reserved[job.user]:
+                    del self.reserved[job.user]
+            self.pending.append(job)
+            self._update_gauges()
+        self._dispatch()
+        return job.future
+
+    def _next_job(self):
+        """Fair share across users, smallest (aged) job within a user."""
+        now = time.monotonic()
+        user = min(
+            {job.user for job in self.pending},
+            key=lambda u: (self.running.get(u, 0), self.last_served.get(u, -1)),
+        )
+        job = min(
+            (job for job in self.pending if job.user == user),
+            key=lambda j: (j.cost - (now - j.queued_at) * self.aging, j.seq),
+        )
+        self.last_served[user] = next(self.sequence)
+        return job, now
+
+    def _dispatch(self):
+        while True:
+            with self.lock:
+                if self.busy >= self.capacity or not self.pending:
+                    return
+                job, now = self._next_job()
+                self.pending.remove(job)
+                self.busy += 1
+                self.running[job.user] = self.running.get(job.user, 0) + 1
+                self._update_gauges()
+
+            JOB_WAIT.observe(now - job.queued_at, kind=job.kind)
+
+            if not job.future.set_running_or_notify_cancel():
+                self._release(job)
+                continue
+
+            # ✅ Held slot (Reservation.hold): the waiting thread runs it
+            if job.fn is None:
+                job.future.set_result(time.monotonic())
+                continue
+
+            try:
+                inner = self.executor.submit(run_job, job.fn, *job.args)
+            except Exception as e:
+                self._release(job)
+                job.future.set_exception(e)
+                continue
+
+            started = time.monotonic()
+            inner.add_done_callback(lambda inner, job=job, started=started: self._finished(job, started, inner))
+
+    def _release(self, job, duration=None):
+        with self.lock:
+            self.busy -= 1
+            self.running[job.user] -= 1
+            if not self.running[job.user]:
+                del self.running[job.user]
+                if not any(j.user == job.user for j in self.pending):
+                    self.last_served.pop(job.user, None)
+            if duration is not None:
+                # ✅ Moving average of job durations (Retry-After estimate)
+                self.avg_duration = 0.8 * self.avg_duration + 0.2 * duration
+            self._update_gauges()
+
+    def _completed(self, job, started):
+        duration = time.monotonic() - started
+        JOB_DURATION.observe(duration, kind=job.kind)
+        self._release(job, duration)
+
+    def _finished(self, job, started, inner):
+        self._completed(job, started)
+
+        if inner.cancelled():
+            job.future.set_exception(CancelledError())
+        elif inner.exception() is not None:
+            job.future.set_exception(inner.exception())
+        else:
+            result, pid, spans = inner.result()
+            if pid != os.getpid():
+                for name, duration in spans:
+                    STAGE_DURATION.observe(duration, stage=name)
+            job.future.set_result(result)
+
+        self._dispatch()
+
+    def _update_gauges(self):
+        depths = {}
+        for job in self.pending:
+            depths[job.kind] = depths.get(job.kind, 0) + 1
+        for kind in KINDS:
+            QUEUE_DEPTH.set(depths.get(kind, 0), kind=kind)
+        WORKERS_BUSY.set(self.busy)
+        WORKER_UTILIZATION.set(round(self.busy / self.capacity, 3))
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Returns the per-process scheduler, creating it on first use."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = FairScheduler(
+                    get_process_pool(),
+                    capacity=worker_count(),
+                    max_queue=settings.SCHEDULER_MAX_QUEUE,
+                    max_queue_per_user=settings.SCHEDULER_MAX_QUEUE_PER_USER,
+                    aging=settings.SCHEDULER_AGING_BYTES_PER_SECOND,
+                )
+    return _scheduler
+
+
+def analysis_submitter(reservation, file_path):
+    """``submit(fn, *args)`` for the jobs of one upload (cost = its size)."""
+    return functools.partial(reservation.submit, cost=os.path.getsize(file_path))
+
+
+def analyze_scheduled(reservation, file_path, store=None):
+    """
+    Scheduled analyze_upload + compress_file (blocks until done):
+    one job, or one job per byte range for big files.
+    """
+    submit = analysis_submitter(reservation, file_path)
+    if should_split(file_path):
+        result = analyze_dataset_parallel(file_path, store=store, submit=submit)
+        submit(compress_file, file_path).result()
+        return result
+    return submit(analyze_and_compress, file_path, store).result()
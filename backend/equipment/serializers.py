@@ -1,7 +1,17 @@
 from rest_framework import serializers
-from .models import DatasetUpload
+from .models import STAT_FIELDS, DatasetUpload
 
 class DatasetUploadSerializer(serializers.ModelSerializer):
+    # ✅ Stored files may be compressed: no media URL, use the download
+    # endpoint (/api/datasets/<id>/download/) instead
     class Meta:
         model = DatasetUpload
-        fields = "__all__"
+        exclude = ["aggregates", "file"]
+
+
+class DatasetSearchSerializer(serializers.ModelSerializer):
+    """Search results: the indexed stat columns, without the summary JSON."""
+
+    class Meta:
+        model = DatasetUpload
+        fields = ["id", "filename", "uploaded_at", "version"] + STAT_FIELDS
@@ -0,0 +1,52 @@
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token
+from .instrumentation import time_query
+from .models import DatasetUpload
+from .storage import schedule_removal
+
+
+# ============================================================
+# ✅ Token Cache Invalidation
+# Logout / rotation delete the Token row; user changes (password,
+# deactivation) must not keep serving a cached user object
+# ============================================================
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created, **kwargs):
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list("key", flat=True):
+        invalidate_token(key)
+
+
+# ============================================================
+# ✅ Dataset Artifacts
+# Any way a DatasetUpload row is deleted (retention, admin, user
+# cascade) removes its files after the transaction commits
+# ============================================================
+
+@receiver(post_delete, sender=DatasetUpload)
+def remove_dataset_artifacts(sender, instance, **kwargs):
+    schedule_removal(instance)
+
+
+# ============================================================
+# ✅ ORM Query Timing
+# Every connection, in any thread (async views run the ORM in worker
+# threads), times its queries into the current request's timings
+# ============================================================
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
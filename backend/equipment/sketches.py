@@ -0,0 +1,194 @@
+import base64
+import math
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+# ============================================================
+# ✅ Mergeable Sketches (quantiles + distinct counts)
+# Stored next to the running aggregates, so percentiles and distinct
+# equipment counts over many datasets come from merging a few KB of
+# JSON instead of rescanning the rows:
+#   {"digests":  {Type: {column: t-digest}},
+#    "distinct": HyperLogLog of the equipment names (or None)}
+# Merging the sketches of two row sets gives the sketch of their
+# union, within the sketch error.
+# ============================================================
+
+# ✅ t-digest: ~COMPRESSION / 2 centroids, finer at the tails
+# (about 1% rank error in the middle, far less near p1 / p99)
+DIGEST_COMPRESSION = 100
+
+# ✅ HyperLogLog: 2 ** 12 registers, ~1.6% standard error
+HLL_PRECISION = 12
+
+
+# ------------------------------------------------------------
+# ✅ t-digest (merging variant, vectorized with numpy)
+# ------------------------------------------------------------
+
+def _compress(means, weights, vmin, vmax, presorted=False):
+    """Groups sorted centroids so each group spans at most one unit of k(q)."""
+    if not presorted:
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+    total = weights.sum()
+    q = (np.cumsum(weights) - weights / 2) / total
+    k = np.floor(DIGEST_COMPRESSION / (2 * math.pi) * np.arcsin(2 * q - 1))
+
+    # ✅ k grows with q: groups are runs of equal floor(k)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(k)) + 1))
+    group_weights = np.add.reduceat(weights, starts)
+    group_means = np.add.reduceat(means * weights, starts) / group_weights
+
+    return {
+        "min": float(vmin),
+        "max": float(vmax),
+        # ✅ 7 significant digits: far below the sketch error, half the JSON
+        "means": [float(f"{m:.7g}") for m in group_means],
+        "weights": [int(w) for w in np.rint(group_weights)],
+    }
+
+
+def digest_from_values(values):
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    if not len(values):
+        return None
+    return _compress(values, np.ones(len(values)), values[0], values[-1], presorted=True)
+
+
+def merge_digest_list(digests):
+    """Merges any number of digests with a single compression."""
+    digests = [d for d in digests if d]
+    if len(digests) <= 1:
+        return digests[0] if digests else None
+    return _compress(
+        np.array([m for d in digests for m in d["means"]], dtype=np.float64),
+        np.array([w for d in digests for w in d["weights"]], dtype=np.float64),
+        min(d["min"] for d in digests),
+        max(d["max"] for d in digests),
+    )
+
+
+def merge_digests(a, b):
+    return merge_digest_list([a, b])
+
+
+def digest_count(digest):
+    return sum(digest["weights"]) if digest else 0
+
+
+def quantile(digest, q):
+    """Estimated ``q`` quantile (0..1); exact at 0 and 1."""
+    if not digest:
+        return None
+    weights = np.array(digest["weights"], dtype=np.float64)
+    centers = np.cumsum(weights) - weights / 2
+    xs = np.concatenate(([0.0], centers, [weights.sum()]))
+    ys = np.concatenate(([digest["min"]], digest["means"], [digest["max"]]))
+    return float(np.interp(q * weights.sum(), xs, ys))
+
+
+# ------------------------------------------------------------
+# ✅ HyperLogLog
+# ------------------------------------------------------------
+
+def _registers(hll):
+    return np.frombuffer(zlib.decompress(base64.b64decode(hll["registers"])), dtype=np.uint8)
+
+
+def _encode(registers):
+    return {
+        "p": HLL_PRECISION,
+        "registers": base64.b64encode(zlib.compress(registers.tobytes())).decode(),
+    }
+
+
+def hll_from_values(values):
+    """HLL of the distinct non-null values (as text) in ``values``."""
+    values = pd.Series(values).dropna().astype(str)
+    registers = np.zeros(1 << HLL_PRECISION, dtype=np.uint8)
+
+    # ✅ Stable 64-bit hashes (same in every process), vectorized
+    # (categorize=False: names are mostly unique, deduplicating costs more)
+    hashes = pd.util.hash_pandas_object(values, index=False, categorize=False).to_numpy(dtype=np.uint64)
+    index = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.intp)
+
+    # ✅ rank = leading zeros + 1 over the next 32 bits (frexp gives the bit length)
+    rest = (hashes << np.uint64(HLL_PRECISION)) >> np.uint64(32)
+    _, bits = np.frexp(rest.astype(np.float64))
+    ranks = np.where(rest == 0, 33, 33 - bits).astype(np.uint8)
+
+    np.maximum.at(registers, index, ranks)
+    return _encode(registers)
+
+
+def merge_hll_list(sketches):
+    sketches = [h for h in sketches if h]
+    if len(sketches) <= 1:
+        return sketches[0] if sketches else None
+    if len({h["p"] for h in sketches}) > 1:
+        raise ValueError("HyperLogLog precision mismatch")
+    return _encode(np.maximum.reduce([_registers(h) for h in sketches]))
+
+
+def merge_hll(a, b):
+    return merge_hll_list([a, b])
+
+
+def distinct_count(hll):
+    """Estimated number of distinct values."""
+    if hll is None:
+        return None
+    registers = _registers(hll).astype(np.float64)
+    m = len(registers)
+
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.exp2(-registers))
+
+    # ✅ Small cardinalities: linear counting is more accurate
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * math.log(m / zeros)
+    return int(round(estimate))
+
+
+# ------------------------------------------------------------
+# ✅ Dataset sketches
+# ------------------------------------------------------------
+
+def build_sketches(df, columns, name_column):
+    """Sketches of a cleaned DataFrame (per-type digests, name HLL)."""
+    digests = {}
+    for eq_type, group in df.groupby("Type", sort=False, observed=True):
+        digests[str(eq_type)] = {col: digest_from_values(group[col].to_numpy()) for col in columns}
+
+    return {
+        "digests": digests,
+        "distinct": hll_from_values(df[name_column]) if name_column in df.columns else None,
+    }
+
+
+def combine_sketches(sketches):
+    """Merges any number of dataset sketches (one compression per digest)."""
+    parts, names = {}, []
+    for sketch in sketches:
+        for eq_type, cols in sketch["digests"].items():
+            for col, digest in cols.items():
+                parts.setdefault(eq_type, {}).setdefault(col, []).append(digest)
+        names.append(sketch["distinct"])
+
+    return {
+        "digests": {
+            eq_type: {col: merge_digest_list(digests) for col, digests in cols.items()}
+            for eq_type, cols in parts.items()
+        },
+        "distinct": merge_hll_list(names),
+    }
+
+
+def merge_sketches(a, b):
+    return combine_sketches([a, b])
@@ -0,0 +1,282 @@
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .columnar import store_path
+from .compression import is_compressed, resolve_codec, write_compressed
+from .models import DatasetUpload
+from .workers import _init_worker, get_process_pool
+
+
+# ============================================================
+# ✅ Storage Manager
+# Every file a DatasetUpload owns under MEDIA_ROOT:
+#   datasets/<name>.csv          uploaded CSV
+#   columnar/<stem>/ (+.building) memory-mapped columnar store
+#   report_<id>.pdf, charts/<kind>_<id>.png   written by older versions
+# Artifacts are removed after the row's DELETE commits (post_delete
+# signal -> on_commit): a rolled back delete keeps its files, and a
+# crash in between only leaves orphans for collect_garbage().
+# ============================================================
+
+LEGACY_CHART_KINDS = ("bar", "pie", "line", "stats")
+
+
+def media_path(*parts):
+    return os.path.join(settings.MEDIA_ROOT, *parts)
+
+
+def file_artifacts(file_name):
+    """The stored CSV and its columnar store (storage name ``datasets/...``)."""
+    if not file_name:
+        return []
+    store = store_path(file_name)
+    return [media_path(file_name), store, store + ".building"]
+
+
+def artifact_paths(dataset):
+    """Absolute paths of everything stored for ``dataset``."""
+    return file_artifacts(dataset.file.name) + [
+        media_path(f"report_{dataset.id}.pdf"),
+        *(media_path("charts", f"{kind}_{dataset.id}.png") for kind in LEGACY_CHART_KINDS),
+    ]
+
+
+def remove_paths(paths):
+    """Removes files / directories; already missing ones are fine."""
+    removed = 0
+    for path in paths:
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def schedule_removal(dataset):
+    """Removes the dataset's artifacts once the current transaction commits."""
+    paths = artifact_paths(dataset)
+    transaction.on_commit(lambda: remove_paths(paths))
+
+
+# ============================================================
+# ✅ Garbage Collection (disk <-> DB reconciliation)
+# Scans MEDIA_ROOT in batches of ``batch_size`` entries and checks
+# each batch with one query. Entries younger than ``min_age`` seconds
+# are skipped: uploads in flight write their file before the row.
+# ============================================================
+
+def _old_entries(directory, min_age, now):
+    """Yields ``os.DirEntry`` objects older than ``min_age`` (lazy scan)."""
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if now - entry.stat(follow_symlinks=False).st_mtime >= min_age:
+                        yield entry
+                except FileNotFoundError:
+                    continue
+    except FileNotFoundError:
+        return
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _orphan_dataset_files(batch):
+    names = {f"datasets/{entry.name}": entry for entry in batch}
+    known = set(DatasetUpload.objects.filter(file__in=list(names)).values_list("file", flat=True))
+    return [entry.path for name, entry in names.items() if name not in known]
+
+
+def _orphan_stores(batch):
+    stems = {}
+    for entry in batch:
+        stem = entry.name[:-len(".building")] if entry.name.endswith(".building") else entry.name
+        stems.setdefault(stem, []).append(entry)
+
+    # ✅ A store belongs to datasets/<stem>.<any extension>
+    # (OR chains stay short: SQLite limits expression depth)
+    known = set()
+    for chunk in _batches(stems, 100):
+        match = Q()
+        for stem in chunk:
+            match |= Q(file=f"datasets/{stem}") | Q(file__startswith=f"datasets/{stem}.")
+        for name in DatasetUpload.objects.filter(match).values_list("file", flat=True):
+            known.add(os.path.splitext(os.path.basename(name))[0])
+
+    return [
+        entry.path
+        for stem, entries in stems.items()
+        for entry in entries
+        if stem not in known or entry.name.endswith(".building")
+    ]
+
+
+def _legacy_id(name):
+    """Dataset id of report_<id>.pdf / <kind>_<id>.png, else None."""
+    stem, _ = os.path.splitext(name)
+    prefix, _, value = stem.rpartition("_")
+    if prefix in ("report",) + LEGACY_CHART_KINDS and value.isdigit():
+        return int(value)
+    return None
+
+
+def _orphan_legacy(batch):
+    ids = {entry.path: _legacy_id(entry.name) for entry in batch}
+    known = set(
+        DatasetUpload.objects.filter(id__in={i for i in ids.values() if i is not None})
+        .values_list("id", flat=True)
+    )
+    return [path for path, dataset_id in ids.items() if dataset_id is not None and dataset_id not in known]
+
+
+def collect_garbage(batch_size=500, min_age=3600, dry_run=False, delete_failed=True, log=None):
+    """
+    Removes artifacts no DatasetUpload owns, plus rows whose analysis
+    never finished (empty summary). Returns counters per category.
+    """
+    now = time.time()
+    log = log or (lambda message: None)
+    stats = {"dataset_files": 0, "columnar_stores": 0, "legacy_files": 0, "failed_rows": 0, "missing_files": 0}
+
+    scans = [
+        ("dataset_files", media_path("datasets"), _orphan_dataset_files, lambda e: e.is_file()),
+        ("columnar_stores", media_path("columnar"), _orphan_stores, lambda e: e.is_dir()),
+        ("legacy_files", media_path(), _orphan_legacy, lambda e: e.is_file()),
+        ("legacy_files", media_path("charts"), _orphan_legacy, lambda e: e.is_file()),
+    ]
+
+    for category, directory, find_orphans, wanted in scans:
+        entries = (e for e in _old_entries(directory, min_age, now) if wanted(e))
+        for batch in _batches(entries, batch_size):
+            orphans = find_orphans(batch)
+            for path in orphans:
+                log(f"{'would remove' if dry_run else 'remove'} {path}")
+            stats[category] += len(orphans) if dry_run else remove_paths(orphans)
+
+    # ✅ Rows of failed / interrupted analyses (their files go via the signal)
+    if delete_failed:
+        cutoff = datetime.fromtimestamp(now - min_age, tz=timezone.utc)
+        failed = list(
+            DatasetUpload.objects.filter(summary={}, uploaded_at__lt=cutoff).values_list("id", flat=True)
+        )
+        for batch in _batches(failed, batch_size):
+            log(f"{'would delete' if dry_run else 'delete'} unfinished datasets {batch}")
+            if not dry_run:
+                with transaction.atomic():
+                    DatasetUpload.objects.filter(id__in=batch).delete()
+            stats["failed_rows"] += len(batch)
+
+    # ✅ Rows whose CSV is gone: reported, not deleted
+    for batch in _batches(DatasetUpload.objects.values_list("id", "file").iterator(), batch_size):
+        for dataset_id, name in batch:
+            if not name or not os.path.isfile(media_path(name)):
+                log(f"dataset {dataset_id}: file missing ({name or 'no file'})")
+                stats["missing_files"] += 1
+
+    return stats
+
+
+# ============================================================
+# ✅ At-Rest Compression of Existing Uploads
+# Workers write compressed copies next to the originals; each copy
+# replaces its original under the dataset's row lock (the same lock
+# appends take). A file that grew meanwhile keeps its plain form and
+# is picked up by the next run.
+# ============================================================
+
+def _compressed_copy(path, codec):
+    """Pool job: returns the plain size the copy was made from."""
+    before = os.path.getsize(path)
+    write_compressed(path, path + ".compressing", codec)
+    return before
+
+
+def _swap_in(dataset_id, path, before):
+    """Replaces ``path`` by its compressed copy; returns the new size or None."""
+    tmp = path + ".compressing"
+    with transaction.atomic():
+        # ✅ Write lock first: appends to this file wait for the swap
+        locked = DatasetUpload.objects.filter(id=dataset_id).select_for_write().exists()
+        if not locked or not os.path.isfile(path) or os.path.getsize(path) != before:
+            remove_paths([tmp])
+            return None
+        os.replace(tmp, path)
+        after = os.path.getsize(path)
+        DatasetUpload.objects.filter(id=dataset_id).update(file_size=after)
+    return after
+
+
+def compress_existing(codec=None, workers=None, batch_size=100, dry_run=False, log=None):
+    """
+    Compresses every plain dataset CSV with ``codec`` across a process
+    pool. Returns counters (files, skipped, bytes before / after).
+    """
+    codec = resolve_codec(codec)
+    if codec == "none":
+        raise ValueError("Choose a codec to compress with")
+
+    log = log or (lambda message: None)
+    stats = {"files": 0, "skipped": 0, "bytes_before": 0, "bytes_after": 0}
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers else get_process_pool()
+    try:
+        rows = DatasetUpload.objects.exclude(file="").values_list("id", "file").iterator()
+        for batch in _batches(rows, batch_size):
+            todo = [
+                (dataset_id, media_path(name))
+                for dataset_id, name in batch
+                if os.path.isfile(media_path(name)) and not is_compressed(media_path(name))
+            ]
+
+            if dry_run:
+                for dataset_id, path in todo:
+                    log(f"would compress dataset {dataset_id}: {path}")
+                    stats["files"] += 1
+                    stats["bytes_before"] += os.path.getsize(path)
+                continue
+
+            futures = [(dataset_id, path, pool.submit(_compressed_copy, path, codec)) for dataset_id, path in todo]
+            for dataset_id, path, future in futures:
+                try:
+                    before = future.result()
+                except OSError as e:
+                    remove_paths([path + ".compressing"])
+                    log(f"dataset {dataset_id}: {e}")
+                    stats["skipped"] += 1
+                    continue
+
+                after = _swap_in(dataset_id, path, before)
+                if after is None:
+                    log(f"dataset {dataset_id}: changed or deleted while compressing, skipped")
+                    stats["skipped"] += 1
+                    continue
+
+                log(f"compressed dataset {dataset_id}: {before} -> {after} bytes")
+                stats["files"] += 1
+                stats["bytes_before"] += before
+                stats["bytes_after"] += after
+    finally:
+        if workers:
+            pool.shutdown()
+
+    return stats
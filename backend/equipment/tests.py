@@ -1,3 +1,1739 @@
-from django.test import TestCase
+import math
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .analytics import (
+    NUMERIC_COLUMNS, analyze_dataset, polars_available, resolve_analytics_backend,
+)
+from .benchmarks import synthetic_frame
+from .compression import zstd_available
+from .query import duckdb_available
+
+
+# ============================================================
+# ✅ Analytics Backends (pandas vs Polars)
+# ============================================================
+
+MESSY_CSV = (
+    "Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+    "Pump-1,Pump,120.5,5.2,110\n"
+    "Valve-1,Valve,abc,4.1,95\n"
+    "Pump-2,Pump, 98.0 ,6.3,120.5\n"
+    "Reactor-1,Reactor,NA,7.0,300\n"
+    "Valve-2,Valve,60,,80\n"
+    "Mixer-1,,75.5,3.3,60\n"
+    "Valve-3,Valve,61.5,2.2,nan\n"
+    "Reactor-2,Reactor,150,8.8,310\n"
+)
+
+
+def assert_close_aggregates(test, expected, actual):
+    test.assertEqual(expected["count"], actual["count"])
+    test.assertEqual(expected["type_counts"], actual["type_counts"])
+    test.assertEqual(set(expected["type_stats"]), set(actual["type_stats"]))
+
+    for col in NUMERIC_COLUMNS:
+        test.assertTrue(math.isclose(expected["sums"][col], actual["sums"][col], rel_tol=1e-9))
+
+    for eq_type, stats in expected["type_stats"].items():
+        other = actual["type_stats"][eq_type]
+        test.assertEqual(stats["count"], other["count"])
+        test.assertEqual(stats["min"], other["min"])
+        test.assertEqual(stats["max"], other["max"])
+        for col in NUMERIC_COLUMNS:
+            test.assertTrue(math.isclose(stats["sums"][col], other["sums"][col], rel_tol=1e-9))
+
+
+def missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class ApiClientMixin:
+    """A logged-in APIClient (``self.client``) for ``self.user``."""
+
+    def setUp(self):
+        super().setUp()
+        # ✅ Fresh shared (file) cache per test: test rows reuse ids
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        caches = override_settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": cache_dir,
+        }})
+        caches.enable()
+        self.addCleanup(caches.disable)
+
+        self.user = User.objects.create_user("alice", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class TempFilesMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+
+class AnalyticsBackendTests(TempFilesMixin, SimpleTestCase):
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            resolve_analytics_backend("spark")
+
+    @override_settings(ANALYTICS_BACKEND="polars")
+    def test_falls_back_to_pandas_without_polars(self):
+        with mock.patch("equipment.analytics.importlib.util.find_spec", return_value=None):
+            self.assertEqual(resolve_analytics_backend(), "pandas")
+
+            path = self.write("data.csv", MESSY_CSV)
+            self.assertEqual(analyze_dataset(path), analyze_dataset(path, backend="pandas"))
+
+
+@unittest.skipUnless(polars_available(), "polars is not installed")
+class PolarsEquivalenceTests(TempFilesMixin, SimpleTestCase):
+
+    def compare(self, path):
+        expected, expected_aggregates = analyze_dataset(path, backend="pandas")
+        actual, actual_aggregates = analyze_dataset(path, backend="polars")
+
+        assert_close_aggregates(self, expected_aggregates, actual_aggregates)
+
+        for key in ("total_count", "avg_flowrate", "avg_pressure", "avg_temperature",
+                    "type_distribution", "preview_columns",
+                    "flowrate_list", "pressure_list", "temperature_list"):
+            self.assertEqual(expected[key], actual[key], key)
+
+        self.assertEqual(len(expected["data_preview"]), len(actual["data_preview"]))
+        for want, got in zip(expected["data_preview"], actual["data_preview"]):
+            for col in NUMERIC_COLUMNS + ["Type", "Equipment Name"]:
+                # ✅ pandas NaN == Polars null for empty text cells
+                if missing(want[col]):
+                    self.assertTrue(missing(got[col]), col)
+                else:
+                    self.assertEqual(want[col], got[col], col)
+
+    def test_synthetic_dataset(self):
+        path = os.path.join(self.tmp, "synthetic.csv")
+        synthetic_frame(20_000).to_csv(path, index=False)
+        self.compare(path)
+
+    def test_messy_values_are_cleaned_the_same_way(self):
+        self.compare(self.write("messy.csv", MESSY_CSV))
+
+    def test_header_only(self):
+        self.compare(self.write("empty.csv", MESSY_CSV.splitlines()[0] + "\n"))
+
+    def test_missing_column(self):
+        path = self.write("bad.csv", "Type,Flowrate,Temperature\nPump,1,2\n")
+        with self.assertRaisesMessage(ValueError, "Missing required column: Pressure"):
+            analyze_dataset(path, backend="polars")
+
+    def test_columnar_store_matches(self):
+        from .columnar import ColumnarStore
+
+        path = os.path.join(self.tmp, "synthetic.csv")
+        synthetic_frame(5_000).to_csv(path, index=False)
+
+        analyze_dataset(path, store=os.path.join(self.tmp, "pandas"), backend="pandas")
+        analyze_dataset(path, store=os.path.join(self.tmp, "polars"), backend="polars")
+
+        expected = ColumnarStore(os.path.join(self.tmp, "pandas"))
+        actual = ColumnarStore(os.path.join(self.tmp, "polars"))
+        self.assertEqual(expected.rows(0, 50), actual.rows(0, 50))
+
+
+# ============================================================
+# ✅ Compressed At-Rest Storage
+# ============================================================
+
+class CompressionTests(TempFilesMixin, SimpleTestCase):
+
+    def roundtrip(self, codec):
+        import pandas as pd
+        from .analytics import append_rows
+        from .compression import compress_file, detect, open_csv
+
+        # ✅ No final newline: compression adds it, appends rely on it
+        path = self.write(f"data_{codec}.csv", MESSY_CSV.rstrip("\n"))
+        expected = analyze_dataset(self.write("plain.csv", MESSY_CSV))
+
+        before, after = compress_file(path, codec)
+        self.assertEqual(detect(path), codec)
+        self.assertEqual(after, os.path.getsize(path))
+        self.assertEqual(analyze_dataset(path), expected)
+        self.assertEqual(analyze_dataset(path, backend="polars"), expected)
+
+        extra = pd.DataFrame({"Type": ["Pump"], "Flowrate": [1.0], "Pressure": [2.0], "Temperature": [3.0]})
+        append_rows(path, extra)
+        with open_csv(path) as f:
+            lines = f.read().decode().splitlines()
+        self.assertEqual(lines[:-1], MESSY_CSV.splitlines())
+        self.assertEqual(lines[-1], ",Pump,1.0,2.0,3.0")
+        self.assertEqual(analyze_dataset(path)[1]["count"], expected[1]["count"] + 1)
+
+    def test_gzip(self):
+        self.roundtrip("gzip")
+
+    @unittest.skipUnless(zstd_available(), "zstandard is not installed")
+    def test_zstd(self):
+        self.roundtrip("zstd")
+
+    def test_plain_files_are_left_alone(self):
+        from .compression import compress_file, detect
+
+        path = self.write("plain.csv", MESSY_CSV)
+        self.assertEqual(compress_file(path, "none"), (len(MESSY_CSV), len(MESSY_CSV)))
+        self.assertIsNone(detect(path))
+
+
+# ============================================================
+# ✅ Mergeable Sketches
+# ============================================================
+
+class SketchTests(SimpleTestCase):
+
+    def test_merged_digest_quantiles(self):
+        import numpy as np
+        from .sketches import digest_from_values, merge_digest_list, quantile
+
+        values = np.random.default_rng(7).lognormal(3, 1, 200_000)
+        digest = merge_digest_list([digest_from_values(part) for part in np.array_split(values, 20)])
+
+        self.assertEqual(quantile(digest, 0), values.min())
+        self.assertEqual(quantile(digest, 1), values.max())
+        for q in (0.01, 0.5, 0.9, 0.99):
+            rank = (values < quantile(digest, q)).mean()
+            self.assertLess(abs(rank - q), 0.005, q)
+
+    def test_hll_distinct_count(self):
+        import pandas as pd
+        from .sketches import distinct_count, hll_from_values, merge_hll
+
+        names = pd.Series([f"EQ-{i}" for i in range(50_000)])
+        merged = merge_hll(hll_from_values(names[:30_000]), hll_from_values(names[20_000:]))
+        self.assertLess(abs(distinct_count(merged) - 50_000), 50_000 * 0.05)
+        self.assertEqual(distinct_count(hll_from_values(["a", "b", "a", None])), 2)
+
+    def test_aggregates_without_sketches_are_not_merged_partially(self):
+        from .analytics import clean_frame, compute_aggregates, merge_aggregates
+
+        df = clean_frame(synthetic_frame(1_000))
+        base, delta = compute_aggregates(df[:500]), compute_aggregates(df[500:])
+        self.assertEqual(merge_aggregates(base, delta)["sketches"]["digests"].keys(),
+                         compute_aggregates(df)["sketches"]["digests"].keys())
+
+        del base["sketches"]
+        self.assertNotIn("sketches", merge_aggregates(base, delta))
+
+
+# ============================================================
+# ✅ Fair-Share Job Scheduler
+# ============================================================
+
+class ManualExecutor:
+    """Records submitted jobs; the test decides when they finish."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+        future = Future()
+        self.jobs.append((args[-1], (fn, args, future)))
+        return future
+
+    def finish(self, name):
+        for job, (fn, args, future) in self.jobs:
+            if job == name and not future.done():
+                future.set_result(fn(*args))
+                return
+        raise AssertionError(f"{name} is not running")
+
+
+@override_settings(SCHEDULER_MAX_RETRY_AFTER=60)
+class SchedulerTests(SimpleTestCase):
+
+    def scheduler(self, capacity=1, max_queue=10, max_queue_per_user=10):
+        from .scheduler import FairScheduler
+        self.executor = ManualExecutor()
+        return FairScheduler(self.executor, capacity, max_queue, max_queue_per_user, aging=0)
+
+    def started(self):
+        return [name for name, _ in self.executor.jobs]
+
+    def test_users_take_turns_and_small_jobs_go_first(self):
+        scheduler = self.scheduler()
+        futures = [
+            scheduler.submit(str, "a-first", user="a", cost=100),
+            scheduler.submit(str, "a-big", user="a", cost=1000),
+            scheduler.submit(str, "a-small", user="a", cost=10),
+            scheduler.submit(str, "b-big", user="b", cost=500),
+        ]
+
+        for name in ("a-first", "b-big", "a-small", "a-big"):
+            self.assertEqual(self.started()[-1], name)
+            self.executor.finish(name)
+
+        self.assertEqual([f.result() for f in futures], ["a-first", "a-big", "a-small", "b-big"])
+
+    def test_full_queue_is_rejected_with_retry_after(self):
+        from .scheduler import Saturated
+
+        scheduler = self.scheduler(max_queue=2, max_queue_per_user=1)
+        scheduler.submit(str, "running", user="a")
+        scheduler.submit(str, "queued", user="a")
+
+        with self.assertRaises(Saturated) as raised:
+            scheduler.admit("a")
+        self.assertGreaterEqual(raised.exception.wait, 1)
+
+        # ✅ Other users still get in until the whole queue is full
+        with scheduler.admit("b") as reservation:
+            reservation.submit(str, "queued")
+        with self.assertRaises(Saturated):
+            scheduler.admit("c")
+
+    def test_admitted_slots_count_as_queued(self):
+        from .scheduler import Saturated
+
+        scheduler = self.scheduler(capacity=1, max_queue=3, max_queue_per_user=3)
+        scheduler.submit(str, "running", user="a")
+
+        reservation = scheduler.admit("a", jobs=5)
+        self.assertEqual(reservation.slots, 3)
+        with self.assertRaises(Saturated):
+            scheduler.submit(str, "late", user="b")
+
+        # ✅ Unused slots are freed on exit
+        with reservation:
+            reservation.submit(str, "queued")
+        self.assertEqual(scheduler.reserved, {})
+        self.assertEqual(scheduler.admit("b", jobs=5).slots, 2)
+
+    def test_held_slots_wait_their_turn_and_keep_a_worker(self):
+        import threading
+
+        scheduler = self.scheduler(capacity=1)
+        scheduler.submit(str, "running", user="a")
+        entered, leave = threading.Event(), threading.Event()
+
+        def hold():
+            with scheduler.admit("b") as reservation, reservation.hold(cost=10):
+                entered.set()
+                leave.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        self.assertFalse(entered.wait(0.2))
+        self.assertEqual(len(scheduler.pending), 1)
+
+        self.executor.finish("running")
+        self.assertTrue(entered.wait(5))
+        scheduler.submit(str, "next", user="a")
+        self.assertEqual((scheduler.busy, self.started()), (1, ["running"]))
+
+        leave.set()
+        thread.join()
+        self.assertEqual((scheduler.busy, self.started()), (1, ["running", "next"]))
+        self.assertEqual(scheduler.reserved, {})
+
+    def test_concurrent_admits_never_overfill_the_queue(self):
+        import threading
+        from .scheduler import Saturated
+
+        scheduler = self.scheduler(capacity=1, max_queue=5, max_queue_per_user=100)
+        admitted, start = [], threading.Barrier(20)
+
+        def admit(user):
+            start.wait()
+            try:
+                admitted.append(scheduler.admit(user))
+            except Saturated:
+                pass
+
+        threads = [threading.Thread(target=admit, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(admitted), 5)
+        for reservation in admitted:
+            reservation.submit(str, "job")
+        self.assertEqual(len(scheduler.pending) + len(self.executor.jobs), 5)
+
+
+# ============================================================
+# ✅ Batch Upload Unpacking
+# ============================================================
+
+class UploadFilesTests(SimpleTestCase):
+
+    def test_plain_files_are_checked_like_zip_members(self):
+        import io
+        import zipfile
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from .archive import iter_upload_files
+
+        zipped = io.BytesIO()
+        with zipfile.ZipFile(zipped, "w") as archive:
+            archive.writestr("inner.csv", MESSY_CSV)
+            archive.writestr("huge.csv", MESSY_CSV * 10)
+
+        files = [
+            SimpleUploadedFile("ok.csv", MESSY_CSV.encode()),
+            SimpleUploadedFile("big.csv", (MESSY_CSV * 10).encode()),
+            SimpleUploadedFile("notes.txt", b"hello"),
+            SimpleUploadedFile("batch.zip", zipped.getvalue()),
+        ]
+        results = {name: error for name, _, error in iter_upload_files(files, len(MESSY_CSV))}
+
+        self.assertEqual(results["ok.csv"], None)
+        self.assertEqual(results["inner.csv"], None)
+        self.assertIn("MB limit", results["big.csv"])
+        self.assertIn("MB limit", results["huge.csv"])
+        self.assertIn(".csv", results["notes.txt"])
+
+
+# ============================================================
+# ✅ Dataset Search + Keyset Pagination
+# ============================================================
+
+class DatasetSearchTests(ApiClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        from .models import DatasetUpload
+
+        # ✅ Pairs of equal pressures: pages must not split or repeat ties
+        self.pressure = {
+            DatasetUpload.objects.create(
+                user=self.user, file=f"datasets/{i}.csv", filename=f"{i}.csv",
+                summary={"total_count": 1, "avg_pressure": float(i // 2)},
+            ).id: i // 2
+            for i in range(7)
+        }
+        self.ids = list(self.pressure)
+        other = User.objects.create_user("bob", password="pw")
+        DatasetUpload.objects.create(
+            user=other, file="datasets/bob.csv", filename="bob.csv", summary={"avg_pressure": 1.0},
+        )
+
+    def pages(self, query):
+        ids, url, pages = [], f"/api/datasets/search/?page_size=2&{query}", 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row["id"] for row in response.data["results"]]
+            url, pages = response.data["next"], pages + 1
+        return ids, pages
+
+    def test_cursor_continuity_across_equal_values(self):
+        descending, pages = self.pages("ordering=-avg_pressure")
+        self.assertEqual(pages, 4)
+        expected = sorted(self.ids, key=lambda i: (self.pressure[i], i))
+        self.assertEqual(descending, expected[::-1])
+
+        ascending, _ = self.pages("ordering=avg_pressure")
+        self.assertEqual(ascending, expected)
+
+    def test_filters(self):
+        ids, _ = self.pages("ordering=avg_pressure&min_avg_pressure=1&max_avg_pressure=2")
+        self.assertEqual(ids, self.ids[2:6])
+
+    def test_invalid_cursor_and_filters(self):
+        response = self.client.get("/api/datasets/search/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+        for value in ("abc", "nan", "inf", "-Infinity"):
+            response = self.client.get(f"/api/datasets/search/?min_avg_pressure={value}")
+            self.assertEqual(response.status_code, 400, value)
+
+        response = self.client.get("/api/datasets/search/?ordering=filename")
+        self.assertEqual(response.status_code, 400)
+
+
+# ============================================================
+# ✅ Append Endpoint
+# ============================================================
+
+class MediaRootMixin(TempFilesMixin):
+    """Temporary MEDIA_ROOT with helpers to store analyzed datasets."""
+
+    def setUp(self):
+        super().setUp()
+        media = override_settings(MEDIA_ROOT=self.tmp)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def create_dataset(self, text=None, codec="none", user=None, name="data.csv"):
+        from .columnar import store_path
+        from .compression import compress_file
+        from .models import DatasetUpload
+
+        os.makedirs(os.path.join(self.tmp, "datasets"), exist_ok=True)
+        path = self.write(os.path.join("datasets", name), text or DATASET_CSV)
+        compress_file(path, codec)
+        summary, aggregates = analyze_dataset(path, store=store_path(path))
+        return DatasetUpload.objects.create(
+            user=user or self.user, file=f"datasets/{name}", filename=name,
+            summary=summary, aggregates=aggregates,
+        )
+
+
+# ✅ Every row typed (the preview of an untyped row holds NaN, not JSON)
+DATASET_CSV = MESSY_CSV.replace("Mixer-1,,75.5,3.3,60\n", "")
+
+APPEND_CSV = (
+    "Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+    "Pump-3,Pump,100,5.0,100\n"
+    "Chiller-1,Chiller,50,1.5,5\n"
+)
+
+
+class AppendTests(ApiClientMixin, MediaRootMixin, TestCase):
+
+    def append(self, dataset, text=APPEND_CSV):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                f"/api/datasets/{dataset.id}/append/",
+                {"file": SimpleUploadedFile("delta.csv", text.encode())},
+                format="multipart",
+            )
+
+    def assert_appended(self, codec):
+        dataset = self.create_dataset(codec=codec, name=f"{codec}.csv")
+        expected = analyze_dataset(self.write("all.csv", DATASET_CSV + "".join(APPEND_CSV.splitlines(True)[1:])))
+
+        response = self.append(dataset)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["version"], 2)
+        self.assertEqual(response.data["appended_count"], 2)
+
+        dataset.refresh_from_db()
+        assert_close_aggregates(self, expected[1], dataset.aggregates)
+        self.assertEqual(dataset.summary["total_count"], expected[0]["total_count"])
+        self.assertEqual(dataset.row_count, expected[0]["total_count"])
+
+        # ✅ The stored file stays complete (and compressed)
+        from .compression import detect
+        self.assertEqual(detect(dataset.file.path), None if codec == "none" else codec)
+        assert_close_aggregates(self, expected[1], analyze_dataset(dataset.file.path)[1])
+
+        # ✅ Rows endpoint sees the new segment
+        rows = self.client.get(f"/api/datasets/{dataset.id}/rows/?limit=1000").data
+        self.assertEqual(rows["count"], expected[1]["count"])
+        return dataset
+
+    def test_plain_file(self):
+        self.assert_appended("none")
+
+    def test_compressed_file(self):
+        self.assert_appended("gzip")
+
+    def test_version_bump_changes_report_etag(self):
+        dataset = self.create_dataset()
+        url = f"/api/report/{dataset.id}/?charts=vector"
+
+        etag = f'"report-{dataset.id}-v1-vector"'
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.append(dataset)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag.replace("v1", "v2")).status_code, 304)
+        with mock.patch("equipment.views.get_scheduler", side_effect=AssertionError("rendered")):
+            with self.assertRaisesMessage(AssertionError, "rendered"):
+                self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_other_users_dataset_is_not_found(self):
+        other = User.objects.create_user("bob", password="pw")
+        dataset = self.create_dataset(user=other)
+
+        self.assertEqual(self.append(dataset).status_code, 404)
+        dataset.refresh_from_db()
+        self.assertEqual(dataset.version, 1)
+
+    def test_bad_delta_is_rejected(self):
+        dataset = self.create_dataset()
+        response = self.append(dataset, "Name,Value\nx,1\n")
+        self.assertEqual(response.status_code, 400)
+
+    def test_failed_append_leaves_files_as_they_were(self):
+        from .columnar import store_path
+
+        for codec in ("none", "gzip"):
+            dataset = self.create_dataset(codec=codec, name=f"{codec}.csv")
+            store = store_path(dataset.file.name)
+            with open(dataset.file.path, "rb") as f:
+                before = f.read()
+
+            with mock.patch("equipment.views.cache.invalidate", side_effect=RuntimeError("boom")):
+                with self.assertRaisesMessage(RuntimeError, "boom"):
+                    self.append(dataset)
+
+            with open(dataset.file.path, "rb") as f:
+                self.assertEqual(f.read(), before)
+            self.assertEqual(sorted(os.listdir(store)), ["meta.json", "seg-0000"])
+            dataset.refresh_from_db()
+            self.assertEqual(dataset.version, 1)
+
+            # ✅ A retry appends the rows once
+            self.assertEqual(self.append(dataset).status_code, 200)
+            total = self.client.get(f"/api/datasets/{dataset.id}/rows/").data["count"]
+            self.assertEqual(total, analyze_dataset(dataset.file.path)[0]["total_count"])
+
+    @override_settings(SUMMARY_LIST_MAX_VALUES=4)
+    def test_summary_lists_keep_the_first_values(self):
+        dataset = self.create_dataset()
+        self.assertEqual(len(dataset.summary["flowrate_list"]), 3)
+
+        self.append(dataset)
+        dataset.refresh_from_db()
+        self.assertEqual(dataset.summary["total_count"], 5)
+        self.assertEqual(dataset.summary["flowrate_list"], [120.5, 98.0, 150.0, 100.0])
+
+
+# ============================================================
+# ✅ Summary + History Cache
+# ============================================================
+
+class SummaryCacheTests(ApiClientMixin, TestCase):
+
+    def snapshot(self):
+        from types import SimpleNamespace
+        from . import cache
+
+        loader = mock.Mock(return_value=SimpleNamespace(
+            id=1, user_id=self.user.id, version=1, filename="a.csv", summary={},
+        ))
+        for _ in range(2):
+            cache.get_dataset(1, self.user.id, loader)
+        return loader.call_count
+
+    def test_shared_cache_serves_snapshots_until_invalidated(self):
+        from . import cache
+
+        self.assertTrue(cache.is_shared())
+        self.assertEqual(self.snapshot(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cache.invalidate(self.user.id, [1])
+        self.assertEqual(self.snapshot(), 1)
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_per_process_cache_is_skipped(self):
+        from . import cache
+
+        # ✅ Other processes (retention cron, workers) could not invalidate it
+        self.assertFalse(cache.is_shared())
+        self.assertEqual(self.snapshot(), 2)
+        cache.set_history(self.user.id, b"[]")
+        self.assertIsNone(cache.get_history(self.user.id))
+
+
+# ============================================================
+# ✅ Retention (cron): limits, dry runs, cached history
+# ============================================================
+
+NO_RETENTION = dict(RETENTION_MAX_DATASETS=0, RETENTION_MAX_AGE_DAYS=0, RETENTION_MAX_TOTAL_BYTES=0)
+
+
+@override_settings(**NO_RETENTION)
+class RetentionPolicyTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="pw")
+
+    def dataset(self, days_old=0, size=100, summary=None):
+        """A row only (no files), ``days_old`` days old, ``size`` bytes."""
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import DatasetUpload
+
+        dataset = DatasetUpload.objects.create(
+            user=self.user, file="datasets/none.csv", filename="none.csv",
+            summary={"total_count": 1} if summary is None else summary,
+        )
+        DatasetUpload.objects.filter(id=dataset.id).update(
+            uploaded_at=timezone.now() - timedelta(days=days_old), file_size=size
+        )
+        return dataset.id
+
+    def expired(self):
+        from .retention import expired_ids, limits_for
+        return sorted(expired_ids(self.user, limits_for(getattr(self.user, "retention_policy", None))))
+
+    def test_zero_is_unlimited(self):
+        for days_old in (1000, 10, 0):
+            self.dataset(days_old, size=10 ** 9)
+        self.assertEqual(self.expired(), [])
+
+    @override_settings(RETENTION_MAX_DATASETS=2)
+    def test_count_keeps_the_newest(self):
+        oldest, older = self.dataset(3), self.dataset(2)
+        self.dataset(1), self.dataset(0)
+        self.assertEqual(self.expired(), [oldest, older])
+
+    @override_settings(RETENTION_MAX_AGE_DAYS=30)
+    def test_age(self):
+        old = self.dataset(31)
+        self.dataset(29)
+        self.assertEqual(self.expired(), [old])
+
+    @override_settings(RETENTION_MAX_TOTAL_BYTES=250)
+    def test_bytes_fill_from_the_newest(self):
+        oldest = self.dataset(2, size=100)
+        self.dataset(1, size=100), self.dataset(0, size=100)
+        self.assertEqual(self.expired(), [oldest])
+
+    @override_settings(RETENTION_MAX_DATASETS=1, RETENTION_MAX_AGE_DAYS=30)
+    def test_policy_overrides_only_what_it_sets(self):
+        from .models import RetentionPolicy
+        from .retention import Limits, limits_for
+
+        policy = RetentionPolicy.objects.create(user=self.user, max_datasets=0, max_total_bytes=150)
+        self.assertEqual(limits_for(policy), Limits(0, 30, 150))
+
+        self.user.refresh_from_db()
+        old, big = self.dataset(40, size=1), self.dataset(2, size=100)
+        self.dataset(1, size=1), self.dataset(0, size=100)
+        self.assertEqual(self.expired(), [old, big])
+
+    @override_settings(RETENTION_MAX_DATASETS=1)
+    def test_unfinished_uploads_are_left_alone(self):
+        self.dataset(5, summary={})
+        older = self.dataset(2)
+        self.dataset(1), self.dataset(0, summary={})
+        self.assertEqual(self.expired(), [older])
+
+    @override_settings(RETENTION_MAX_DATASETS=1)
+    def test_dry_run_deletes_nothing(self):
+        import io
+        import io
+
+        from django.core.management import CommandError, call_command
+        from .models import DatasetUpload
+
+        old = self.dataset(1)
+        self.dataset(0)
+        out = io.StringIO()
+        call_command("enforce_retention", "--dry-run", stdout=out)
+        self.assertIn(f"alice: would delete 1 dataset(s) [{old}]", out.getvalue())
+        self.assertEqual(DatasetUpload.objects.count(), 2)
+
+        with self.assertRaisesMessage(CommandError, "Unknown user(s): bob"):
+            call_command("enforce_retention", "--user", "bob", stdout=out)
+
+        call_command("enforce_retention", "--user", "alice", stdout=out)
+        self.assertFalse(DatasetUpload.objects.filter(id=old).exists())
+
+
+class RetentionCacheTests(ApiClientMixin, MediaRootMixin, TestCase):
+
+    def history_ids(self):
+        import json
+        return [row["id"] for row in json.loads(self.client.get("/api/history/").content)["results"]]
+
+    @override_settings(RETENTION_MAX_DATASETS=1, RETENTION_MAX_AGE_DAYS=0, RETENTION_MAX_TOTAL_BYTES=0)
+    def test_deletes_reach_the_cached_history(self):
+        import io
+        from django.core.management import call_command
+
+        ids = [self.create_dataset(name=f"{i}.csv").id for i in range(3)]
+        self.assertEqual(self.history_ids(), ids[::-1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("enforce_retention", stdout=io.StringIO())
+
+        self.assertEqual(self.history_ids(), ids[-1:])
+
+
+# ============================================================
+# ✅ Verified Token Cache
+# ============================================================
+
+class TokenCacheTests(ApiClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        from rest_framework.authtoken.models import Token
+        from .authentication import _local_tokens
+
+        _local_tokens.clear()
+        self.addCleanup(_local_tokens.clear)
+        self.key = Token.objects.create(user=self.user).key
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.key}")
+
+    def test_shared_entry_holds_no_user_row(self):
+        from django.core.cache import cache
+        from .authentication import _cache_key
+
+        self.assertEqual(self.client.get("/api/history/").status_code, 200)
+        user_id, is_active, created = cache.get(_cache_key(self.key))
+        self.assertEqual((user_id, is_active), (self.user.id, True))
+
+        # ✅ Warm requests: no Token / User queries, user fields load on demand
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/history/").status_code, 200)
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_per_process_cache_skips_the_shared_layer(self):
+        from django.core.cache import cache
+        from .authentication import _cache_key
+
+        self.assertEqual(self.client.get("/api/history/").status_code, 200)
+        self.assertIsNone(cache.get(_cache_key(self.key)))
+
+    def test_lazy_user_loads_other_fields(self):
+        from .authentication import cached_user
+
+        user = cached_user(self.user.id, True)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.pk, self.user.id)
+        self.assertEqual(user.username, "alice")
+
+
+# ============================================================
+# ✅ Download Endpoint
+# ============================================================
+
+class DownloadTests(ApiClientMixin, MediaRootMixin, TestCase):
+
+    def download(self, dataset):
+        return self.client.get(f"/api/datasets/{dataset.id}/download/")
+
+    def test_compressed_files_are_served_as_csv(self):
+        for codec in ("none", "gzip"):
+            dataset = self.create_dataset(codec=codec, name=f"{codec}.csv")
+            response = self.download(dataset)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response["Content-Type"].startswith("text/csv"))
+            self.assertIn(f'filename="{codec}.csv"', response["Content-Disposition"])
+            self.assertEqual(b"".join(response.streaming_content).decode(), DATASET_CSV)
+
+    def test_history_has_no_media_urls(self):
+        import json
+
+        self.create_dataset(codec="gzip")
+        rows = json.loads(self.client.get("/api/history/").content)["results"]
+        self.assertNotIn("file", rows[0])
+
+    def test_other_users_dataset_is_not_found(self):
+        dataset = self.create_dataset(user=User.objects.create_user("bob", password="pw"))
+        self.assertEqual(self.download(dataset).status_code, 404)
+
+
+# ============================================================
+# ✅ Batch Endpoints vs a full queue
+# ============================================================
+
+class InlineExecutor:
+    """Runs jobs right away in the test process."""
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+@override_settings(SCHEDULER_MAX_RETRY_AFTER=60, UPLOAD_COMPRESSION="gzip")
+class BatchBackpressureTests(ApiClientMixin, MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        from .scheduler import FairScheduler
+
+        self.scheduler = FairScheduler(InlineExecutor(), 1, max_queue=2, max_queue_per_user=2, aging=0)
+        patcher = mock.patch("equipment.views.get_scheduler", return_value=self.scheduler)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_upload_batch_rejects_files_beyond_the_queue(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from .models import DatasetUpload
+
+        files = [SimpleUploadedFile(f"{i}.csv", DATASET_CSV.encode()) for i in range(4)]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/upload/batch/", {"files": files}, format="multipart")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([d["filename"] for d in response.data["datasets"]], ["0.csv", "1.csv"])
+        self.assertEqual([f["status"] for f in response.data["failed"]], [429, 429])
+        self.assertGreaterEqual(response.data["failed"][0]["retry_after"], 1)
+
+        # ✅ Rejected files are not kept, slots are all given back
+        self.assertEqual(DatasetUpload.objects.count(), 2)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmp, "datasets"))), ["0.csv", "1.csv"])
+        self.assertEqual(self.scheduler.reserved, {})
+
+    def test_report_batch_lists_busy_reports(self):
+        import io
+        import zipfile
+
+        datasets = [self.create_dataset(name=f"{i}.csv") for i in range(3)]
+        with mock.patch("equipment.views.render_pdf", return_value=b"%PDF"):
+            response = self.client.get("/api/reports/batch/?charts=vector")
+            archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+
+        names = archive.namelist()
+        self.assertEqual(len([n for n in names if n.endswith(".pdf")]), 2)
+        self.assertIn("Server is busy", archive.read("errors.txt").decode())
+        # ✅ Newest first: the oldest dataset didn't fit
+        self.assertIn(f"report_{datasets[0].id}.pdf", archive.read("errors.txt").decode())
+        self.assertEqual(self.scheduler.reserved, {})
+
+    def test_full_queue_answers_429(self):
+        self.create_dataset()
+        self.scheduler.admit("someone else", jobs=2)
+        response = self.client.get("/api/reports/batch/?charts=vector")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+
+# ============================================================
+# ✅ Analyze-While-Receiving Upload Handler
+# ============================================================
+
+@override_settings(UPLOAD_COMPRESSION="gzip", PARALLEL_ANALYSIS_MIN_BYTES=64 * 1024 * 1024)
+class StreamingUploadTests(ApiClientMixin, MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        from .scheduler import FairScheduler
+
+        self.scheduler = FairScheduler(InlineExecutor(), 1, max_queue=4, max_queue_per_user=4, aging=0)
+        patcher = mock.patch("equipment.views.get_scheduler", return_value=self.scheduler)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self, text):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/upload/", {"file": SimpleUploadedFile("plant.csv", text.encode())}, format="multipart"
+            )
+
+    def assert_stored(self, response, text):
+        import hashlib
+        from .compression import detect
+        from .models import DatasetUpload
+
+        self.assertEqual(response.status_code, 200)
+        dataset = DatasetUpload.objects.get(id=response.data["dataset_id"])
+        expected = analyze_dataset(self.write("expected.csv", text))
+
+        self.assertEqual(dataset.summary, expected[0])
+        assert_close_aggregates(self, expected[1], dataset.aggregates)
+        self.assertEqual(detect(dataset.file.path), "gzip")
+        return dataset, hashlib.sha256(text.encode()).hexdigest()
+
+    def test_upload_is_analyzed_and_hashed_while_received(self):
+        response = self.upload(DATASET_CSV)
+
+        # ✅ Only the streaming handler computes the hash
+        dataset, sha256 = self.assert_stored(response, DATASET_CSV)
+        self.assertEqual(dataset.sha256, sha256)
+
+    def test_batches_go_to_disk_as_store_segments(self):
+        from .analytics import StreamingAnalyzer
+        from .columnar import ColumnarStore, store_path
+
+        from .scheduler import Reservation
+
+        text = synthetic_frame(3_000).to_csv(index=False)
+        with mock.patch.object(StreamingAnalyzer, "batch_bytes", 4096), \
+                mock.patch.object(Reservation, "hold", autospec=True, side_effect=Reservation.hold) as hold:
+            response = self.upload(text)
+
+        dataset, _ = self.assert_stored(response, text)
+        store = ColumnarStore(store_path(dataset.file.name))
+        analyze_dataset(self.write("expected.csv", text), store=os.path.join(self.tmp, "expected"))
+        expected = ColumnarStore(os.path.join(self.tmp, "expected"))
+        self.assertGreater(len(store.meta["segments"]), 1)
+        self.assertEqual(store.rows(0, 3_000), expected.rows(0, 3_000))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmp, "columnar"))), ["plant"])
+
+        # ✅ Every batch ran in a scheduler slot, all released again
+        self.assertGreater(hold.call_count, 1)
+        self.assertEqual((self.scheduler.busy, self.scheduler.reserved), (0, {}))
+
+    def test_big_bodies_go_to_the_parallel_analysis(self):
+        with override_settings(PARALLEL_ANALYSIS_MIN_BYTES=len(DATASET_CSV)):
+            response = self.upload(DATASET_CSV)
+
+        # ✅ Stored first, analyzed as scheduled jobs (no streaming hash)
+        dataset, _ = self.assert_stored(response, DATASET_CSV)
+        self.assertEqual(dataset.sha256, "")
+        self.assertEqual(self.scheduler.reserved, {})
+
+    def test_bad_header_stops_the_upload(self):
+        from django.core.files.uploadhandler import StopFutureHandlers, StopUpload
+        from .upload_handlers import AnalyzingUploadHandler
+
+        for body_length, reset in ((100, False), (10 * 1024 * 1024, True)):
+            handler = AnalyzingUploadHandler()
+            handler.handle_raw_input(None, {}, body_length, b"boundary")
+            with self.assertRaises(StopFutureHandlers):
+                handler.new_file("file", "bad.csv", "text/csv", body_length)
+
+            with self.assertRaises(StopUpload) as stopped:
+                handler.receive_data_chunk(b"Name,Value\nx,1\n", 0)
+            self.assertEqual(stopped.exception.connection_reset, reset)
+            self.assertIn("Type", handler.error)
+            self.assertFalse(os.path.exists(handler.path))
+
+        response = self.upload("Name,Value\nx,1\n")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(os.listdir(os.path.join(self.tmp, "datasets")), [])
+
+
+# ============================================================
+# ✅ Ad-hoc Queries (DuckDB)
+# ============================================================
+
+class QuerySpecTests(SimpleTestCase):
+
+    def test_normalized_spec(self):
+        from .query import parse_spec
+
+        spec = parse_spec({
+            "metrics": [{"agg": "AVG", "column": "Pressure"}, {"agg": "count"}],
+            "filters": [{"column": "Type", "op": "in", "value": ["Pump", "Valve"]}],
+            "group_by": ["Type"],
+            "order_by": "avg_pressure",
+            "descending": 1,
+            "limit": 5000,
+        }, max_rows=100)
+
+        self.assertEqual(spec["metrics"], [{"agg": "avg", "column": "Pressure"}, {"agg": "count", "column": None}])
+        self.assertEqual(spec["filters"][0]["op"], "in")
+        self.assertEqual((spec["order_by"], spec["descending"], spec["limit"]), ("avg_pressure", True, 100))
+
+    def test_invalid_specs(self):
+        from .query import QueryError, parse_spec
+
+        invalid = [
+            [],
+            {"metrics": []},
+            {"metrics": [{"agg": "drop"}]},
+            {"metrics": [{"agg": "avg"}]},
+            {"metrics": [{"agg": "sum", "column": "Equipment Name"}]},
+            {"metrics": [{"agg": "count"}], "filters": [{"column": "Name; --", "value": 1}]},
+            {"metrics": [{"agg": "count"}], "filters": [{"column": "Pressure", "op": "like", "value": 1}]},
+            {"metrics": [{"agg": "count"}], "filters": [{"column": "Pressure", "value": "1"}]},
+            {"metrics": [{"agg": "count"}], "filters": [{"column": "Pressure", "value": True}]},
+            {"metrics": [{"agg": "count"}], "filters": [{"column": "Type", "op": "in", "value": []}]},
+            {"metrics": [{"agg": "count"}], "group_by": ["Pressure"]},
+            {"metrics": [{"agg": "count"}], "order_by": "avg_pressure"},
+            {"metrics": [{"agg": "count"}], "limit": "many"},
+        ]
+        for data in invalid:
+            with self.assertRaises(QueryError, msg=data):
+                parse_spec(data, max_rows=100)
+
+
+@unittest.skipUnless(duckdb_available(), "duckdb is not installed")
+class QueryEndpointTests(ApiClientMixin, MediaRootMixin, TestCase):
+
+    def query(self, data):
+        return self.client.post("/api/query/", data, format="json")
+
+    def test_grouped_query_over_several_datasets(self):
+        a = self.create_dataset(name="a.csv")
+        b = self.create_dataset(name="b.csv", text=DATASET_CSV.replace("5.2", "9.2"))
+        spec = {
+            "datasets": [a.id, b.id],
+            "metrics": [{"agg": "avg", "column": "Pressure"}, {"agg": "count"}],
+            "filters": [{"column": "Temperature", "op": ">", "value": 100}],
+            "group_by": ["dataset_id", "Type"],
+        }
+
+        response = self.query(spec)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["cached"])
+        self.assertEqual(response.data["columns"], ["dataset_id", "Type", "avg_pressure", "count"])
+        rows = {(r[0], r[1]): r[2:] for r in response.data["rows"]}
+        self.assertEqual(rows[(a.id, "Pump")], [5.75, 2])
+        self.assertEqual(rows[(b.id, "Pump")], [7.75, 2])
+        self.assertEqual(rows[(a.id, "Reactor")], [8.8, 1])
+
+        self.assertTrue(self.query(spec).data["cached"])
+
+    def test_appended_segments_are_scanned(self):
+        from .analytics import clean_frame, read_csv_checked
+        from .columnar import open_store
+
+        dataset = self.create_dataset()
+        open_store(dataset).append(clean_frame(read_csv_checked(self.write("more.csv", DATASET_CSV))))
+        response = self.query({"metrics": [{"agg": "count"}, {"agg": "max", "column": "Temperature"}]})
+        self.assertEqual(response.data["rows"], [[6, 310.0]])
+
+    def test_limits(self):
+        other = self.create_dataset(user=User.objects.create_user("bob", password="pw"), name="bob.csv")
+        mine = self.create_dataset()
+        count = {"metrics": [{"agg": "count"}]}
+
+        self.assertEqual(self.query({**count, "datasets": [other.id]}).status_code, 404)
+        with override_settings(QUERY_MAX_DATASETS=1):
+            self.create_dataset(name="second.csv")
+            self.assertEqual(self.query(count).status_code, 400)
+            self.assertEqual(self.query({**count, "datasets": [mine.id]}).status_code, 200)
+
+        # ✅ The deadline starts before the stores are loaded
+        with override_settings(QUERY_TIMEOUT=0):
+            self.assertEqual(self.query({**count, "datasets": [mine.id], "limit": 2}).status_code, 408)
+
+
+# ============================================================
+# ✅ Parallel Analysis (byte ranges, worker-written segments)
+# ============================================================
+
+class ParallelAnalysisTests(TempFilesMixin, SimpleTestCase):
+
+    def test_matches_serial_analysis_and_store(self):
+        from .analytics import analyze_dataset_parallel
+        from .columnar import ColumnarStore
+
+        path = os.path.join(self.tmp, "plant.csv")
+        synthetic_frame(3_000).to_csv(path, index=False)
+
+        serial = analyze_dataset(path, store=os.path.join(self.tmp, "serial"))
+        parallel = analyze_dataset_parallel(
+            path, store=os.path.join(self.tmp, "parallel"), parts=4, submit=InlineExecutor().submit
+        )
+        self.assertEqual(parallel[0], serial[0])
+        assert_close_aggregates(self, serial[1], parallel[1])
+
+        expected, actual = ColumnarStore(os.path.join(self.tmp, "serial")), ColumnarStore(os.path.join(self.tmp, "parallel"))
+        self.assertEqual(len(actual.meta["segments"]), 4)
+        self.assertEqual(actual.rows(0, 3_000), expected.rows(0, 3_000))
+        self.assertEqual(actual.rows(0, 50, eq_type="Pump"), expected.rows(0, 50, eq_type="Pump"))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, "parallel.building")))
+
+    def test_failed_range_leaves_nothing_behind(self):
+        from .analytics import analyze_dataset_parallel
+
+        path = os.path.join(self.tmp, "plant.csv")
+        synthetic_frame(3_000).to_csv(path, index=False)
+        executor, calls = InlineExecutor(), []
+
+        def submit(fn, *args):
+            calls.append(args)
+            return executor.submit(fn if len(calls) != 3 else int, *args)
+
+        with self.assertRaises(TypeError):
+            analyze_dataset_parallel(path, store=os.path.join(self.tmp, "store"), parts=4, submit=submit)
+        self.assertEqual(sorted(os.listdir(self.tmp)), ["plant.csv"])
+
+
+# ============================================================
+# ✅ Dataset Artifacts (delete signal + garbage collection)
+# ============================================================
+
+class StorageGarbageTests(ApiClientMixin, MediaRootMixin, TestCase):
+
+    def age(self, *paths, seconds=7200):
+        """Backdates ``paths`` (files or directories) past the GC min_age."""
+        old = time.time() - seconds
+        for path in paths:
+            os.utime(path, (old, old))
+
+    def artifacts(self, dataset):
+        from .columnar import store_path
+        return os.path.join(self.tmp, dataset.file.name), store_path(dataset.file.name)
+
+    def collect(self, **kwargs):
+        from .storage import collect_garbage
+        with self.captureOnCommitCallbacks(execute=True):
+            return collect_garbage(**kwargs)
+
+    def test_delete_removes_artifacts_after_commit(self):
+        dataset = self.create_dataset()
+        csv, store = self.artifacts(dataset)
+        self.assertTrue(os.path.isfile(csv) and os.path.isdir(store))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            dataset.delete()
+        self.assertFalse(os.path.exists(csv) or os.path.exists(store))
+
+    def test_rolled_back_delete_keeps_artifacts(self):
+        from django.db import transaction
+
+        dataset = self.create_dataset()
+        csv, store = self.artifacts(dataset)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                dataset.delete()
+                raise RuntimeError("rollback")
+        self.assertEqual(callbacks, [])
+        self.assertTrue(os.path.isfile(csv) and os.path.isdir(store))
+
+    def test_collects_orphans_and_keeps_owned_files(self):
+        dataset = self.create_dataset()
+        csv, store = self.artifacts(dataset)
+        os.makedirs(os.path.join(self.tmp, "columnar", "lost"))
+        os.makedirs(store + ".building")
+        orphans = [
+            self.write(os.path.join("datasets", "lost.csv"), DATASET_CSV),
+            os.path.join(self.tmp, "columnar", "lost"),
+            store + ".building",
+            self.write(f"report_{dataset.id + 1}.pdf", "%PDF"),
+        ]
+        kept = [csv, store, self.write(f"report_{dataset.id}.pdf", "%PDF")]
+        self.age(*orphans, *kept)
+
+        stats = self.collect(min_age=3600, batch_size=1)
+        self.assertEqual(
+            stats,
+            {"dataset_files": 1, "columnar_stores": 2, "legacy_files": 1, "failed_rows": 0, "missing_files": 0},
+        )
+        self.assertFalse(any(os.path.exists(path) for path in orphans))
+        self.assertTrue(all(os.path.exists(path) for path in kept))
+
+    def test_skips_recent_entries_and_dry_run(self):
+        os.makedirs(os.path.join(self.tmp, "datasets"))
+        lost = self.write(os.path.join("datasets", "lost.csv"), DATASET_CSV)
+        self.assertEqual(self.collect(min_age=3600)["dataset_files"], 0)
+
+        self.age(lost)
+        self.assertEqual(self.collect(min_age=3600, dry_run=True)["dataset_files"], 1)
+        self.assertTrue(os.path.exists(lost))
+
+    def test_deletes_unfinished_rows_with_their_files(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import DatasetUpload
+
+        finished = self.create_dataset()
+        unfinished = self.create_dataset(name="broken.csv")
+        recent = self.create_dataset(name="uploading.csv")
+        DatasetUpload.objects.filter(id__in=[unfinished.id, recent.id]).update(summary={})
+        DatasetUpload.objects.exclude(id=recent.id).update(uploaded_at=timezone.now() - timedelta(hours=2))
+        csv, store = self.artifacts(unfinished)
+
+        stats = self.collect(min_age=3600)
+        self.assertEqual(stats["failed_rows"], 1)
+        self.assertEqual(
+            set(DatasetUpload.objects.values_list("id", flat=True)), {finished.id, recent.id}
+        )
+        self.assertFalse(os.path.exists(csv) or os.path.exists(store))
+        self.assertEqual(self.collect(min_age=3600, delete_failed=False)["failed_rows"], 0)
+
+    def test_reports_rows_with_missing_files(self):
+        dataset = self.create_dataset()
+        os.remove(self.artifacts(dataset)[0])
+        self.assertEqual(self.collect(min_age=0)["missing_files"], 1)
+        self.assertTrue(type(dataset).objects.filter(id=dataset.id).exists())
+
+
+# ============================================================
+# ✅ PDF Reports (chart templates, both chart backends)
+# ============================================================
+
+class ReportRenderTests(TempFilesMixin, SimpleTestCase):
+
+    def report(self, text):
+        from types import SimpleNamespace
+        summary, _ = analyze_dataset(self.write("data.csv", text))
+        return SimpleNamespace(id=1, filename="data.csv", summary=summary)
+
+    def test_empty_dataset_does_not_break_later_reports(self):
+        from .report import render_pdf
+
+        empty = self.report("Equipment Name,Type,Flowrate,Pressure,Temperature\nx,,abc,,\n")
+        self.assertEqual(empty.summary["type_distribution"], {})
+        normal = self.report(DATASET_CSV)
+
+        for dataset in (empty, normal, empty, normal):
+            self.assertTrue(render_pdf(dataset, chart_backend="matplotlib").startswith(b"%PDF"))
+
+    def test_each_chart_backend(self):
+        from reportlab.graphics.shapes import Drawing
+        from .report import CHART_BACKENDS, generate_charts, render_pdf, resolve_chart_backend
+
+        dataset = self.report(DATASET_CSV)
+        for backend in CHART_BACKENDS:
+            charts = generate_charts(dataset.summary, backend=backend)
+            self.assertEqual(len(charts), 4)
+            for chart in charts:
+                if backend == "vector":
+                    self.assertIsInstance(chart, Drawing)
+                else:
+                    self.assertTrue(chart.getvalue().startswith(b"\x89PNG"))
+            self.assertTrue(render_pdf(dataset, chart_backend=backend).startswith(b"%PDF"))
+
+        with override_settings(REPORT_CHART_BACKEND="vector"):
+            self.assertEqual(resolve_chart_backend(), "vector")
+        with self.assertRaises(ValueError):
+            resolve_chart_backend("svg")
+
+    def test_concurrent_renders_stay_in_memory(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from types import SimpleNamespace
+        from reportlab import rl_config
+        from .report import render_pdf
+
+        media = os.path.join(self.tmp, "media")
+        os.makedirs(media)
+        datasets = [self.report(DATASET_CSV), self.report(synthetic_frame(200).to_csv(index=False))]
+        datasets[1] = SimpleNamespace(id=2, filename="big.csv", summary=datasets[1].summary)
+
+        # ✅ invariant: no timestamps / random ids, equal input -> equal bytes
+        with override_settings(MEDIA_ROOT=media), mock.patch.object(rl_config, "invariant", 1):
+            expected = [render_pdf(dataset, "matplotlib") for dataset in datasets]
+            with ThreadPoolExecutor(4) as pool:
+                rendered = list(pool.map(lambda i: render_pdf(datasets[i % 2], "matplotlib"), range(8)))
+
+        self.assertNotEqual(expected[0], expected[1])
+        self.assertEqual(rendered, [expected[i % 2] for i in range(8)])
+        self.assertEqual(os.listdir(media), [])
+
+
+# ============================================================
+# ✅ Async Endpoints (token auth, 429, upload -> history -> report)
+# ============================================================
+
+@override_settings(SCHEDULER_MAX_RETRY_AFTER=60)
+class AsyncEndpointTests(ApiClientMixin, MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        from rest_framework.authtoken.models import Token
+
+        self.auth = {"Authorization": f"Token {Token.objects.create(user=self.user).key}"}
+        self.use_scheduler(max_queue=4)
+
+    def use_scheduler(self, max_queue):
+        from .scheduler import FairScheduler
+
+        scheduler = FairScheduler(InlineExecutor(), 1, max_queue=max_queue, max_queue_per_user=4, aging=0)
+        patcher = mock.patch("equipment.async_views.get_scheduler", return_value=scheduler)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def upload(self, text=DATASET_CSV):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        return await self.async_client.post(
+            "/api/async/upload/", {"file": SimpleUploadedFile("plant.csv", text.encode())}, headers=self.auth
+        )
+
+    async def acreate_dataset(self, **kwargs):
+        from asgiref.sync import sync_to_async
+        return await sync_to_async(self.create_dataset)(**kwargs)
+
+    async def history_ids(self, query=""):
+        response = await self.async_client.get(f"/api/async/history/{query}", headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.json()["results"]]
+
+    async def test_token_auth(self):
+        response = await self.async_client.get("/api/async/history/")
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.get("/api/async/history/", headers={"Authorization": "Token nope"})
+        self.assertEqual((response.status_code, response.json()["detail"]), (401, "Invalid token."))
+
+        self.assertEqual(await self.history_ids(), [])
+
+    async def test_upload_history_report(self):
+        expected = analyze_dataset(self.write("expected.csv", DATASET_CSV))[0]
+
+        # ✅ Streamed (analyzed while received) and stored-then-scheduled
+        ids = []
+        for streaming in (True, False):
+            with override_settings(STREAMING_UPLOAD_ANALYSIS=streaming):
+                response = await self.upload()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["summary"], expected)
+            ids.append(response.json()["dataset_id"])
+
+        self.assertEqual(await self.history_ids(), ids[::-1])
+
+        url = f"/api/async/report/{ids[0]}/?charts=vector"
+        response = await self.async_client.get(url, headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(response.content.startswith(b"%PDF"))
+
+        cached = await self.async_client.get(url, headers={**self.auth, "If-None-Match": response["ETag"]})
+        self.assertEqual(cached.status_code, 304)
+
+        response = await self.upload("Name,Value\nx,1\n")
+        self.assertEqual(response.status_code, 400)
+
+    async def test_other_users_report_is_not_found(self):
+        other = await User.objects.acreate(username="bob")
+        dataset = await self.acreate_dataset(user=other)
+
+        response = await self.async_client.get(f"/api/async/report/{dataset.id}/", headers=self.auth)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_saturated_server_answers_429(self):
+        self.use_scheduler(max_queue=0)
+        response = await self.upload()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+        self.assertEqual(await self.history_ids(), [])
+
+    async def test_first_history_page_is_cached(self):
+        from asgiref.sync import sync_to_async
+        from . import cache
+
+        first = await self.acreate_dataset(name="first.csv")
+        self.assertEqual(await self.history_ids(), [first.id])
+
+        # ✅ Rows added behind the cache's back: only later pages see them
+        second = await self.acreate_dataset(name="second.csv")
+        self.assertEqual(await self.history_ids(), [first.id])
+        self.assertEqual(await self.history_ids("?page_size=10"), [second.id, first.id])
+
+        # ✅ ORM work runs on the test's thread: capture the on_commit there
+        def invalidate():
+            with self.captureOnCommitCallbacks(execute=True):
+                cache.invalidate(self.user.id)
+
+        await sync_to_async(invalidate)()
+        self.assertEqual(await self.history_ids(), [second.id, first.id])
+
+
+# ============================================================
+# ✅ Request Timing + /metrics
+# ============================================================
+
+class TimingMetricsTests(ApiClientMixin, TempFilesMixin, TestCase):
+
+    def test_server_timing_and_request_id(self):
+        response = self.client.get("/api/history/", HTTP_X_REQUEST_ID="req-1")
+
+        self.assertEqual(response["X-Request-ID"], "req-1")
+        timing = response["Server-Timing"].split(", ")
+        self.assertRegex(timing[0], r'^db;dur=[\d.]+;desc="\d+ queries"$')
+        self.assertRegex(timing[-1], r"^total;dur=[\d.]+$")
+
+    async def test_async_views_count_their_queries(self):
+        from asgiref.sync import sync_to_async
+        from rest_framework.authtoken.models import Token
+
+        token = await sync_to_async(Token.objects.create)(user=self.user)
+        response = await self.async_client.get("/api/async/history/", headers={"Authorization": f"Token {token.key}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+    def test_metrics_allow_list(self):
+        with override_settings(METRICS_ALLOWED_IPS=["10.0.0.1"]):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="10.0.0.1").status_code, 200)
+        with override_settings(METRICS_ALLOWED_IPS=["*"]):
+            self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="192.0.2.7").status_code, 200)
+
+    @override_settings(METRICS_ALLOWED_IPS=["*"])
+    def test_exposition_format(self):
+        import re
+
+        self.client.get("/api/history/")
+        response = self.client.get("/metrics")
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4")
+        body = response.content.decode()
+
+        self.assertIn("# TYPE equipment_request_duration_seconds histogram", body)
+        self.assertIn("# TYPE equipment_scheduler_rejected_total counter", body)
+        self.assertRegex(
+            body, r'equipment_request_duration_seconds_bucket\{view="api/history/",method="GET",status="200",le="\+Inf"\} \d+'
+        )
+        sample = re.compile(r'^[a-z_]+(\{([a-z_]+="[^"]*",?)*\})? -?[\d.e+-]+$')
+        for line in body.splitlines():
+            if line and not line.startswith("# "):
+                self.assertRegex(line, sample)
+
+    def test_worker_spans_reach_the_web_process(self):
+        from concurrent.futures import ProcessPoolExecutor
+        from .instrumentation import STAGE_DURATION
+        from .scheduler import FairScheduler
+        from .workers import _init_worker
+
+        def read_csv_count():
+            return STAGE_DURATION.series.get(("read_csv",), [None, 0, 0])[2]
+
+        path = self.write("plant.csv", DATASET_CSV)
+        pool = ProcessPoolExecutor(1, initializer=_init_worker)
+        self.addCleanup(pool.shutdown)
+        scheduler = FairScheduler(pool, 1, max_queue=4, max_queue_per_user=4, aging=0)
+
+        before = read_csv_count()
+        summary, _ = scheduler.submit(analyze_dataset, path).result(timeout=60)
+        self.assertEqual(summary["total_count"], 3)
+        self.assertEqual(read_csv_count(), before + 1)
+
+
+# ============================================================
+# ✅ Per-Request Profiling (staff only)
+# ============================================================
+
+class ProfilingTests(ApiClientMixin, TempFilesMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        profiles = override_settings(PROFILE_ENABLED=True, PROFILE_ROOT=self.tmp)
+        profiles.enable()
+        self.addCleanup(profiles.disable)
+
+    def staff_client(self):
+        from rest_framework.authtoken.models import Token
+
+        staff = User.objects.create_user("root", password="pw", is_staff=True)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=staff).key}")
+        return client
+
+    def test_non_staff_requests_are_not_profiled(self):
+        for response in (
+            self.client.get("/api/history/", HTTP_X_PROFILE="cprofile"),
+            self.client.get("/api/history/?profile=1"),
+            APIClient().get("/api/history/?profile=1", HTTP_AUTHORIZATION="Token nope"),
+        ):
+            self.assertNotIn("X-Profile", response)
+        self.assertEqual(os.listdir(self.tmp), [])
+
+    def test_disabled_profiling_ignores_staff(self):
+        with override_settings(PROFILE_ENABLED=False):
+            response = self.staff_client().get("/api/history/", HTTP_X_PROFILE="cprofile")
+        self.assertNotIn("X-Profile", response)
+        self.assertEqual(os.listdir(self.tmp), [])
+
+    def test_cprofile_artifacts(self):
+        import json
+        import pstats
+
+        response = self.staff_client().get("/api/history/?profile=1", HTTP_X_REQUEST_ID="prof-1")
+        self.assertEqual((response.status_code, response["X-Profile"]), (200, "prof-1"))
+
+        path = os.path.join(self.tmp, "prof-1")
+        self.assertEqual(
+            sorted(os.listdir(path)),
+            ["allocations.txt", "meta.json", "profile.pstats", "profile.txt", "stacks.collapsed"],
+        )
+        self.assertGreater(pstats.Stats(os.path.join(path, "profile.pstats")).total_calls, 0)
+        with open(os.path.join(path, "allocations.txt")) as f:
+            self.assertRegex(f.readline(), r"^peak: [\d.]+ MB$")
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.assertEqual((meta["status"], meta["mode"], meta["user"]), (200, "cprofile", "root"))
+
+    def test_sampling_artifacts_and_unsafe_request_ids(self):
+        response = self.staff_client().get("/api/history/", HTTP_X_PROFILE="sampling", HTTP_X_REQUEST_ID="../x")
+
+        name = response["X-Profile"]
+        self.assertRegex(name, r"^[0-9a-f]{32}$")
+        self.assertEqual(os.listdir(self.tmp), [name])
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.tmp, name))), ["allocations.txt", "meta.json", "stacks.collapsed"]
+        )
+        with open(os.path.join(self.tmp, name, "stacks.collapsed")) as f:
+            for line in f:
+                self.assertRegex(line, r"^\S.* \d+$")
+
+
+# ============================================================
+# ✅ Columnar Store (segments, paging, lazy build)
+# ============================================================
+
+class ColumnarStoreTests(ApiClientMixin, MediaRootMixin, TestCase):
+
+    def frames(self):
+        import pandas as pd
+
+        def frame(names, types):
+            return pd.DataFrame({
+                "Equipment Name": names, "Type": types,
+                "Flowrate": [float(i) for i in range(len(names))], "Pressure": 1.5, "Temperature": 20.0,
+            })
+
+        return [
+            frame(["P1", "V1", "P2"], ["Pump", "Valve", "Pump"]),
+            frame(["R1", "P3"], ["Reactor", "Pump"]),
+            frame(["C1", "V2", "P4", "C2"], ["Chiller", "Valve", "Pump", "Chiller"]),
+        ]
+
+    def build(self):
+        from .columnar import write_store
+
+        first, *rest = self.frames()
+        store = write_store(os.path.join(self.tmp, "store"), first)
+        for df in rest:
+            store.append(df)
+        return store
+
+    def expected(self, eq_type=None):
+        import pandas as pd
+
+        rows = pd.concat(self.frames(), ignore_index=True).to_dict(orient="records")
+        return [row for row in rows if eq_type in (None, row["Type"])]
+
+    def test_appends_add_segments_and_type_codes(self):
+        from .columnar import ColumnarStore
+
+        store = ColumnarStore(self.build().path)
+        self.assertEqual([seg["rows"] for seg in store.meta["segments"]], [3, 2, 4])
+        self.assertEqual(store.types, ["Pump", "Valve", "Reactor", "Chiller"])
+        self.assertEqual(len(store), 9)
+        self.assertEqual(list(store.type_column()), [row["Type"] for row in self.expected()])
+        self.assertEqual(sorted(os.listdir(store.path)), ["meta.json", "seg-0000", "seg-0001", "seg-0002"])
+
+    def test_pages_cross_segment_boundaries(self):
+        store = self.build()
+
+        for eq_type in (None, "Pump", "Chiller", "Valve"):
+            expected = self.expected(eq_type)
+            for offset in range(len(expected) + 1):
+                for limit in (1, 2, 3, 9):
+                    total, rows = store.rows(offset, limit, eq_type=eq_type)
+                    self.assertEqual(total, len(expected))
+                    self.assertEqual(rows, expected[offset:offset + limit], (eq_type, offset, limit))
+
+        self.assertEqual(store.rows(0, 10, eq_type="Mixer"), (0, []))
+
+    def test_missing_store_is_built_from_the_csv(self):
+        from .columnar import open_store, store_path
+
+        dataset = self.create_dataset()
+        shutil.rmtree(store_path(dataset.file.name))
+
+        store = open_store(dataset)
+        self.assertTrue(os.path.isfile(os.path.join(store_path(dataset.file.name), "meta.json")))
+        self.assertEqual(len(store), dataset.summary["total_count"])
+        self.assertEqual(store.rows(0, 1)[1][0]["Equipment Name"], "Pump-1")
+
+
+class ReportBatchZipTests(ApiClientMixin, MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        from .scheduler import FairScheduler
+
+        scheduler = FairScheduler(InlineExecutor(), 1, max_queue=8, max_queue_per_user=8, aging=0)
+        patcher = mock.patch("equipment.views.get_scheduler", return_value=scheduler)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def download(self, query):
+        import io
+        import zipfile
+
+        response = self.client.get(f"/api/reports/batch/{query}")
+        self.assertEqual((response.status_code, response["Content-Type"]), (200, "application/zip"))
+        return zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+
+    def test_multi_dataset_zip(self):
+        mine = [self.create_dataset(name=f"{i}.csv") for i in range(2)]
+        theirs = self.create_dataset(user=User.objects.create_user("bob"), name="bob.csv")
+        ids = [mine[0].id, mine[1].id, theirs.id, 999]
+
+        archive = self.download(f"?charts=vector&ids={','.join(map(str, ids))}")
+        self.assertEqual(
+            sorted(archive.namelist()), sorted([f"report_{d.id}.pdf" for d in mine] + ["errors.txt"])
+        )
+        for dataset in mine:
+            self.assertTrue(archive.read(f"report_{dataset.id}.pdf").startswith(b"%PDF"))
+        self.assertEqual(
+            archive.read("errors.txt").decode().splitlines(),
+            [f"report_{theirs.id}.pdf: Not found", "report_999.pdf: Not found"],
+        )
+
+        # ✅ Rendered reports were cached: the next ZIP renders nothing
+        with mock.patch("equipment.views.render_pdf", side_effect=AssertionError("rendered")):
+            again = self.download(f"?charts=vector&ids={mine[0].id}")
+        self.assertEqual(again.read(f"report_{mine[0].id}.pdf"), archive.read(f"report_{mine[0].id}.pdf"))
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get("/api/reports/batch/?ids=1,x").status_code, 400)
+        self.assertEqual(self.client.get("/api/reports/batch/?charts=svg").status_code, 400)
+        self.assertEqual(self.client.get("/api/reports/batch/?ids=999").status_code, 404)
+
+
+class LoadTestTests(ApiClientMixin, MediaRootMixin, TestCase):
+
+    def test_report_without_dataset_is_recorded_apart(self):
+        import io
+        import json
+        import threading
+
+        from .loadtest import REPORT_UPLOAD, Stats, VirtualUser
+
+        def urlopen(request, timeout):
+            body = {"dataset_id": 7} if request.get_method() == "POST" else {}
+            response = mock.MagicMock(status=200)
+            response.__enter__.return_value = response
+            response.read.return_value = json.dumps(body).encode()
+            return response
+
+        stats = Stats()
+        config = {"base_url": "http://test", "csv_bytes": b"a\n1\n", "timeout": 1,
+                  "report_query": "", "run_id": "t", "seed": 1}
+        user = VirtualUser(0, config, stats, threading.Event())
+        with mock.patch("equipment.loadtest.urlopen", urlopen):
+            user.report()
+            user.report()
+
+        rows = stats.report(1.0)
+        self.assertEqual({name: row["requests"] for name, row in rows.items()},
+                         {REPORT_UPLOAD: 1, "report": 1})
+
+    def test_cleanup_removes_run_users_and_datasets(self):
+        from .loadtest import cleanup_load_users
+        from .models import DatasetUpload
+
+        runner = User.objects.create_user("load_abc_0")
+        dataset = self.create_dataset(user=runner)
+        User.objects.create_user("load_abc_1")
+        User.objects.create_user("load_xyz_0")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(cleanup_load_users("abc"), 2)
+        self.assertFalse(DatasetUpload.objects.filter(pk=dataset.pk).exists())
+        self.assertFalse(os.path.exists(dataset.file.path))
+        self.assertEqual(cleanup_load_users(), 1)
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+
+    def test_error_rate_over_limit_raises(self):
+        import io
+
+        from django.core.management import CommandError, call_command
+
+        results = {
+            "meta": {"elapsed": 1.0, "run_id": "t"},
+            "endpoints": {"history": {
+                "requests": 4, "errors": 2, "error_rate": 0.5, "throughput_rps": 4.0,
+                "p50_ms": 1.0, "p95_ms": 1.0, "p99_ms": 1.0, "statuses": {},
+            }},
+        }
+        with mock.patch("equipment.management.commands.loadtest.run_load_test", return_value=results), \
+                self.assertRaisesMessage(CommandError, "Error rate over limit: history"):
+            call_command("loadtest", "--max-error-rate", "0.1", stdout=io.StringIO())
@@ -0,0 +1,176 @@
+import contextlib
+import functools
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import (
+    FileUploadHandler, StopFutureHandlers, StopUpload,
+)
+
+from .analytics import StreamingAnalyzer
+from .columnar import store_path
+from .compression import compressing_writer, resolve_codec
+from .instrumentation import span
+from .models import DatasetUpload
+
+
+# ============================================================
+# ✅ Analyze-While-Receiving Upload Handler
+# Each incoming chunk is written once to uploads/datasets/ (compressed
+# on the fly, see compression.py), hashed and fed to the streaming
+# analyzer. A bad header stops the upload
+# after the first chunk; the summary is ready with the last byte.
+# Each batch is analyzed in the request thread, in a worker slot held
+# through the request's reservation (fair share + worker bound like
+# pool jobs, sized by Content-Length).
+# Bodies of PARALLEL_ANALYSIS_MIN_BYTES and more skip it (see install).
+# ============================================================
+
+class AnalyzedUploadedFile(UploadedFile):
+    """The stored CSV plus everything computed while it was received."""
+
+    def __init__(self, path, storage_name, name, content_type, size, charset,
+                 summary, aggregates, sha256):
+        super().__init__(open(path, "rb"), name, content_type, size, charset)
+        self.storage_name = storage_name
+        self.summary = summary
+        self.aggregates = aggregates
+        self.sha256 = sha256
+
+
+class AnalyzingUploadHandler(FileUploadHandler):
+
+    def __init__(self, request=None, field_name="file", reservation=None):
+        super().__init__(request)
+        self.field_name = field_name
+        self.reservation = reservation
+        self.active = False
+        self.done = False
+        self.error = None
+        self.body_length = 0
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.body_length = content_length or 0
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+
+        # ✅ Other fields / extra files go to the default handlers
+        if field_name != self.field_name or self.done:
+            return
+
+        self.active = self.done = True
+        self.storage_name, self.path, fd = self.open_destination(file_name)
+        self.raw = os.fdopen(fd, "wb")
+        self.destination = compressing_writer(self.raw, resolve_codec())
+        self.last_byte = b"\n"
+        self.hasher = hashlib.sha256()
+        self.analyzer = StreamingAnalyzer(store=store_path(self.storage_name), slot=self.slot())
+        self.seen = 0
+
+        raise StopFutureHandlers()
+
+    def slot(self):
+        if self.reservation is None:
+            return contextlib.nullcontext
+        return functools.partial(self.reservation.hold, cost=self.body_length)
+
+    def open_destination(self, file_name):
+        """Reserves a unique name under datasets/ (O_EXCL: no races)."""
+        file_field = DatasetUpload._meta.get_field("file")
+        while True:
+            name = default_storage.get_available_name(file_field.generate_filename(None, file_name))
+            path = default_storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                return name, path, os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                continue
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+
+        self.destination.write(raw_data)
+        self.last_byte = raw_data[-1:] or self.last_byte
+        self.hasher.update(raw_data)
+        self.seen += len(raw_data)
+
+        try:
+            with span("analyze_stream"):
+                self.analyzer.feed(raw_data)
+        except ValueError as e:
+            self.reject(str(e))
+
+        return None
+
+    def reject(self, message):
+        self.error = message
+        self.discard()
+
+        # ✅ Big bodies: reset instead of draining the rest of the transfer
+        remaining = self.body_length - self.seen
+        raise StopUpload(connection_reset=remaining > settings.UPLOAD_REJECT_DRAIN_BYTES)
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+
+        # ✅ Stored files end with a newline (appends rely on it)
+        if self.last_byte != b"\n":
+            self.destination.write(b"\n")
+        self.close_destination()
+        self.active = False
+
+        try:
+            with span("analyze_stream"):
+                summary, aggregates = self.analyzer.finish()
+        except ValueError as e:
+            self.error = str(e)
+            self.discard()
+            raise StopUpload()
+
+        return AnalyzedUploadedFile(
+            self.path, self.storage_name, self.file_name, self.content_type,
+            file_size, self.charset, summary, aggregates, self.hasher.hexdigest()
+        )
+
+    def close_destination(self):
+        # gzip writers leave the underlying file open
+        self.destination.close()
+        self.raw.close()
+
+    def discard(self):
+        self.active = False
+        self.close_destination()
+        self.analyzer.discard()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def upload_interrupted(self):
+        if self.active:
+            self.discard()
+
+
+def install(request, reservation=None):
+    """
+    Puts the analyzing handler first for this request (before the body
+    is parsed); its batches run in slots of ``reservation``. Returns ``None`` when streaming analysis is disabled or
+    the body is big enough for parallel analysis: the stream is parsed
+    on one core, byte ranges use them all (the bad-header check then
+    waits for the whole body).
+    """
+    if not settings.STREAMING_UPLOAD_ANALYSIS:
+        return None
+    try:
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+    if length >= settings.PARALLEL_ANALYSIS_MIN_BYTES:
+        return None
+    handler = AnalyzingUploadHandler(request, reservation=reservation)
+    request.upload_handlers.insert(0, handler)
+    return handler
@@ -1,9 +1,28 @@
 from django.urls import path
-from .views import UploadCSVView, HistoryView, ReportView, SignupView
+from .views import (
+    UploadCSVView, UploadBatchView, AppendCSVView, DatasetDownloadView, DatasetRowsView, DatasetPercentilesView, DatasetQueryView, DatasetSearchView, HistoryView, ReportView, ReportBatchView, SignupView,
+    LogoutView, RotateTokenView,
+)
+from .async_views import AsyncUploadCSVView, AsyncHistoryView, AsyncReportView
 
 urlpatterns = [
     path("signup/", SignupView.as_view()), 
+    path("logout/", LogoutView.as_view()),
+    path("token/rotate/", RotateTokenView.as_view()),
     path("upload/", UploadCSVView.as_view()),
+    path("upload/batch/", UploadBatchView.as_view()),
+    path("datasets/search/", DatasetSearchView.as_view()),
+    path("datasets/percentiles/", DatasetPercentilesView.as_view()),
+    path("datasets/<int:dataset_id>/append/", AppendCSVView.as_view()),
+    path("datasets/<int:dataset_id>/rows/", DatasetRowsView.as_view()),
+    path("datasets/<int:dataset_id>/download/", DatasetDownloadView.as_view()),
+    path("query/", DatasetQueryView.as_view()),
     path("history/", HistoryView.as_view()),
     path("report/<int:dataset_id>/", ReportView.as_view()),
+    path("reports/batch/", ReportBatchView.as_view()),
+
+    # ✅ Async versions (ASGI / uvicorn workers)
+    path("async/upload/", AsyncUploadCSVView.as_view()),
+    path("async/history/", AsyncHistoryView.as_view()),
+    path("async/report/<int:dataset_id>/", AsyncReportView.as_view()),
 ]
\ No newline at end of file
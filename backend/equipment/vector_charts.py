@@ -0,0 +1,205 @@
+from reportlab.lib import colors
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.graphics.charts.barcharts import VerticalBarChart, HorizontalBarChart
+from reportlab.graphics.charts.doughnut import Doughnut
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.widgets.markers import makeMarker
+
+from .chart_style import PALETTE, KPI_COLORS, METRICS, as_number
+
+
+# ============================================================
+# ✅ Vector Chart Backend (ReportLab graphics, no rasterizing)
+# Same four charts as the matplotlib backend, drawn as vectors
+# ============================================================
+
+GRID_COLOR = colors.HexColor("#cbd5e1")
+
+
+def _title(drawing, text):
+    drawing.add(String(
+        drawing.width / 2, drawing.height - 16, text,
+        fontName="Helvetica-Bold", fontSize=13, textAnchor="middle"
+    ))
+
+
+def _style_labels(*axes):
+    for axis in axes:
+        axis.labels.fontName = "Helvetica"
+        axis.labels.fontSize = 8
+
+
+def _style_grid(axis):
+    axis.visibleGrid = True
+    axis.gridStrokeColor = GRID_COLOR
+    axis.gridStrokeDashArray = (2, 2)
+    axis.gridStrokeWidth = 0.5
+
+
+# ------------------------------------------------------------
+# ✅ Bar Chart - Equipment Distribution
+# ------------------------------------------------------------
+
+def bar_drawing(summary, width, height):
+    labels = list(summary["type_distribution"].keys())
+    values = list(summary["type_distribution"].values())
+
+    drawing = Drawing(width, height)
+    _title(drawing, "Equipment Distribution")
+
+    chart = VerticalBarChart()
+    chart.x, chart.y = 45, 50
+    chart.width, chart.height = width - 60, height - 85
+    chart.data = [values or [0]]
+    chart.categoryAxis.categoryNames = labels or [""]
+    chart.categoryAxis.labels.angle = 25
+    chart.categoryAxis.labels.boxAnchor = "ne"
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.valueMax = (max(values) if values else 1) * 1.12
+    _style_labels(chart.categoryAxis, chart.valueAxis)
+    _style_grid(chart.valueAxis)
+
+    chart.bars.strokeColor = colors.black
+    chart.bars.strokeWidth = 0.7
+    for i in range(len(values)):
+        chart.bars[(0, i)].fillColor = colors.HexColor(PALETTE[i % len(PALETTE)])
+
+    chart.barLabelFormat = "%d"
+    chart.barLabels.nudge = 7
+    chart.barLabels.fontName = "Helvetica-Bold"
+    chart.barLabels.fontSize = 8
+
+    drawing.add(chart)
+    return drawing
+
+
+# ------------------------------------------------------------
+# ✅ Donut Chart - Percentage Breakdown
+# ------------------------------------------------------------
+
+def donut_drawing(summary, width, height):
+    labels = list(summary["type_distribution"].keys())
+    values = list(summary["type_distribution"].values())
+    total = sum(values) or 1
+
+    drawing = Drawing(width, height)
+    _title(drawing, "Equipment Distribution (%)")
+
+    size = height - 70
+    chart = Doughnut()
+    chart.x, chart.y = (width - size) / 2, 20
+    chart.width = chart.height = size
+    chart.data = values or [1]
+    chart.labels = [f"{label} {v / total * 100:.1f}%" for label, v in zip(labels, values)]
+    chart.startAngle = 90
+    chart.innerRadiusFraction = 0.6
+    chart.slices.strokeColor = colors.white
+    chart.slices.strokeWidth = 2
+    chart.slices.fontName = "Helvetica-Bold"
+    chart.slices.fontSize = 8
+    for i in range(len(values)):
+        chart.slices[i].fillColor = colors.HexColor(PALETTE[i % len(PALETTE)])
+
+    drawing.add(chart)
+    return drawing
+
+
+# ------------------------------------------------------------
+# ✅ Line Chart - Performance Metrics Trend
+# ------------------------------------------------------------
+
+def line_drawing(summary, width, height):
+    avg_values = [
+        as_number(summary["avg_flowrate"]),
+        as_number(summary["avg_pressure"]),
+        as_number(summary["avg_temperature"]),
+    ]
+    max_val = max(avg_values) or 1
+    normalized = [v / max_val * 100 for v in avg_values]
+
+    drawing = Drawing(width, height)
+    _title(drawing, "Average Performance Metrics")
+
+    chart = LinePlot()
+    chart.x, chart.y = 45, 35
+    chart.width, chart.height = width - 60, height - 70
+    chart.data = [list(enumerate(normalized))]
+
+    x_min, x_max, y_max = -0.3, len(METRICS) - 0.7, 110
+    chart.xValueAxis.valueMin, chart.xValueAxis.valueMax = x_min, x_max
+    chart.xValueAxis.valueSteps = list(range(len(METRICS)))
+    chart.xValueAxis.labelTextFormat = lambda i: METRICS[int(round(i))]
+    chart.yValueAxis.valueMin, chart.yValueAxis.valueMax = 0, y_max
+    _style_labels(chart.xValueAxis, chart.yValueAxis)
+    _style_grid(chart.xValueAxis)
+    _style_grid(chart.yValueAxis)
+
+    chart.lines[0].strokeColor = colors.HexColor("#2563eb")
+    chart.lines[0].strokeWidth = 2.5
+    chart.lines[0].symbol = makeMarker("FilledCircle")
+    chart.lines[0].symbol.fillColor = colors.HexColor("#ef4444")
+    chart.lines[0].symbol.strokeColor = colors.HexColor("#2563eb")
+    chart.lines[0].symbol.size = 7
+
+    drawing.add(chart)
+
+    # ✅ Value labels above each point
+    for i, (val, norm) in enumerate(zip(avg_values, normalized)):
+        x = chart.x + (i - x_min) / (x_max - x_min) * chart.width
+        y = chart.y + norm / y_max * chart.height + 7
+        drawing.add(String(x, y, f"{val:.2f}", fontName="Helvetica-Bold",
+                           fontSize=8, textAnchor="middle"))
+
+    return drawing
+
+
+# ------------------------------------------------------------
+# ✅ KPI Chart - Statistics Summary
+# ------------------------------------------------------------
+
+def kpi_drawing(summary, width, height):
+    values_display = [
+        summary["total_count"],
+        as_number(summary["avg_flowrate"]),
+        as_number(summary["avg_pressure"]),
+        as_number(summary["avg_temperature"]),
+    ]
+    top = max(values_display) or 1
+
+    drawing = Drawing(width, height)
+    _title(drawing, "Key Performance Indicators")
+
+    chart = HorizontalBarChart()
+    chart.x, chart.y = 95, 30
+    chart.width, chart.height = width - 120, height - 60
+    chart.data = [values_display]
+    chart.categoryAxis.categoryNames = [
+        "Total Equipment", "Avg Flowrate", "Avg Pressure", "Avg Temperature"
+    ]
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.valueMax = top * 1.18
+    _style_labels(chart.categoryAxis, chart.valueAxis)
+    _style_grid(chart.valueAxis)
+
+    chart.bars.strokeColor = colors.black
+    chart.bars.strokeWidth = 0.7
+    for i, color in enumerate(KPI_COLORS):
+        chart.bars[(0, i)].fillColor = colors.HexColor(color)
+
+    chart.barLabelFormat = "%.2f"
+    chart.barLabels.boxAnchor = "w"
+    chart.barLabels.dx = 4
+    chart.barLabels.fontName = "Helvetica-Bold"
+    chart.barLabels.fontSize = 8
+
+    drawing.add(chart)
+    return drawing
+
+
+def vector_charts(summary, sizes):
+    """
+    Builds the four report charts as ReportLab drawings.
+    ``sizes`` holds one ``(width, height)`` per chart: bar, pie, line, stats.
+    """
+    builders = (bar_drawing, donut_drawing, line_drawing, kpi_drawing)
+    return tuple(build(summary, w, h) for build, (w, h) in zip(builders, sizes))
@@ -1,7 +1,20 @@
-from django.http import FileResponse
-from django.shortcuts import get_object_or_404
+import itertools
+import math
 import os
 
+from django.conf import settings
+from django.http import (
+    FileResponse, HttpResponse, HttpResponseForbidden,
+    HttpResponseNotModified, StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404
+from django.utils.http import content_disposition_header
+from django.db import transaction
+from django.core.files import File
+from django.core.files.storage import default_storage
+from io import BytesIO
+from concurrent.futures import as_completed
+
 from django.contrib.auth.models import User
 from rest_framework.permissions import AllowAny
 
@@ -9,16 +22,30 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser
-
-from .models import DatasetUpload
-from .analytics import analyze_csv
-from .serializers import DatasetUploadSerializer
-from .report import generate_pdf
+from rest_framework.authtoken.models import Token
+from rest_framework.authtoken.serializers import AuthTokenSerializer
+
+from .models import STAT_FIELDS, DatasetUpload
+from .analytics import (
+    analyze_and_compress, read_csv_checked, clean_frame,
+    compute_aggregates, merge_aggregates, build_summary, append_rows,
+)
+from .serializers import DatasetSearchSerializer
+from .pagination import KeysetPagination
+from .report import render_pdf, report_snapshot, resolve_chart_backend
+from .archive import iter_upload_files, stream_zip
+from .compression import iter_csv
+from .scheduler import analyze_scheduled, get_scheduler
+from .columnar import open_store, store_path
+from .instrumentation import render_metrics, span
+from .authentication import is_expired, token_expires_at
+from .upload_handlers import AnalyzedUploadedFile
+from . import cache, history, percentiles, query, storage, upload_handlers
 
 
 # ============================================================
 # ✅ CSV Upload Endpoint
-# ✅ Per User Upload + Auto Cleanup (Keep Last 5 Only)
+# ✅ Per User Upload (old uploads: see retention.py)
 # ============================================================
 
 class UploadCSVView(APIView):
@@ -27,63 +54,495 @@ class UploadCSVView(APIView):
 
     def post(self, request):
 
-        file = request.FILES.get("file")
+        # ✅ Busy server: 429 + Retry-After before the body is received
+        with get_scheduler().admit(request.user.id) as reservation:
+            return self.upload(request, reservation)
+
+    def upload(self, request, reservation):
+
+        # ✅ Analyze-while-receiving: written once, hashed + aggregated per chunk
+        handler = upload_handlers.install(request, reservation)
+
+        # ✅ Multipart parsing = receiving (and analyzing) the upload
+        with span("upload_spool"):
+            file = request.FILES.get("file")
+
+        if handler and handler.error:
+            return Response({"error": handler.error}, status=400)
 
         if not file:
             return Response({"error": "CSV file is required"}, status=400)
 
-        # ✅ Save dataset linked to current logged-in user
-        dataset = DatasetUpload.objects.create(
-            user=request.user,
-            file=file,
-            filename=file.name,
-            summary={}
-        )
+        if isinstance(file, AnalyzedUploadedFile):
+            # ✅ Already stored + analyzed: just record it
+            summary, aggregates = file.summary, file.aggregates
+            dataset = DatasetUpload.objects.create(
+                user=request.user,
+                file=file.storage_name,
+                filename=file.name,
+                summary=summary,
+                aggregates=aggregates,
+                sha256=file.sha256,
+            )
+        else:
+            # ✅ Save dataset linked to current logged-in user
+            dataset = DatasetUpload.objects.create(
+                user=request.user,
+                file=file,
+                filename=file.name,
+                summary={}
+            )
+
+            # ✅ Analyze + compress as scheduled jobs (big files: byte ranges
+            # across all cores); file_size follows the compressed file on save
+            # A failed analysis must not leave the row or its files behind
+            try:
+                with span("analyze_csv"):
+                    summary, aggregates = analyze_scheduled(
+                        reservation, dataset.file.path, store=store_path(dataset.file.name)
+                    )
+            except Exception as e:
+                dataset.delete()
+                if isinstance(e, ValueError):
+                    return Response({"error": str(e)}, status=400)
+                raise
+
+            # ✅ Save analysis summary + running aggregates in DB
+            dataset.summary = summary
+            dataset.aggregates = aggregates
+            dataset.save()
+
+        # ✅ New dataset: cached history list is stale
+        cache.invalidate(request.user.id)
+
+        return Response({
+            "message": "File uploaded successfully ✅",
+            "dataset_id": dataset.id,
+            "summary": summary
+        })
+
+
+# ============================================================
+# ✅ Batch Upload Endpoint
+# Many CSVs (or a ZIP of CSVs) in one request: analyzed in parallel,
+# stored with one bulk_create, retention applied once at the end
+# ============================================================
 
-        # ✅ Analyze CSV file
-        summary = analyze_csv(dataset.file.path)
+class UploadBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
 
-        # ✅ Save analysis summary in DB
-        dataset.summary = summary
-        dataset.save()
+    def post(self, request):
 
-        # =====================================================
-        # ✅ DATA HANDLING REQUIREMENT
-        # Keep ONLY last 5 uploads per user
-        # Delete older datasets + files + reports
-        # =====================================================
+        # ✅ Busy server: 429 + Retry-After before the body is received
+        with get_scheduler().admit(request.user.id) as reservation:
+            return self.upload(request, reservation)
+
+    def upload(self, request, reservation):
+
+        with span("upload_spool"):
+            uploaded_files = request.FILES.getlist("files") or request.FILES.getlist("file")
+
+        if not uploaded_files:
+            return Response({"error": "At least one CSV or ZIP file is required"}, status=400)
+
+        # ✅ Store every CSV first (ZIP members streamed to disk)
+        stored, failed = [], []
+        file_field = DatasetUpload._meta.get_field("file")
+
+        for filename, content, error in iter_upload_files(
+            uploaded_files, settings.UPLOAD_BATCH_MAX_FILE_SIZE
+        ):
+            if error:
+                failed.append({"filename": filename, "error": error})
+                continue
+            if len(stored) >= settings.UPLOAD_BATCH_MAX_FILES:
+                failed.append({
+                    "filename": filename,
+                    "error": f"Batch limit of {settings.UPLOAD_BATCH_MAX_FILES} files reached"
+                })
+                continue
+
+            name = default_storage.save(
+                file_field.generate_filename(None, filename), File(content, name=filename)
+            )
+            stored.append((filename, name))
+
+        # ✅ One queue slot per file: what doesn't fit is rejected per file
+        reservation.extend(len(stored) - reservation.slots)
+        stored, rejected = stored[:reservation.slots], stored[reservation.slots:]
+        for filename, name in rejected:
+            storage.remove_paths(storage.file_artifacts(name))
+            failed.append({
+                "filename": filename,
+                "error": "Server is busy, retry later",
+                "status": 429,
+                "retry_after": reservation.wait,
+            })
+
+        # ✅ Analyze all files in parallel (scheduled jobs, smallest first)
+        with span("analyze_csv"):
+            futures = [
+                (filename, name, reservation.submit(
+                    analyze_and_compress, default_storage.path(name), store_path(name),
+                    cost=default_storage.size(name),
+                ))
+                for filename, name in stored
+            ]
+
+            datasets = []
+            for filename, name, future in futures:
+                try:
+                    summary, aggregates = future.result()
+                except Exception as e:
+                    storage.remove_paths(storage.file_artifacts(name))
+                    failed.append({"filename": filename, "error": str(e)})
+                    continue
+
+                datasets.append(DatasetUpload(
+                    user=request.user,
+                    file=name,
+                    filename=filename,
+                    summary=summary,
+                    aggregates=aggregates
+                ))
+
+        # ✅ One INSERT for the whole batch
+        # (bulk_create skips save(): fill the stat + size columns here)
+        for dataset in datasets:
+            dataset.refresh_stats()
+            dataset.refresh_file_size()
+        datasets = DatasetUpload.objects.bulk_create(datasets)
+
+        if datasets:
+            cache.invalidate(request.user.id)
+
+        # ✅ Nothing stored because the queue was full: retry the batch later
+        status = 200 if datasets else 429 if rejected else 400
+
+        response = Response({
+            "message": f"{len(datasets)} file(s) uploaded successfully ✅",
+            "datasets": [
+                {
+                    "dataset_id": d.id,
+                    "filename": d.filename,
+                    "summary": d.summary,
+                }
+                for d in datasets
+            ],
+            "failed": failed
+        }, status=status)
+        if status == 429:
+            response["Retry-After"] = str(reservation.wait)
+        return response
 
-        uploads = DatasetUpload.objects.filter(
-            user=request.user
-        ).order_by("-uploaded_at")
 
-        if uploads.count() > 5:
-            old_uploads = uploads[5:]  # everything older than latest 5
+# ============================================================
+# ✅ Append Endpoint (Incremental Updates)
+# Accepts ONLY new rows and merges them into running aggregates
+# ============================================================
+
+class AppendCSVView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
 
-            for old in old_uploads:
+    def post(self, request, dataset_id):
 
-                # ✅ Delete CSV file from disk
-                if old.file and os.path.isfile(old.file.path):
-                    os.remove(old.file.path)
+        with span("upload_spool"):
+            file = request.FILES.get("file")
 
-                # ✅ Delete old PDF report if generated earlier
-                pdf_path = f"uploads/report_{old.id}.pdf"
-                if os.path.isfile(pdf_path):
-                    os.remove(pdf_path)
+        if not file:
+            return Response({"error": "CSV file is required"}, status=400)
 
-                # ✅ Finally delete DB row
-                old.delete()
+        # ✅ Analyze ONLY the new rows (cost proportional to the delta)
+        try:
+            raw = read_csv_checked(file)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        delta_df = clean_frame(raw)
+        delta = compute_aggregates(delta_df)
+
+        # ✅ File writes are undone unless the row update commits:
+        # the CSV is cut back to its old size, the staged segment is
+        # only published after the commit
+        written = staged = None
+
+        def publish():
+            nonlocal written, staged
+            segment, written, staged = staged, None, None
+            store.publish(segment)
+
+        try:
+            with transaction.atomic():
+                dataset = get_object_or_404(
+                    DatasetUpload.objects.filter(id=dataset_id, user=request.user).select_for_write()
+                )
+
+                # ✅ Older uploads have no aggregates yet: backfill once
+                # (from the columnar store, built from the CSV if missing)
+                store = open_store(dataset)
+                base = dataset.aggregates
+                if not base:
+                    base = compute_aggregates(store.frame())
+
+                aggregates = merge_aggregates(base, delta)
+
+                dataset.summary = build_summary(aggregates, delta_df, previous=dataset.summary)
+                dataset.aggregates = aggregates
+                dataset.version += 1
+                dataset.save()
+
+                # ✅ Keep stored CSV complete for later re-analysis
+                written = (dataset.file.path, os.path.getsize(dataset.file.path))
+                append_rows(dataset.file.path, raw)
+
+                # ✅ New rows become a new columnar segment
+                staged = store.stage(delta_df)
+                transaction.on_commit(publish)
+
+                cache.invalidate(request.user.id, [dataset.id])
+        except BaseException:
+            if written:
+                os.truncate(*written)
+            if staged:
+                store.discard(staged)
+            raise
 
         return Response({
-            "message": "File uploaded successfully ✅",
+            "message": "Rows appended successfully ✅",
             "dataset_id": dataset.id,
-            "summary": summary
+            "version": dataset.version,
+            "appended_count": delta["count"],
+            "summary": dataset.summary
+        })
+
+
+# ============================================================
+# ✅ Rows Endpoint (Paging over the columnar store)
+# /api/datasets/<id>/rows/?offset=0&limit=100&type=Pump
+# ============================================================
+
+MAX_PAGE_ROWS = 1000
+
+
+class DatasetRowsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, dataset_id):
+
+        dataset = get_object_or_404(DatasetUpload, id=dataset_id, user=request.user)
+
+        try:
+            offset = max(0, int(request.query_params.get("offset", 0)))
+            limit = min(MAX_PAGE_ROWS, max(1, int(request.query_params.get("limit", 100))))
+        except ValueError:
+            return Response({"error": "offset and limit must be integers"}, status=400)
+
+        try:
+            store = open_store(dataset)
+        except (OSError, ValueError) as e:
+            return Response({"error": f"Dataset cannot be read: {e}"}, status=409)
+
+        total, rows = store.rows(offset, limit, eq_type=request.query_params.get("type"))
+
+        return Response({
+            "dataset_id": dataset.id,
+            "version": dataset.version,
+            "count": total,
+            "offset": offset,
+            "limit": limit,
+            "columns": store.columns,
+            "rows": rows,
+        })
+
+
+# ============================================================
+# ✅ Download Endpoint (original CSV, decompressed on the fly)
+# /api/datasets/<id>/download/
+# ============================================================
+
+class DatasetDownloadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, dataset_id):
+
+        dataset = get_object_or_404(
+            DatasetUpload.objects.only("id", "file", "filename"), id=dataset_id, user=request.user
+        )
+
+        try:
+            chunks = iter_csv(dataset.file.path)
+            first = next(chunks, b"")
+        except OSError as e:
+            return Response({"error": f"Dataset cannot be read: {e}"}, status=409)
+
+        response = StreamingHttpResponse(
+            itertools.chain([first], chunks), content_type="text/csv; charset=utf-8"
+        )
+        response["Content-Disposition"] = content_disposition_header(True, dataset.filename)
+        return response
+
+
+# ============================================================
+# ✅ Dataset Search (indexed stat columns, keyset pagination)
+# GET /api/datasets/search/?min_avg_pressure=10&ordering=-avg_pressure
+# Filters: min_<field> / max_<field> for every stat column, filename
+# Ordering: uploaded_at (default, newest first) or a stat column
+# ============================================================
+
+SEARCH_ORDERING = {"uploaded_at": "id", **{field: field for field in STAT_FIELDS}}
+
+
+class DatasetSearchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+
+        datasets = DatasetUpload.objects.filter(user=request.user).only(
+            "id", "filename", "uploaded_at", "version", *STAT_FIELDS
+        )
+
+        try:
+            for field in STAT_FIELDS:
+                for bound, lookup in (("min", "gte"), ("max", "lte")):
+                    value = params.get(f"{bound}_{field}")
+                    if value not in (None, ""):
+                        number = float(value)
+                        # ✅ nan / inf parse as floats but can't be compared in SQL
+                        if not math.isfinite(number):
+                            raise ValueError(value)
+                        datasets = datasets.filter(**{f"{field}__{lookup}": number})
+        except ValueError:
+            return Response({"error": "min_/max_ filters must be finite numbers"}, status=400)
+
+        if params.get("filename"):
+            datasets = datasets.filter(filename__icontains=params["filename"])
+
+        ordering = params.get("ordering", "-uploaded_at")
+        field = SEARCH_ORDERING.get(ordering.lstrip("-"))
+        if field is None:
+            return Response(
+                {"error": f"ordering must be one of: {', '.join(SEARCH_ORDERING)}"}, status=400
+            )
+
+        # ✅ Datasets without valid rows have no averages: nothing to rank
+        datasets = datasets.exclude(**{f"{field}__isnull": True})
+
+        paginator = KeysetPagination(field, descending=ordering.startswith("-"))
+        page = paginator.paginate_queryset(datasets, request)
+
+        return paginator.get_paginated_response(DatasetSearchSerializer(page, many=True).data)
+
+
+# ============================================================
+# ✅ Ad-hoc Query Endpoint (embedded DuckDB)
+# POST /api/query/ with a JSON spec (see query.py), e.g.
+# "average pressure of pumps above 80 °C" — aggregated server-side
+# ============================================================
+
+class DatasetQueryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+
+        if not query.duckdb_available():
+            return Response({"error": "Ad-hoc queries need DuckDB installed on the server"}, status=501)
+
+        try:
+            spec = query.parse_spec(request.data, settings.QUERY_MAX_ROWS)
+        except query.QueryError as e:
+            return Response({"error": str(e)}, status=400)
+
+        datasets = DatasetUpload.objects.filter(user=request.user).only("id", "version", "file")
+
+        ids = request.data.get("datasets")
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+                return Response({"error": "datasets must be a list of ids"}, status=400)
+            datasets = datasets.filter(id__in=ids)
+
+        datasets = list(datasets.order_by("id"))
+        if ids is not None and len(datasets) != len(set(ids)):
+            return Response({"error": "Dataset not found"}, status=404)
+        if not datasets:
+            return Response({"error": "No datasets to query"}, status=404)
+        if len(datasets) > settings.QUERY_MAX_DATASETS:
+            return Response(
+                {"error": f"At most {settings.QUERY_MAX_DATASETS} datasets per query, pass their ids"},
+                status=400,
+            )
+
+        # ✅ Same spec + same dataset versions = same answer
+        digest = query.spec_hash(spec, datasets)
+        result = cache.get_query(digest)
+        cached = result is not None
+
+        if not cached:
+            try:
+                result = query.run_query(spec, datasets)
+            except query.QueryTimeout:
+                return Response({"error": "Query timed out"}, status=408)
+            except (OSError, ValueError) as e:
+                return Response({"error": f"Dataset cannot be read: {e}"}, status=409)
+            cache.set_query(digest, result)
+
+        return Response({
+            "datasets": {d.id: d.version for d in datasets},
+            "cached": cached,
+            **result,
+        })
+
+
+# ============================================================
+# ✅ Percentiles Endpoint (merged sketches, see percentiles.py)
+# /api/datasets/percentiles/?ids=1,2&q=0.5,0.99&type=Pump
+# ?scope=all merges every user's datasets (staff only)
+# ============================================================
+
+class DatasetPercentilesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+
+        try:
+            quantiles = percentiles.parse_quantiles(request.query_params.get("q"))
+            ids = [int(i) for i in request.query_params.get("ids", "").split(",") if i.strip()]
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        scope = request.query_params.get("scope", "user")
+        if scope not in ("user", "all"):
+            return Response({"error": "scope must be user or all"}, status=400)
+        if scope == "all" and not request.user.is_staff:
+            return Response({"error": "Only staff can aggregate across users"}, status=403)
+
+        datasets = DatasetUpload.objects.all() if scope == "all" else DatasetUpload.objects.filter(user=request.user)
+        if ids:
+            datasets = datasets.filter(id__in=ids)
+            if datasets.count() != len(set(ids)):
+                return Response({"error": "Dataset not found"}, status=404)
+
+        try:
+            sketches, backfilled = percentiles.load_sketches(datasets)
+        except (OSError, ValueError) as e:
+            return Response({"error": f"Dataset cannot be read: {e}"}, status=409)
+
+        if not sketches:
+            return Response({"error": "No datasets to aggregate"}, status=404)
+
+        return Response({
+            "datasets": len(sketches),
+            "backfilled": backfilled,
+            "quantiles": quantiles,
+            **percentiles.percentiles(sketches, quantiles, types=request.query_params.getlist("type")),
         })
 
 
 # ============================================================
 # ✅ History API Endpoint (Per User)
-# Returns last 5 uploads for current user
+# Keyset-paginated uploads of the current user, newest first
 # ============================================================
 
 class HistoryView(APIView):
@@ -91,12 +550,16 @@ class HistoryView(APIView):
 
     def get(self, request):
 
-        datasets = DatasetUpload.objects.filter(
-            user=request.user
-        ).order_by("-uploaded_at")[:5]
+        first_page = history.is_first_page(request)
+
+        # ✅ Hot path: first page straight from the cache
+        page = cache.get_history(request.user.id) if first_page else None
+        if page is None:
+            page = history.load_page(request)
+            if first_page:
+                cache.set_history(request.user.id, page)
 
-        serializer = DatasetUploadSerializer(datasets, many=True)
-        return Response(serializer.data)
+        return HttpResponse(history.render_page(request, *page), content_type="application/json")
 
 
 # ============================================================
@@ -109,23 +572,166 @@ class ReportView(APIView):
 
     def get(self, request, dataset_id):
 
-        dataset = get_object_or_404(
-            DatasetUpload,
-            id=dataset_id,
-            user=request.user
+        # ✅ Cached snapshot: cached reports / 304s need no DB access
+        dataset = cache.get_dataset(
+            dataset_id,
+            request.user.id,
+            lambda: get_object_or_404(DatasetUpload, id=dataset_id, user=request.user)
         )
 
-        # ✅ Generate report path
-        pdf_path = f"uploads/report_{dataset_id}.pdf"
-
-        # ✅ Generate PDF report
-        generate_pdf(dataset, pdf_path)
-
-        return FileResponse(
-            open(pdf_path, "rb"),
+        # ✅ Chart backend per request: ?charts=vector | matplotlib
+        try:
+            chart_backend = resolve_chart_backend(request.query_params.get("charts"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        # ✅ ETag follows dataset version (appends invalidate it)
+        etag = f'"report-{dataset.id}-v{dataset.version}-{chart_backend}"'
+        if etag in request.headers.get("If-None-Match", ""):
+            return HttpResponseNotModified(headers={"ETag": etag})
+
+        # ✅ Generate PDF report in memory (no temp files on disk)
+        pdf_bytes = cache.get_report(dataset, chart_backend)
+        if pdf_bytes is None:
+            # ✅ Rendered as a scheduled job (429 when the server is saturated)
+            with get_scheduler().admit(request.user.id) as reservation, span("pdf"):
+                pdf_bytes = reservation.submit(
+                    render_pdf, report_snapshot(dataset), chart_backend, kind="report",
+                ).result()
+            cache.set_report(dataset, chart_backend, pdf_bytes)
+
+        response = FileResponse(
+            BytesIO(pdf_bytes),
             as_attachment=True,
             filename=f"report_{dataset_id}.pdf"
         )
+        response["ETag"] = etag
+        return response
+
+
+# ============================================================
+# ✅ Batch Report Endpoint (Streamed ZIP)
+# /api/reports/batch/?ids=1,2,3  (no ids = all user datasets)
+# ============================================================
+
+class ReportBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+
+        try:
+            chart_backend = resolve_chart_backend(request.query_params.get("charts"))
+            ids = [int(i) for i in request.query_params.get("ids", "").split(",") if i.strip()]
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        datasets = DatasetUpload.objects.filter(user=request.user).order_by("-uploaded_at")
+        if ids:
+            datasets = datasets.filter(id__in=ids)
+        datasets = list(datasets)
+
+        if not datasets:
+            return Response({"error": "No datasets found"}, status=404)
+
+        # ✅ Requested ids that are missing or someone else's: errors.txt
+        unknown = sorted(set(ids) - {d.id for d in datasets})
+
+        # ✅ Rendering is scheduled: one queue slot per missing report, a
+        # busy server -> 429 before streaming starts; reports that don't
+        # fit in the queue are listed in errors.txt
+        cached = cache.get_reports(datasets, chart_backend)
+        missing = [d for d in datasets if d.id not in cached]
+
+        futures, busy = {}, []
+        if missing:
+            with get_scheduler().admit(request.user.id, jobs=len(missing)) as reservation:
+                missing, busy = missing[:reservation.slots], missing[reservation.slots:]
+                futures = {
+                    reservation.submit(render_pdf, report_snapshot(d), chart_backend, kind="report"): d
+                    for d in missing
+                }
+
+        response = StreamingHttpResponse(
+            stream_zip(self.iter_reports(datasets, cached, futures, busy, unknown, chart_backend)),
+            content_type="application/zip"
+        )
+        response["Content-Disposition"] = 'attachment; filename="reports.zip"'
+        return response
+
+    def iter_reports(self, datasets, cached, futures, busy, unknown, chart_backend):
+        """
+        Yields ``(filename, pdf_bytes)``: cached reports first, then the
+        missing ones in whatever order the worker processes finish them.
+        """
+        for dataset in datasets:
+            if dataset.id in cached:
+                yield f"report_{dataset.id}.pdf", cached[dataset.id]
+
+        failed = [f"report_{i}.pdf: Not found" for i in unknown]
+        failed += [f"report_{d.id}.pdf: Server is busy, retry later" for d in busy]
+        for future in as_completed(futures):
+            dataset = futures[future]
+            try:
+                pdf_bytes = future.result()
+            except Exception as e:
+                failed.append(f"report_{dataset.id}.pdf: {e}")
+                continue
+
+            cache.set_report(dataset, chart_backend, pdf_bytes)
+            yield f"report_{dataset.id}.pdf", pdf_bytes
+
+        if failed:
+            yield "errors.txt", "\n".join(failed).encode()
+
+
+# ============================================================
+# ✅ Token Endpoints
+# Login returns an expiring token (expired ones are replaced),
+# logout / rotate delete the old token (cache invalidated by signal)
+# ============================================================
+
+def token_response(token):
+    expires_at = token_expires_at(token.created)
+    return Response({
+        "token": token.key,
+        "expires_at": expires_at.isoformat() if expires_at else None,
+    })
+
+
+class ObtainTokenView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+
+        serializer = AuthTokenSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data["user"]
+
+        token, created = Token.objects.get_or_create(user=user)
+        if not created and is_expired(token.created):
+            token.delete()
+            token = Token.objects.create(user=user)
+
+        return token_response(token)
+
+
+class LogoutView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        Token.objects.filter(key=request.auth.key).delete()
+        return Response({"success": "Logged out ✅"})
+
+
+class RotateTokenView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        with transaction.atomic():
+            Token.objects.filter(user=request.user).delete()
+            token = Token.objects.create(user=request.user)
+        return token_response(token)
 
 
 # ============================================================
@@ -156,4 +762,17 @@ class SignupView(APIView):
             password=password
         )
 
-        return Response({"success": "User created successfully ✅"})
\ No newline at end of file
+        return Response({"success": "User created successfully ✅"})
+
+
+# ============================================================
+# ✅ Prometheus Metrics Endpoint
+# Latency histograms per view and per stage (this worker process)
+# ============================================================
+
+def metrics_view(request):
+    allowed = getattr(settings, "METRICS_ALLOWED_IPS", ["*"])
+    if "*" not in allowed and request.META.get("REMOTE_ADDR") not in allowed:
+        return HttpResponseForbidden()
+
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4")
@@ -0,0 +1,43 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+
+# ============================================================
+# ✅ Shared Process Pool (CPU-bound analysis + report rendering)
+# ============================================================
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    # ✅ Spawned workers (macOS/Windows) start without Django configured
+    import django
+    from django.apps import apps
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'chemical_backend.settings')
+    if not apps.ready:
+        django.setup()
+
+
+def worker_count():
+    return getattr(settings, "EQUIPMENT_WORKERS", None) or os.cpu_count() or 1
+
+
+def get_process_pool():
+    """
+    Returns the per-process worker pool, creating it on first use.
+    Jobs must be top-level functions with picklable arguments.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=worker_count(),
+                    initializer=_init_worker,
+                )
+    return _pool
@@ -46,11 +46,17 @@ def login(username, password):
 # =====================================================
 def logout():
     """
-    Clears the session token locally.
-    UI expects this function.
-    Backend logout endpoint is not required.
+    Revokes the token on the backend, then clears it locally.
+    UI expects this function; a failed backend call still logs out.
     """
     global TOKEN
+
+    if TOKEN is not None:
+        try:
+            requests.post(BASE_URL + "logout/", headers=auth_headers(), timeout=5)
+        except requests.RequestException:
+            pass
+
     TOKEN = None
 
 
@@ -80,7 +86,29 @@ def upload_csv(file_path):
 
 
 # =====================================================
-# ✅ Get last 5 uploads (UNCHANGED)
+# ✅ Upload many CSVs (or ZIPs of CSVs) in one request
+# =====================================================
+def upload_csv_batch(file_paths):
+    files = [("files", open(path, "rb")) for path in file_paths]
+    try:
+        response = requests.post(
+            BASE_URL + "upload/batch/",
+            headers=auth_headers(),
+            files=files,
+        )
+    finally:
+        for _, f in files:
+            f.close()
+
+    if response.status_code == 400 and "failed" in response.json():
+        return response.json()
+
+    response.raise_for_status()
+    return response.json()
+
+
+# =====================================================
+# ✅ Get latest uploads (first history page)
 # =====================================================
 def get_history():
     response = requests.get(
@@ -89,7 +117,7 @@ def get_history():
     )
 
     response.raise_for_status()
-    return response.json()
+    return response.json()["results"]
 
 
 # =====================================================
@@ -105,4 +133,29 @@ def download_report(dataset_id, save_path):
     response.raise_for_status()
 
     with open(save_path, "wb") as file:
-        file.write(response.content)
\ No newline at end of file
+        file.write(response.content)
+
+
+# =====================================================
+# ✅ Download ALL reports as one ZIP (streamed to disk)
+# =====================================================
+def download_reports_batch(save_path, dataset_ids=None):
+    """
+    Downloads a ZIP with the PDF report of every dataset
+    (or only dataset_ids). Written to disk chunk by chunk.
+    """
+    params = {}
+    if dataset_ids:
+        params["ids"] = ",".join(str(i) for i in dataset_ids)
+
+    with requests.get(
+        BASE_URL + "reports/batch/",
+        headers=auth_headers(),
+        params=params,
+        stream=True,
+    ) as response:
+        response.raise_for_status()
+
+        with open(save_path, "wb") as file:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                file.write(chunk)
@@ -23,7 +23,6 @@ class ContentArea(QWidget):
     def setup_ui(self):
         from styles import modern_card, TABLE_STYLESHEET
         from components.stat_box import StatBox
-        from charts import ChartCanvas
 
         layout = QVBoxLayout()
         layout.setSpacing(35)
@@ -32,7 +31,7 @@ class ContentArea(QWidget):
         layout.addLayout(self.create_page_header())
         layout.addWidget(self.create_statistics_card(modern_card, StatBox))
         layout.addWidget(self.create_table_card(modern_card, TABLE_STYLESHEET))
-        layout.addWidget(self.create_charts_card(modern_card, ChartCanvas))
+        layout.addWidget(self.create_charts_card(modern_card))
 
         self.setLayout(layout)
 
@@ -157,7 +156,7 @@ class ContentArea(QWidget):
     # ✅ CHARTS CARD
     # ============================================================
 
-    def create_charts_card(self, modern_card, ChartCanvas):
+    def create_charts_card(self, modern_card):
         card = modern_card()
         layout = QVBoxLayout()
 
@@ -168,12 +167,11 @@ class ContentArea(QWidget):
             color:#2563eb;
         """)
 
-        self.chart_canvas = ChartCanvas()
-        self.chart_canvas.setMinimumHeight(650)
-        self.chart_canvas.hide()
+        # ✅ Canvas (matplotlib) is created on the first chart update
+        self.chart_canvas = None
+        self.charts_layout = layout
 
         layout.addWidget(heading)
-        layout.addWidget(self.chart_canvas)
 
         card.setLayout(layout)
         return card
@@ -281,6 +279,13 @@ class ContentArea(QWidget):
     # ============================================================
 
     def update_charts(self, summary):
+        if self.chart_canvas is None:
+            from charts import ChartCanvas
+
+            self.chart_canvas = ChartCanvas()
+            self.chart_canvas.setMinimumHeight(650)
+            self.charts_layout.addWidget(self.chart_canvas)
+
         self.chart_canvas.show()
         self.chart_canvas.plot_type_distribution(summary)
 
@@ -297,4 +302,5 @@ class ContentArea(QWidget):
         self.data_table.setRowCount(0)
         self.data_table.setColumnCount(0)
         self.data_table.clearContents()
-        self.chart_canvas.hide()
\ No newline at end of file
+        if self.chart_canvas is not None:
+            self.chart_canvas.hide()
\ No newline at end of file
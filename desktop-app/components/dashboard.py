@@ -71,6 +71,7 @@ class Dashboard(QWidget):
         """Connect signals"""
         self.sidebar.upload_clicked.connect(self.handle_upload)
         self.sidebar.download_clicked.connect(self.handle_download_current)
+        self.sidebar.download_all_clicked.connect(self.handle_download_all)
         self.sidebar.logout_clicked.connect(self.handle_logout)
         self.sidebar.history_item_double_clicked.connect(self.handle_history_download)
     
@@ -79,21 +80,38 @@ class Dashboard(QWidget):
     # ============================================================
 
     def handle_upload(self):
-        """Handle file upload"""
-        from api import upload_csv
+        """Handle file upload (several files go through the batch endpoint)"""
+        from api import upload_csv, upload_csv_batch
         
-        file_path, _ = QFileDialog.getOpenFileName(
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self, 
-            "Select CSV File", 
+            "Select CSV Files", 
             "", 
-            "CSV Files (*.csv)"
+            "CSV Files (*.csv);;ZIP Archives (*.zip)"
         )
         
-        if not file_path:
+        if not file_paths:
             return
         
         try:
-            response = upload_csv(file_path)
+            if len(file_paths) == 1 and not file_paths[0].lower().endswith(".zip"):
+                response = upload_csv(file_paths[0])
+            else:
+                batch = upload_csv_batch(file_paths)
+                
+                if batch["failed"]:
+                    QMessageBox.warning(
+                        self,
+                        "Some Files Failed",
+                        "\n".join(f"{f['filename']}: {f['error']}" for f in batch["failed"])
+                    )
+                
+                if not batch["datasets"]:
+                    return
+                
+                # ✅ Show the last file of the batch
+                response = batch["datasets"][-1]
+            
             summary = response["summary"]
             
             self.current_dataset_id = response["dataset_id"]
@@ -135,6 +153,27 @@ class Dashboard(QWidget):
             except Exception as e:
                 QMessageBox.critical(self, "Download Failed", str(e))
     
+    # ============================================================
+    # DOWNLOAD ALL HISTORY (ONE ZIP)
+    # ============================================================
+
+    def handle_download_all(self):
+        """Handle download of every history report as a ZIP"""
+        from api import download_reports_batch
+        
+        save_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save All Reports",
+            "reports.zip",
+            "ZIP Archives (*.zip)"
+        )
+        
+        if save_path:
+            try:
+                download_reports_batch(save_path)
+            except Exception as e:
+                QMessageBox.critical(self, "Download Failed", str(e))
+    
     # ============================================================
     # DOWNLOAD FROM HISTORY
     # ============================================================
@@ -14,6 +14,7 @@ class Sidebar(QFrame):
     # Signals
     upload_clicked = pyqtSignal()
     download_clicked = pyqtSignal()
+    download_all_clicked = pyqtSignal()
     logout_clicked = pyqtSignal()
     history_item_double_clicked = pyqtSignal(object)
     
@@ -135,9 +136,30 @@ class Sidebar(QFrame):
         """)
         self.download_btn.clicked.connect(self.download_clicked.emit)
 
+        self.download_all_btn = QPushButton("📦  Download All History")
+        self.download_all_btn.setEnabled(False)
+        self.download_all_btn.setStyleSheet("""
+            QPushButton {
+                background: #0d9488;
+                color: white;
+                text-align: left;
+                padding: 14px 20px;
+                font-size: 15px;
+            }
+            QPushButton:hover {
+                background: #0f766e;
+            }
+            QPushButton:disabled {
+                background: #d1d5db;
+                color: #9ca3af;
+            }
+        """)
+        self.download_all_btn.clicked.connect(self.download_all_clicked.emit)
+
         layout.addWidget(actions_label)
         layout.addWidget(self.upload_btn)
         layout.addWidget(self.download_btn)
+        layout.addWidget(self.download_all_btn)
 
         container.setLayout(layout)
         return container
@@ -210,7 +232,9 @@ class Sidebar(QFrame):
         self.history_list.clear()
         for item in history_data:
             self.history_list.addItem(f"Dataset-report {item['id']}")
+        self.download_all_btn.setEnabled(bool(history_data))
     
     def clear_history(self):
         """Clear all history items"""
-        self.history_list.clear()
\ No newline at end of file
+        self.history_list.clear()
+        self.download_all_btn.setEnabled(False)
\ No newline at end of file
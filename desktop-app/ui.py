@@ -11,7 +11,6 @@ from styles import GLOBAL_STYLESHEET
 # ✅ Import UI pages properly from package
 from components.login_page import LoginPage
 from components.signup_page import SignupPage
-from components.dashboard import Dashboard
 
 
 class MainWindow(QWidget):
@@ -42,12 +41,13 @@ class MainWindow(QWidget):
         # Pages
         self.login_page = LoginPage()
         self.signup_page = SignupPage()
-        self.dashboard_page = Dashboard()
+        # ✅ Dashboard (and matplotlib behind it) is built after login,
+        # so the login window appears without loading the charting stack
+        self.dashboard_page = None
 
         # Add pages
         self.stack.addWidget(self.login_page)
         self.stack.addWidget(self.signup_page)
-        self.stack.addWidget(self.dashboard_page)
 
         # Default page
         self.stack.setCurrentWidget(self.login_page)
@@ -64,9 +64,6 @@ class MainWindow(QWidget):
         # Signup → Login
         self.signup_page.switch_to_login.connect(self.show_login)
 
-        # Dashboard → Logout → Login
-        self.dashboard_page.logout_requested.connect(self.show_login)
-
     def show_login(self):
         """Go back to login page"""
         self.login_page.clear_inputs()
@@ -78,6 +75,15 @@ class MainWindow(QWidget):
         self.stack.setCurrentWidget(self.signup_page)
 
     def show_dashboard(self):
-        """Go to dashboard page"""
+        """Go to dashboard page (built on first login)"""
+        if self.dashboard_page is None:
+            from components.dashboard import Dashboard
+
+            self.dashboard_page = Dashboard()
+            self.stack.addWidget(self.dashboard_page)
+
+            # Dashboard → Logout → Login
+            self.dashboard_page.logout_requested.connect(self.show_login)
+
         self.dashboard_page.initialize()
         self.stack.setCurrentWidget(self.dashboard_page)
\ No newline at end of file
@@ -1,5 +1,5 @@
 import { useState, useEffect } from "react";
-import API, { clearToken } from "./api";
+import API, { logoutUser } from "./api";
 
 import Login from "./components/Login";
 import Signup from "./components/Signup";
@@ -70,7 +70,7 @@ function App() {
   // ✅ Logout Handler (Reset Everything)
   // ====================================================
   const handleLogout = () => {
-    clearToken();
+    logoutUser();
 
     setLoggedIn(false);
     setAuthView("login");
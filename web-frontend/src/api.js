@@ -58,6 +58,16 @@ export const loginUser = async (username, password) => {
   return res.data;
 };
 
+// ✅ Logout API (revokes token on backend, then clears it locally)
+export const logoutUser = async () => {
+  try {
+    if (token) await API.post("logout/");
+  } catch {
+    // ✅ Still log out locally if the backend is unreachable
+  }
+  clearToken();
+};
+
 // =====================================================
 // ✅ EXISTING FUNCTIONALITIES (UPLOAD/HISTORY/REPORT)
 // =====================================================
@@ -74,10 +84,10 @@ export const uploadCSV = async (file) => {
   return res.data;
 };
 
-// ✅ Fetch User History (last 5 uploads)
+// ✅ Fetch User History (first page, newest first)
 export const fetchHistory = async () => {
   const res = await API.get("history/");
-  return res.data;
+  return res.data.results;
 };
 
 // ✅ Download PDF Report
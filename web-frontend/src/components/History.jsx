@@ -8,7 +8,7 @@ export default function History({ loggedIn }) {
     try {
       const res = await API.get("history/");
       // We only want the most recent ones for the sidebar
-      setHistory(res.data.slice(0, 5)); 
+      setHistory(res.data.results.slice(0, 5)); 
     } catch (err) {
       console.error("History fetch failed:", err.response?.status);
     }